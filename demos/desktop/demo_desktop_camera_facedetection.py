@@ -19,12 +19,16 @@ from sic_framework.core.message_python2 import (
     CompressedImageMessage,
 )
 
-# Queue for storing images and detection results
-import queue
-
 # Computer vision library for displaying images
 import cv2
 
+# Shared components from oli-4 (frame buffer, face crops)
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "oli-4"))
+from func.frame_buffer import FrameBuffer
+
 
 class FaceDetectionDemo(SICApplication):
     """
@@ -40,14 +44,18 @@ class FaceDetectionDemo(SICApplication):
         super(FaceDetectionDemo, self).__init__()
         
         # Demo-specific initialization
-        # Queue for storing images and detection results
-        self.imgs_buffer = queue.Queue(maxsize=1)
-        self.faces_buffer = queue.Queue(maxsize=1)
+        # Latest-value slots for images and detection results (never block the callbacks)
+        self.imgs_buffer = FrameBuffer()
+        self.faces_buffer = FrameBuffer()
         # Desktop device and camera component
         self.desktop = None
         self.desktop_cam = None
         # Face detection component
         self.face_dec = None
+        # Directory to save a JPEG crop of every detected face, None to disable
+        self.face_log_dir = None
+        self.face_cropper = None
+        self.jpeg_out = None
 
         self.set_log_level(sic_logging.INFO)
         
@@ -80,6 +88,32 @@ class FaceDetectionDemo(SICApplication):
         """
         self.faces_buffer.put(message.bboxes)
     
+    def save_face_crops(self, img, faces):
+        """
+        Save the detected faces as JPEG files. The frame is encoded once and the faces are
+        cut out losslessly in the compressed domain (no decode/re-encode per face).
+        
+        Args:
+            img: The camera image (BGR) the faces were detected on.
+            faces: The bounding boxes of the detected faces.
+        
+        Returns:
+            None
+        """
+        if self.face_cropper is None:
+            from func.face_roi import FaceCropper
+            self.face_cropper = FaceCropper()
+            os.makedirs(self.face_log_dir, exist_ok=True)
+        height, width = img.shape[:2]
+        if self.jpeg_out is None or len(self.jpeg_out) < self.face_cropper.jpeg.buffer_size(width, height):
+            self.jpeg_out = bytearray(self.face_cropper.jpeg.buffer_size(width, height))
+        jpeg_frame = self.face_cropper.jpeg.encode_into(img, self.jpeg_out)
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        for i, ((x, y, w, h), crop) in enumerate(self.face_cropper.crop(jpeg_frame, faces)):
+            path = os.path.join(self.face_log_dir, "face_{}_{}_{}x{}.jpg".format(stamp, i, w, h))
+            with open(path, "wb") as f:
+                f.write(crop)
+    
     def setup(self):
         """Initialize and configure the desktop camera and face detection service."""
         self.logger.info("Creating pipeline...")
@@ -109,21 +143,30 @@ class FaceDetectionDemo(SICApplication):
         self.logger.info("Starting main loop")
         
         try:
+            last_id = 0
+            last_faces_id = 0
             while not self.shutdown_event.is_set():
-                try:
-                    # Use timeout to make queue operations non-blocking
-                    img = self.imgs_buffer.get(timeout=0.1)  # 100ms timeout
-                    faces = self.faces_buffer.get(timeout=0.1)
-                    
-                    for face in faces:
-                        utils_cv2.draw_bbox_on_image(face, img)
-                    
-                    cv2.imshow("Face Detection", img)
-                    cv2.waitKey(1)
-                except queue.Empty:
-                    # No new data, continue loop to check shutdown flag
+                # Wait for a new image, with timeout to check the shutdown flag
+                frame = self.imgs_buffer.get(last_id, timeout=0.1)  # 100ms timeout
+                if frame is None:
                     continue
+                last_id = frame.frame_id
+                img = frame.image
+
+                # Draw the most recent detections, without waiting for new ones
+                faces_frame = self.faces_buffer.latest()
+                faces = faces_frame.image or []
+                if self.face_log_dir and faces and faces_frame.frame_id != last_faces_id:
+                    # Crop before drawing, the boxes are drawn into the image itself
+                    self.save_face_crops(img, faces)
+                last_faces_id = faces_frame.frame_id
+                for face in faces:
+                    utils_cv2.draw_bbox_on_image(face, img)
+                
+                cv2.imshow("Face Detection", img)
+                cv2.waitKey(1)
             cv2.destroyAllWindows()
+            self.logger.info("Frames: {}".format(self.imgs_buffer.stats()))
             self.logger.info("Cleaning up...")
         except Exception as e:
             self.logger.error("Exception: {}".format(e))
@@ -12,8 +12,8 @@ from sic_framework.devices.common_desktop.desktop_speakers import SpeakersConf
 
 # Import the message type(s) we're using
 from sic_framework.core.message_python2 import (
-    BoundingBoxesMessage,
     CompressedImageMessage,
+    CompressedImageRequest,
 )
 from sic_framework.core.message_python2 import AudioRequest
 
@@ -28,14 +28,14 @@ from sic_framework.services.dialogflow.dialogflow import (
     Dialogflow,
     DialogflowConf,
     GetIntentRequest,
+    StopListeningMessage,
 )
 from sic_framework.services.openai_gpt.gpt import GPT, GPTConf, GPTRequest
 
 # Import libraries necessary for the demo
-from time import sleep
+from time import monotonic, time
 import json
 from os import environ
-import queue
 import threading
 from os.path import abspath, join
 from subprocess import call
@@ -43,6 +43,15 @@ from dotenv import load_dotenv
 import cv2
 import numpy as np
 
+# Shared components from oli-4 (speech cache, sentence pipeline, frame/detection join, presence)
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "oli-4"))
+from func.frame_join import FrameDetectionJoin
+from func.presence import PresenceDetector
+from func.speech_pipeline import SpeechPipeline
+from func.tts_cache import TTSCache
+
 
 class ConversationApp(SICApplication):
     """
@@ -84,9 +93,26 @@ class ConversationApp(SICApplication):
     3. run-dialogflow
     4. run-google-tts
     5. run-gpt
+
+    With tts_cache_dir set, Google TTS waveforms are cached on disk and the fixed lines below are
+    synthesized at startup, so they play without waiting for the TTS service.
+    With pipelined_tts, replies are spoken sentence by sentence: the next sentence is synthesized while
+    the current one plays.
+    In the kiosk demo a person counts as present after a few consecutive frames with a face and as gone
+    after a run of frames without one; arriving starts the greeting right away, leaving stops listening.
     """
 
-    def __init__(self, google_keyfile_path, env_path=None, local_tts=False):
+    # Fixed lines of the demos, pre-synthesized into the TTS cache
+    KNOWN_LINES = [
+        "Hi there! How may I help you?",
+        "What kind of pizza would you like?",
+        "The bathroom is down that hallway. Second door on your left",
+        "Sorry, I did not understand",
+        "What is your favorite hobby?",
+    ]
+
+    def __init__(self, google_keyfile_path, env_path=None, local_tts=False, tts_cache_dir=None,
+                 pipelined_tts=True):
         # Call parent constructor (handles singleton initialization)
         super(ConversationApp, self).__init__()
         
@@ -98,9 +124,10 @@ class ConversationApp(SICApplication):
         self.fx = 1.0
         self.fy = 1.0
         self.flip = 1
-        self.imgs_buffer = queue.Queue(maxsize=1)
-        self.faces_buffer = queue.Queue(maxsize=1)
-        self.sees_face = False
+        # Pairs every face detection result with the camera frame it was computed on
+        self.face_frames = FrameDetectionJoin()
+        # Face results -> present/absent with hysteresis; wakes the kiosk dialog loop
+        self.presence = None
         self.desktop = None
         self.face_rec = None
         self.gpt = None
@@ -109,6 +136,12 @@ class ConversationApp(SICApplication):
         self.session_id = np.random.randint(10000)
         self.local_tts = local_tts
         self.tts = None
+        self.voice_name = "en-US-Standard-C"
+        self.tts_sample_rate = 24000
+        self.tts_cache_dir = tts_cache_dir
+        self.tts_cache = None
+        self.pipelined_tts = pipelined_tts
+        self.speech_pipeline = None
         
         # Configure logging
         self.set_log_level(sic_logging.INFO)
@@ -138,11 +171,19 @@ class ConversationApp(SICApplication):
                 keyfile_json=json.load(open(self.google_keyfile_path))
             )
             self.tts = Text2Speech(conf=tts_conf)
-        self.face_rec = FaceDetection(input_source=self.desktop.camera)
+            if self.tts_cache_dir:
+                self.tts_cache = TTSCache(self.tts_cache_dir, logger=self.logger)
+                threading.Thread(target=self.tts_cache.prepopulate, args=(self.KNOWN_LINES, self._google_tts),
+                                 kwargs=self._voice(), daemon=True).start()
+            if self.pipelined_tts:
+                self.speech_pipeline = SpeechPipeline(self._synthesize, self._play, logger=self.logger)
+        # Not connected to the camera: FaceDetection output carries no frame timestamp, so the kiosk sends it
+        # the newest frame as a request and pairs the reply with that frame (see _kiosk_run_facerequests)
+        self.face_rec = FaceDetection()
+        self.presence = PresenceDetector(logger=self.logger)
 
         # Send back the outputs to this program
         self.desktop.camera.register_callback(self._on_image)
-        self.face_rec.register_callback(self._on_faces)
 
         # Setup GPT client
         # Generate your personal env api key here: https://platform.openai.com/api-keys
@@ -168,12 +209,15 @@ class ConversationApp(SICApplication):
         self.dialogflow.register_callback(self._on_dialog)
 
     def _on_image(self, image_message: CompressedImageMessage):
-        self.imgs_buffer.put(image_message.image)
+        self.face_frames.on_frame(image_message)
 
-    def _on_faces(self, message: BoundingBoxesMessage):
-        self.faces_buffer.put(message.bboxes)
-        if message.bboxes:
-            self.sees_face = True
+    def _detect_faces(self, image):
+        return self.face_rec.request(CompressedImageRequest(image)).bboxes
+
+    def _on_presence(self, present, timestamp):
+        if not present:
+            # The person walked away: stop listening now instead of waiting for Dialogflow to time out
+            self.dialogflow.send_message(StopListeningMessage(self.session_id))
 
     def _on_dialog(self, message):
         """
@@ -189,39 +233,89 @@ class ConversationApp(SICApplication):
             if message.response.recognition_result.is_final:
                 print("Transcript:", message.response.recognition_result.transcript)
 
+    def _voice(self):
+        """Voice settings that are part of the TTS cache key"""
+        return {"voice_name": self.voice_name, "sample_rate": self.tts_sample_rate}
+
+    def _google_tts(self, text):
+        # Request speech synthesis from Google TTS
+        reply = self.tts.request(
+            GetSpeechRequest(text=text, voice_name=self.voice_name)
+        )
+        return reply.waveform, reply.sample_rate
+
+    def _synthesize(self, text):
+        if self.tts_cache:
+            return self.tts_cache.synthesize(text, self._google_tts, **self._voice())
+        return self._google_tts(text)
+
+    def _play(self, waveform, sample_rate):
+        self.desktop.speakers.request(AudioRequest(waveform, sample_rate))
+
     def speak(self, text):
+        """Speak text, returns the time to first audio in seconds (0 for espeak)"""
         if self.local_tts:
             call(["espeak", "-s140 -ven+18 -z", text])
-        else:
-            # Request speech synthesis from Google TTS
-            reply = self.tts.request(
-                GetSpeechRequest(text=text, voice_name="en-US-Standard-C")
-            )
-            self.desktop.speakers.request(AudioRequest(reply.waveform, reply.sample_rate))
+            return 0.0
+        if self.speech_pipeline:
+            # Whole lines are cached (KNOWN_LINES), look them up before splitting into sentences
+            cached = self.tts_cache.lookup(text, **self._voice()) if self.tts_cache else None
+            if cached is not None:
+                self.logger.info("[SPEECH] Playing cached line")
+                self._play(*cached)
+                return 0.0
+            return self.speech_pipeline.speak(text) or 0.0
+        start = monotonic()
+        waveform, sample_rate = self._synthesize(text)
+        first_audio = monotonic() - start
+        self.logger.info("[SPEECH] Time to first audio {:.0f} ms (synchronous)".format(1000 * first_audio))
+        self._play(waveform, sample_rate)
+        return first_audio
 
     def _kiosk_run_facedetection(self):
-        while True:
-            img = self.imgs_buffer.get()
-            faces = self.faces_buffer.get()
-
-            for face in faces:
+        last_id = 0
+        while not self.shutdown_event.is_set():
+            # Newest frame together with the faces detected on that frame
+            pair = self.face_frames.get(last_id, timeout=0.1)
+            if pair is None:
+                continue
+            last_id = pair.pair_id
+            img = pair.image
+
+            for face in pair.detections:
                 utils_cv2.draw_bbox_on_image(face, img)
 
             cv2.imshow("", img)
             cv2.waitKey(1)
+        self.logger.info("Face frames: {}".format(self.face_frames.stats()))
+
+    def _kiosk_run_facerequests(self):
+        # Face detection on the newest frame, one request at a time; results also drive presence
+        self.face_frames.run_requests(self._detect_faces, on_result=self.presence.update,
+                                      stop_event=self.shutdown_event)
 
     def _kiosk_run_dialogflow(self):
-        attempts = 1
         max_attempts = 3
-        init = True
         while not self.shutdown_event.is_set():
             try:
-                if self.sees_face and self.can_listen:
-                    if init:
-                        self.speak("Hi there! How may I help you?")
-                        init = False
-
+                # Block until a person arrives (wake up once a second to check for shutdown)
+                if not self.presence.wait_present(timeout=1.0):
+                    continue
+
+                # New visitor, new conversation
+                self.session_id = np.random.randint(10000)
+                self.can_listen = True
+                attempts = 1
+                appeared = self.presence.appeared
+                reaction = time() - appeared if appeared else 0.0
+                reaction += self.speak("Hi there! How may I help you?")
+                self.logger.info("[PRESENCE] Face to greeting {:.0f} ms".format(1000 * reaction))
+
+                while self.can_listen and self.presence.present.is_set() and not self.shutdown_event.is_set():
                     reply = self.dialogflow.request(GetIntentRequest(self.session_id))
+                    if not self.presence.present.is_set():
+                        # Stopped by _on_presence, nobody left to answer
+                        break
 
                     print("The detected intent:", reply.intent)
 
@@ -244,14 +338,20 @@ class ConversationApp(SICApplication):
                         attempts += 1
                         if attempts == max_attempts:
                             self.can_listen = False
-                else:
-                    sleep(0.1)
+
+                # Done with this visitor: wait until they leave before greeting the next one
+                while not self.presence.wait_absent(timeout=1.0) and not self.shutdown_event.is_set():
+                    pass
             except KeyboardInterrupt:
                 print("Stop the dialogflow component.")
                 self.dialogflow.stop()
                 break
 
     def run_kiosk_conversation(self):
+        # Only the kiosk ends a conversation when the person leaves the frame
+        self.presence.add_listener(self._on_presence)
+        fr_thread = threading.Thread(target=self._kiosk_run_facerequests, daemon=True)
+        fr_thread.start()
         fd_thread = threading.Thread(target=self._kiosk_run_facedetection)
         df_thread = threading.Thread(target=self._kiosk_run_dialogflow)
         fd_thread.start()
@@ -277,6 +377,10 @@ class ConversationApp(SICApplication):
         except Exception as e:
             self.logger.error("Exception: {}".format(e))
         finally:
+            if self.tts_cache:
+                self.tts_cache.flush()
+            if self.speech_pipeline:
+                self.speech_pipeline.close()
             self.shutdown()
 
 
@@ -285,7 +389,8 @@ if __name__ == "__main__":
     # This will be the single SICApplication instance for the process
     conversation_app = ConversationApp(
         google_keyfile_path=abspath(join('..', '..', 'conf', 'google', 'google-key.json')),
-        env_path=abspath(join("..", "..", "conf", ".env")))
+        env_path=abspath(join("..", "..", "conf", ".env")),
+        tts_cache_dir=abspath(join("..", "..", "cache", "tts")))
     conversation_app.run_llm_conversation()
     # or
     # conversation_app.run_kiosk_conversation()
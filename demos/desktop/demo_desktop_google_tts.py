@@ -22,6 +22,12 @@ from sic_framework.core.message_python2 import AudioRequest
 import json
 from os.path import abspath, join
 
+# Shared components from oli-4 (speech cache)
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "oli-4"))
+from func.tts_cache import TTSCache
+
 
 class GoogleTTSDemo(SICApplication):
     """
@@ -35,9 +41,11 @@ class GoogleTTSDemo(SICApplication):
 
     NOTE: you need to have setup Cloud Text-to-Speech API in your Google Cloud Console and configure the credential keyfile.
     See https://social-ai-vu.github.io/social-interaction-cloud/external_apis/google_cloud.html#google-cloud-platform-guide
+
+    With tts_cache_dir set, the synthesized waveform is cached on disk and replayed on the next run.
     """
     
-    def __init__(self, google_keyfile_path):
+    def __init__(self, google_keyfile_path, tts_cache_dir=None):
         # Call parent constructor (handles singleton initialization)
         super(GoogleTTSDemo, self).__init__()
         
@@ -45,6 +53,8 @@ class GoogleTTSDemo(SICApplication):
         self.desktop = None
         self.tts = None
         self.google_keyfile_path = google_keyfile_path
+        self.voice_name = "en-US-Standard-C"
+        self.tts_cache = TTSCache(tts_cache_dir, logger=self.logger) if tts_cache_dir else None
         
         # Configure logging
         self.set_log_level(sic_logging.INFO)
@@ -64,21 +74,29 @@ class GoogleTTSDemo(SICApplication):
         )
         self.tts = Text2Speech(conf=tts_conf)
     
+    def synthesize(self, text):
+        """Request speech synthesis from Google TTS, returns (waveform, sample_rate)"""
+        reply = self.tts.request(
+            GetSpeechRequest(text=text, voice_name=self.voice_name)
+        )
+        return reply.waveform, reply.sample_rate
+    
     def run(self):
         """Main application logic."""
         self.logger.info("Starting Google TTS Demo")
         
         try:
-            # Request speech synthesis from Google TTS
-            reply = self.tts.request(
-                GetSpeechRequest(text="Hi, I am your computer", voice_name="en-US-Standard-C")
-            )
+            text = "Hi, I am your computer"
+            if self.tts_cache:
+                waveform, sample_rate = self.tts_cache.synthesize(text, self.synthesize, voice_name=self.voice_name)
+            else:
+                waveform, sample_rate = self.synthesize(text)
             
             # Make sure that the sample rate of the speakers is the same as the sample rate of the audio from Google
-            self.desktop = Desktop(speakers_conf=SpeakersConf(sample_rate=reply.sample_rate))
+            self.desktop = Desktop(speakers_conf=SpeakersConf(sample_rate=sample_rate))
             
             # Play the audio through the speakers
-            response = self.desktop.speakers.request(AudioRequest(reply.waveform, reply.sample_rate))
+            response = self.desktop.speakers.request(AudioRequest(waveform, sample_rate))
             
             self.logger.info("Speech playback completed")
         except Exception as e:
@@ -90,5 +108,6 @@ class GoogleTTSDemo(SICApplication):
 if __name__ == "__main__":
     # Create and run the demo
     # This will be the single SICApplication instance for the process
-    demo = GoogleTTSDemo(google_keyfile_path=abspath(join("..", "..", "conf", "google", "google-key.json")))
+    demo = GoogleTTSDemo(google_keyfile_path=abspath(join("..", "..", "conf", "google", "google-key.json")),
+                         tts_cache_dir=abspath(join("..", "..", "cache", "tts")))
     demo.run()
@@ -17,14 +17,23 @@ from sic_framework.devices.common_desktop.desktop_camera import DesktopCameraCon
 from sic_framework.core.message_python2 import (
     BoundingBoxesMessage,
     CompressedImageMessage,
+    CompressedImageRequest,
 )
 
-# Queue for storing images
-import queue
-
 # Computer vision library for displaying images
 import cv2
 
+# Libraries for the adaptive detection worker
+import threading
+import time
+
+# Shared components from oli-4 (frame buffer, adaptive detection rate)
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "oli-4"))
+from func.adaptive_detection import AdaptiveDetectionScheduler
+from func.frame_buffer import FrameBuffer
+
 
 class ObjectDetectionDemo(SICApplication):
     """
@@ -35,6 +44,10 @@ class ObjectDetectionDemo(SICApplication):
     1. pip install --upgrade social_interaction_cloud[object-detection]
         Note: on macOS you might need use quotes pip install --upgrade "social-interaction-cloud[...]"
     2. run-object-detection
+
+    With adaptive_detection the service is not fed the camera stream at a fixed frequency. Instead this
+    application scores every frame for scene motion and requests a detection between min_rate (static
+    scene) and max_rate (moving scene); in between the last detections are drawn.
     """
     
     def __init__(self):
@@ -42,8 +55,8 @@ class ObjectDetectionDemo(SICApplication):
         super(ObjectDetectionDemo, self).__init__()
         
         # Demo-specific initialization
-        # Queue for storing images
-        self.imgs_buffer = queue.Queue(maxsize=1)
+        # Latest-frame slot for images (the callback never blocks)
+        self.imgs_buffer = FrameBuffer()
         # Store the latest detections
         self.latest_objects = []
         # Desktop device and camera component
@@ -51,6 +64,12 @@ class ObjectDetectionDemo(SICApplication):
         self.desktop_cam = None
         # Object detection component
         self.object_det = None
+        # Adaptive detection rate (False: the service detects at a fixed 15 Hz)
+        self.adaptive_detection = True
+        self.scheduler = AdaptiveDetectionScheduler(min_rate=1.0, max_rate=15.0)
+        # Frames picked by the scheduler, detected on a worker thread
+        self.detect_frames = FrameBuffer()
+        self.latest_objects_time = None
         
         # Configure logging
         self.set_log_level(sic_logging.INFO)
@@ -70,11 +89,7 @@ class ObjectDetectionDemo(SICApplication):
         Returns:
             None
         """
-        # Remove old image if buffer is full
-        try:
-            self.imgs_buffer.get_nowait()
-        except queue.Empty:
-            pass
+        # Replaces the previous image if it was not shown yet
         self.imgs_buffer.put(image_message.image)
     
     def on_objects(self, message: BoundingBoxesMessage):
@@ -107,35 +122,82 @@ class ObjectDetectionDemo(SICApplication):
         self.logger.info("Setting up object detection service")
         # Configure object detection with frequency of N Hz (detections every 1/N seconds)
         obj_det_conf = ObjectDetectionConf(frequency=15.0)  # You can adjust this value
-        # setup the service(s) we want to use, taking the output of the desktop camera as the input
-        self.object_det = ObjectDetection(input_source=self.desktop_cam, conf=obj_det_conf)
+        if self.adaptive_detection:
+            # Detections are requested per frame by the scheduler, the camera is not connected to the service
+            self.object_det = ObjectDetection(conf=obj_det_conf)
+        else:
+            # setup the service(s) we want to use, taking the output of the desktop camera as the input
+            self.object_det = ObjectDetection(input_source=self.desktop_cam, conf=obj_det_conf)
         
         self.logger.info("Subscribing callback functions")
         
         # register the callback functions to act upon arrival of the relevant messages
         self.desktop_cam.register_callback(callback=self.on_image)
-        self.object_det.register_callback(callback=self.on_objects)
+        if not self.adaptive_detection:
+            self.object_det.register_callback(callback=self.on_objects)
+    
+    def detect_worker(self):
+        """Run the detections the scheduler asked for, one at a time."""
+        last_id = 0
+        while not self.shutdown_event.is_set():
+            frame = self.detect_frames.get(last_id, timeout=0.1)
+            if frame is None:
+                continue
+            last_id = frame.frame_id
+            try:
+                self.latest_objects = self.object_det.request(CompressedImageRequest(frame.image)).bboxes
+                self.latest_objects_time = frame.timestamp
+            except Exception as e:
+                self.logger.warning("Object detection failed: {}".format(e))
+            finally:
+                self.scheduler.detection_done()
     
     def run(self):
         """Main application loop."""
         self.logger.info("Starting main loop")
         
         try:
+            if self.adaptive_detection:
+                threading.Thread(target=self.detect_worker, daemon=True).start()
+            start = time.monotonic()
+            cpu_start = time.process_time()
+            ages = []
+            last_id = 0
             while not self.shutdown_event.is_set():
-                try:
-                    # Get latest image (non-blocking with timeout)
-                    img = self.imgs_buffer.get(timeout=0.1)
-                    
-                    # Draw the latest detections on every frame
-                    for obj in self.latest_objects:
-                        utils_cv2.draw_bbox_on_image(obj, img)
-                    
-                    cv2.imshow("Object Detection", img)
-                    cv2.waitKey(1)
-                except queue.Empty:
-                    # No new image, continue loop to check shutdown flag
+                # Wait for a new image, with timeout to check the shutdown flag
+                frame = self.imgs_buffer.get(last_id, timeout=0.1)
+                if frame is None:
                     continue
+                last_id = frame.frame_id
+                img = frame.image
+                
+                if self.adaptive_detection:
+                    if self.scheduler.observe(img):
+                        self.scheduler.detection_started()
+                        # Copy, the boxes are drawn into img below
+                        self.detect_frames.put(img.copy())
+                    if self.latest_objects_time is not None:
+                        ages.append(time.monotonic() - self.latest_objects_time)
+                
+                # Draw the latest detections on every frame
+                for obj in self.latest_objects:
+                    utils_cv2.draw_bbox_on_image(obj, img)
+                
+                cv2.imshow("Object Detection", img)
+                cv2.waitKey(1)
             
+            self.logger.info("Frames: {}".format(self.imgs_buffer.stats()))
+            if self.adaptive_detection:
+                elapsed = time.monotonic() - start
+                stats = self.scheduler.stats(elapsed)
+                self.logger.info(
+                    "Adaptive detection: {:.1f} detections/s (fixed: 15 Hz), motion scoring {:.2f} ms/frame, "
+                    "application CPU {:.0f}%, mean detection age {:.0f} ms".format(
+                        stats["detections_per_second"], stats["score_ms_per_frame"],
+                        100.0 * (time.process_time() - cpu_start) / elapsed,
+                        1000.0 * sum(ages) / len(ages) if ages else 0.0,
+                    )
+                )
             self.logger.info("Cleaning up...")
             cv2.destroyAllWindows()
         except Exception as e:
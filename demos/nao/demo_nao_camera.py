@@ -11,9 +11,14 @@ from sic_framework.devices.common_naoqi.naoqi_camera import NaoqiCameraConf
 from sic_framework.core.message_python2 import CompressedImageMessage
 
 # Import libraries necessary for the demo
-import queue
 import cv2
 
+# Shared components from oli-4 (frame buffer)
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "oli-4"))
+from func.frame_buffer import FrameBuffer
+
 
 class NaoCameraDemo(SICApplication):
     """
@@ -28,7 +33,8 @@ class NaoCameraDemo(SICApplication):
         # Demo-specific initialization
         self.nao_ip = "XXX"
         self.nao = None
-        self.imgs = queue.Queue()
+        # Latest-frame slot: the callback never blocks and old frames are dropped
+        self.imgs = FrameBuffer()
         
         self.set_log_level(sic_logging.INFO)
 
@@ -68,15 +74,17 @@ class NaoCameraDemo(SICApplication):
         self.logger.info("Starting demo...")
         
         try:
+            last_id = 0
             while not self.shutdown_event.is_set():
-                try:
-                    img = self.imgs.get(timeout=0.1)
-                    cv2.imshow("NAO Camera", img[..., ::-1])  # cv2 is BGR instead of RGB
-                    cv2.waitKey(1)
-                except queue.Empty:
+                frame = self.imgs.get(last_id, timeout=0.1)
+                if frame is None:
                     continue
+                last_id = frame.frame_id
+                cv2.imshow("NAO Camera", frame.image[..., ::-1])  # cv2 is BGR instead of RGB
+                cv2.waitKey(1)
             
             cv2.destroyAllWindows()
+            self.logger.info("Frames: {}".format(self.imgs.stats()))
             self.logger.info("Camera demo completed")
         except Exception as e:
             self.logger.error("Error: {}".format(e=e))
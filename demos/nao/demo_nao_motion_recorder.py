@@ -9,7 +9,6 @@ from sic_framework.devices.common_naoqi.naoqi_autonomous import NaoRestRequest,
 # Import message types and requests
 from sic_framework.devices.common_naoqi.naoqi_motion_recorder import (
     NaoqiMotionRecorderConf,
-    NaoqiMotionRecording,
     PlayRecording,
     StartRecording,
     StopRecording,
@@ -19,11 +18,19 @@ from sic_framework.devices.common_naoqi.naoqi_stiffness import Stiffness
 # Import libraries necessary for the demo
 import time
 
+# Shared components from oli-4 (compact motion recordings)
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "oli-4"))
+from func.motion_keyframes import reduce_recording
+from func.motion_store import MOTION_EXT, MotionClip
+
 
 class NaoMotionRecorderDemo(SICApplication):
     """
     NAO motion recorder demo application.
     Demonstrates how to record and replay a motion on a NAO robot.
+    Recordings are saved as compact MotionClip files (float32 matrix, memory-mapped on load).
     """
     
     def __init__(self):
@@ -36,6 +43,12 @@ class NaoMotionRecorderDemo(SICApplication):
         self.record_time = 10
         self.nao = None
         self.chain = ["LArm", "RArm"]
+        # "float32", "int16" (quantized) or "delta" (smallest, see func/motion_store.py)
+        self.motion_encoding = "float32"
+        # Keyframe reduction before replay: max joint error in radians (None to send every sample).
+        # Only used with the recorder's use_interpolation=True, setAngles replay needs every sample.
+        self.replay_max_error = 0.01
+        self.motion_record_conf = None
 
         self.set_log_level(sic_logging.INFO)
         
@@ -49,8 +62,8 @@ class NaoMotionRecorderDemo(SICApplication):
         self.logger.info("Starting NAO Motion Recorder Demo...")
         
         # Initialize NAO with motion recorder configuration
-        conf = NaoqiMotionRecorderConf(use_sensors=True)
-        self.nao = Nao(self.nao_ip, motion_record_conf=conf)
+        self.motion_record_conf = NaoqiMotionRecorderConf(use_sensors=True)
+        self.nao = Nao(self.nao_ip, motion_record_conf=self.motion_record_conf)
     
     def run(self):
         """Main application logic."""
@@ -69,15 +82,23 @@ class NaoMotionRecorderDemo(SICApplication):
             # Save the recording
             self.logger.info("Saving action")
             recording = self.nao.motion_record.request(StopRecording())
-            recording.save(self.motion_name)
-            
-            # Replay the recording
-            self.logger.info("Replaying action")
-            self.nao.stiffness.request(
-                Stiffness(stiffness=0.7, joints=self.chain)
-            )  # Enable stiffness for replay
-            recording = NaoqiMotionRecording.load(self.motion_name)
-            self.nao.motion_record.request(PlayRecording(recording))
+            clip = MotionClip.from_recording(recording)
+            if not len(clip):
+                self.logger.warning("Nothing was recorded, skipping save and replay")
+            else:
+                motion_path = self.motion_name + MOTION_EXT
+                size = clip.save(motion_path, encoding=self.motion_encoding)
+                self.logger.info("Saved {} ({} bytes)".format(motion_path, size))
+                
+                # Replay the recording
+                self.logger.info("Replaying action")
+                self.nao.stiffness.request(
+                    Stiffness(stiffness=0.7, joints=self.chain)
+                )  # Enable stiffness for replay
+                recording = MotionClip.load(motion_path).to_recording()
+                if self.replay_max_error and self.motion_record_conf.use_interpolation:
+                    recording, _ = reduce_recording(recording, max_error=self.replay_max_error, logger=self.logger)
+                self.nao.motion_record.request(PlayRecording(recording))
 
             # always end with a rest, whenever you reach the end of your code
             self.nao.autonomous.request(NaoRestRequest())
@@ -12,6 +12,7 @@ from sic_framework.devices.common_naoqi.naoqi_autonomous import (
     NaoRestRequest,
 )
 from sic_framework.devices.common_naoqi.nao_motion_streamer import (
+    NaoJointAngles,
     NaoMotionStreamerConf,
     StartStreaming,
     StopStreaming,
@@ -24,12 +25,21 @@ from sic_framework.devices.common_naoqi.naoqi_text_to_speech import (
 # Import libraries necessary for the demo
 import time
 
+# Shared components from oli-4 (adaptive joint streaming)
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "oli-4"))
+from func.puppet_stream import AdaptiveJointStream
+from func.stream_probe import LatencyProbe, format_report
+
 
 class NaoPupeteeringDemo(SICApplication):
     """
     NAO puppeteering demo application.
     Demonstrates how to control one NAO robot by moving another NAO robot's joints.
     Requires two NAO robots.
+    With adaptive_streaming the master's joint angles go through this application, which only
+    forwards joints that moved more than the deadband, at a rate that follows the motion speed.
     """
     
     def __init__(self):
@@ -46,6 +56,16 @@ class NaoPupeteeringDemo(SICApplication):
         self.puppet_motion = None
         self.JOINTS = ["Head", "RArm", "LArm"]
         self.FIXED_JOINTS = ["RLeg", "LLeg"]
+        # Adaptive mode: deadband in radians, send rate between min and max (Hz)
+        self.adaptive_streaming = True
+        self.deadband = 0.01
+        self.min_rate = 5
+        self.max_rate = 50
+        self.joint_stream = None
+        # Instrumentation: arrival jitter and gaps in the master stream, written as JSON (None to disable)
+        self.latency_log = None  # e.g. "logs/puppet_latency.json"
+        self.network_setup = "wifi"
+        self.latency_probe = None
 
         self.set_log_level(sic_logging.INFO)
         
@@ -59,7 +79,8 @@ class NaoPupeteeringDemo(SICApplication):
         self.logger.info("Starting NAO Puppeteering Demo...")
         
         self.logger.info("Initializing puppet master...")
-        conf = NaoMotionStreamerConf(samples_per_second=30)
+        # In adaptive mode the master is sampled at the max rate, the stream decides what to forward
+        conf = NaoMotionStreamerConf(samples_per_second=self.max_rate if self.adaptive_streaming else 30)
         self.puppet_master = Nao(self.puppet_master_ip, motion_stream_conf=conf)
         self.puppet_master.autonomous.request(NaoBasicAwarenessRequest(False))
         self.puppet_master.autonomous.request(NaoBackgroundMovingRequest(False))
@@ -71,13 +92,35 @@ class NaoPupeteeringDemo(SICApplication):
         self.puppet.autonomous.request(NaoBasicAwarenessRequest(False))
         self.puppet.autonomous.request(NaoBackgroundMovingRequest(False))
         self.puppet.stiffness.request(Stiffness(0.5, joints=self.JOINTS))
-        self.puppet_motion = self.puppet.motion_streaming(input_source=self.puppet_master_motion)
+        if self.adaptive_streaming:
+            self.joint_stream = AdaptiveJointStream(
+                deadband=self.deadband, min_rate=self.min_rate, max_rate=self.max_rate
+            )
+            self.puppet_motion = self.puppet.motion_streaming()
+        else:
+            self.puppet_motion = self.puppet.motion_streaming(input_source=self.puppet_master_motion)
+        if self.latency_log:
+            self.latency_probe = LatencyProbe(expected_interval=1.0 / conf.samples_per_second)
+        if self.adaptive_streaming or self.latency_probe:
+            self.puppet_master_motion.register_callback(self.on_master_angles)
         
         self.logger.info("Setting fixed joints to high stiffness...")
         # Set fixed joints to high stiffness such that the robots don't fall
         self.puppet_master.stiffness.request(Stiffness(0.7, joints=self.FIXED_JOINTS))
         self.puppet.stiffness.request(Stiffness(0.7, joints=self.FIXED_JOINTS))
     
+    def on_master_angles(self, message):
+        """Forward the joints that moved (adaptive mode); setAngles on the puppet accepts a subset of joints."""
+        if self.latency_probe:
+            # The streamer does not timestamp its samples, so this records when they arrive on the
+            # channel the puppet consumes: interval jitter and gaps (possibly dropped samples)
+            self.latency_probe.applied()
+        if not self.joint_stream:
+            return
+        update = self.joint_stream.update(message.joints, message.angles)
+        if update is not None:
+            self.puppet_motion.send_message(NaoJointAngles(*update))
+
     def run(self):
         """Main application logic."""
         try:
@@ -105,6 +148,19 @@ class NaoPupeteeringDemo(SICApplication):
             )
             self.puppet_master.stiffness.request(Stiffness(0.7, joints=self.JOINTS))
             self.puppet_master_motion.request(StopStreaming())
+            if self.latency_probe:
+                report = self.latency_probe.export(
+                    self.latency_log, network=self.network_setup, adaptive=self.adaptive_streaming,
+                    samples_per_second=self.max_rate if self.adaptive_streaming else 30
+                )
+                self.logger.info("Master stream: {}".format(format_report(report["report"])))
+            if self.joint_stream:
+                stats = self.joint_stream.stats()
+                self.logger.info(
+                    "Adaptive stream: {} samples, {} messages ({:.1f}/s), {} joint values".format(
+                        stats["samples"], stats["messages"], stats["messages_per_second"], stats["values"]
+                    )
+                )
             
             # Set both robots in rest pose again
             self.puppet.autonomous.request(NaoRestRequest())
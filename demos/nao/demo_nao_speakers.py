@@ -6,17 +6,21 @@ from sic_framework.core import sic_logging
 from sic_framework.devices import Nao
 from sic_framework.devices.nao_stub import NaoStub
 
-# Import message types
-from sic_framework.core.message_python2 import AudioRequest
-
 # Import libraries necessary for the demo
 import wave
 
+# Shared components from oli-4 (chunked audio streaming)
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "oli-4"))
+from func.audio_stream import StreamingAudioSender
+
 
 class NaoSpeakersDemo(SICApplication):
     """
     NAO speakers demo application.
     Demonstrates how to use the NAO robot speakers to play a wav file.
+    The file is streamed in chunks, so playback starts after the first chunk instead of the whole file.
     """
     
     def __init__(self):
@@ -27,8 +31,7 @@ class NaoSpeakersDemo(SICApplication):
         self.nao_ip = "XXX"
         self.audio_file = "test_sound.wav"
         self.nao = None
-        self.wavefile = None
-        self.samplerate = None
+        self.sender = None
         
         # Log files will only be written if set_log_file is called. Must be a valid full path to a directory.
         # self.set_log_file("/Users/apple/Desktop/SAIL/SIC_Development/sic_applications/demos/nao/logs")
@@ -41,35 +44,33 @@ class NaoSpeakersDemo(SICApplication):
         """Initialize and configure the NAO robot and load audio file."""
         self.logger.info("Starting NAO Speakers Demo...")
         
-        # Read the wav file
-        self.wavefile = wave.open(self.audio_file, "rb")
-        self.samplerate = self.wavefile.getframerate()
-        
-        self.logger.info("Audio file specs:")
-        self.logger.info("  sample rate: {}".format(self.wavefile.getframerate()))
-        self.logger.info("  length: {}".format(self.wavefile.getnframes()))
-        self.logger.info("  data size in bytes: {}".format(self.wavefile.getsampwidth()))
-        self.logger.info("  number of channels: {}".format(self.wavefile.getnchannels()))
-        self.logger.info("")
+        # Read the wav file header only, the audio itself is streamed
+        with wave.open(self.audio_file, "rb") as wavefile:
+            self.logger.info("Audio file specs:")
+            self.logger.info("  sample rate: {}".format(wavefile.getframerate()))
+            self.logger.info("  length: {}".format(wavefile.getnframes()))
+            self.logger.info("  data size in bytes: {}".format(wavefile.getsampwidth()))
+            self.logger.info("  number of channels: {}".format(wavefile.getnchannels()))
+            self.logger.info("")
         
         # Initialize the NAO robot
         self.nao = Nao(ip=self.nao_ip)
+        
+        # Send 0.5 s chunks, at most 2 chunks ahead of playback
+        self.sender = StreamingAudioSender(self.nao.speaker, chunk_seconds=0.5, max_ahead=2, logger=self.logger)
     
     def run(self):
         """Main application logic."""
         try:
-            self.logger.info("Sending audio!")
-            sound = self.wavefile.readframes(self.wavefile.getnframes())
-            message = AudioRequest(sample_rate=self.samplerate, waveform=sound)
-            self.nao.speaker.request(message)
+            self.logger.info("Streaming audio!")
+            stats = self.sender.send_wav(self.audio_file, cancel_event=self.shutdown_event)
 
+            self.logger.info("First chunk sent after {:.1f} ms".format(1000 * stats["first_chunk"]))
             self.logger.info("Audio sent, without waiting for it to complete playing.")
             self.logger.info("Speakers demo completed successfully")
         except Exception as e:
             self.logger.error("Error in speakers demo: {}".format(e=e))
         finally:
-            if self.wavefile:
-                self.wavefile.close()
             self.logger.info("Shutting down application")
             self.shutdown()
 
@@ -32,6 +32,8 @@ import numpy as np
 import math
 import warnings
 import os
+import threading
+import weakref
 from struct import unpack, calcsize
 
 # default libTurboJPEG library path
@@ -139,8 +141,10 @@ tjMCUHeight = [8, 8, 16, 8, 16, 8]
 
 # miscellaneous flags
 # see details in https://github.com/libjpeg-turbo/libjpeg-turbo/blob/master/turbojpeg.h
-# note: TJFLAG_NOREALLOC cannot be supported due to reallocation is needed by PyTurboJPEG.
+# note: TJFLAG_NOREALLOC is only used by encode_into(), which sizes the
+# caller's buffer with tjBufSize; the other encoders need reallocation.
 TJFLAG_BOTTOMUP = 2
+TJFLAG_NOREALLOC = 1024
 TJFLAG_FASTUPSAMPLE = 256
 TJFLAG_FASTDCT = 2048
 TJFLAG_ACCURATEDCT = 4096
@@ -291,11 +295,42 @@ def split_byte_into_nibbles(value):
     return first, second
 
 
+class _HandleCache(object):
+    """tj handles owned by one thread, destroyed when the thread ends or on close()"""
+    def __init__(self, destroy):
+        self.destroy = destroy
+        self.handles = {}
+
+    def release(self):
+        handles = list(self.handles.values())
+        self.handles.clear()
+        for handle in handles:
+            self.destroy(handle)
+
+    def __del__(self):
+        try:
+            self.release()
+        except Exception:
+            # interpreter shutdown, the library may already be gone
+            pass
+
 class TurboJPEG(object):
-    """A Python wrapper of libjpeg-turbo for decoding and encoding JPEG image."""
-    def __init__(self, lib_path=None):
+    """A Python wrapper of libjpeg-turbo for decoding and encoding JPEG image.
+
+    With reuse_handles=True (default) each thread keeps one decompress,
+    compress and transform handle and reuses it across calls instead of
+    creating and destroying a handle per call. close() destroys all cached
+    handles; it must not run while another thread is using the instance.
+    """
+    def __init__(self, lib_path=None, reuse_handles=True):
         turbo_jpeg = cdll.LoadLibrary(
             self.__find_turbojpeg() if lib_path is None else lib_path)
+        self.__reuse_handles = reuse_handles
+        self.__local = threading.local()
+        self.__caches = weakref.WeakSet()
+        self.__caches_lock = threading.Lock()
+        self.__pool = None
+        self.__pool_threads = 0
         self.__init_decompress = turbo_jpeg.tjInitDecompress
         self.__init_decompress.restype = c_void_p
         self.__buffer_size = turbo_jpeg.tjBufSize
@@ -377,12 +412,37 @@ class TurboJPEG(object):
             (scaling_factors[i].num, scaling_factors[i].denom)
             for i in range(num_scaling_factors.value)
         )
+        self.__init_handle = {
+            'decompress': self.__init_decompress,
+            'compress': self.__init_compress,
+            'transform': self.__init_transform,
+        }
+
+    def close(self):
+        """destroys the handles cached by all threads and stops the decode_batch pool"""
+        with self.__caches_lock:
+            pool = self.__pool
+            self.__pool = None
+        if pool is not None:
+            pool.shutdown(wait=True)
+        with self.__caches_lock:
+            caches = list(self.__caches)
+            self.__caches = weakref.WeakSet()
+        for cache in caches:
+            cache.release()
+        self.__local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def decode_header(self, jpeg_buf):
         """decodes JPEG header and returns image properties as a tuple.
            e.g. (width, height, jpeg_subsample, jpeg_colorspace)
         """
-        handle = self.__init_decompress()
+        handle = self.__acquire_handle('decompress')
         try:
             width = c_int()
             height = c_int()
@@ -397,11 +457,11 @@ class TurboJPEG(object):
                 self.__report_error(handle)
             return (width.value, height.value, jpeg_subsample.value, jpeg_colorspace.value)
         finally:
-            self.__destroy(handle)
+            self.__release_handle(handle)
 
     def decode(self, jpeg_buf, pixel_format=TJPF_BGR, scaling_factor=None, flags=0):
         """decodes JPEG memory buffer to numpy array."""
-        handle = self.__init_decompress()
+        handle = self.__acquire_handle('decompress')
         try:
             jpeg_array = np.frombuffer(jpeg_buf, dtype=np.uint8)
             src_addr = self.__getaddr(jpeg_array)
@@ -418,11 +478,102 @@ class TurboJPEG(object):
                 self.__report_error(handle)
             return img_array
         finally:
-            self.__destroy(handle)
+            self.__release_handle(handle)
+
+    def decode_into(self, jpeg_buf, out, pixel_format=TJPF_BGR, scaling_factor=None, flags=0):
+        """decodes JPEG memory buffer into a preallocated buffer.
+           out is a uint8 array of shape (height, width, channels) for the
+           (scaled) image, or any writable buffer that is large enough. Rows
+           may be padded, e.g. a view into a larger frame. Returns the decoded
+           image as a numpy view of out, nothing is allocated per call.
+        """
+        handle = self.__acquire_handle('decompress')
+        try:
+            jpeg_array = np.frombuffer(jpeg_buf, dtype=np.uint8)
+            src_addr = self.__getaddr(jpeg_array)
+            scaled_width, scaled_height, _, _ = \
+                self.__get_header_and_dimensions(handle, jpeg_array.size, src_addr, scaling_factor)
+            img_array = self.__output_view(
+                out, scaled_height, scaled_width, tjPixelSize[pixel_format])
+            dest_addr = self.__getaddr(img_array)
+            status = self.__decompress(
+                handle, src_addr, jpeg_array.size, dest_addr, scaled_width,
+                img_array.strides[0], scaled_height, pixel_format, flags)
+            if status != 0:
+                self.__report_error(handle)
+            return img_array
+        finally:
+            self.__release_handle(handle)
+
+    def decode_batch(self, jpeg_bufs, pixel_format=TJPF_BGR, scaling_factor=None, flags=0, threads=None, out=None):
+        """decodes a list of JPEG buffers in parallel into one contiguous allocation.
+           Returns a (count, height, width, channels) array when all images have
+           the same size, otherwise a list of per-image views into one buffer.
+           threads defaults to the number of CPUs (libjpeg-turbo runs without
+           the GIL); out is an optional buffer to reuse across batches.
+        """
+        channels = tjPixelSize[pixel_format]
+        sizes = []
+        for jpeg_buf in jpeg_bufs:
+            width, height, _, _ = self.decode_header(jpeg_buf)
+            if scaling_factor is not None:
+                if scaling_factor not in self.__scaling_factors:
+                    raise ValueError('supported scaling factors are ' +
+                        str(self.__scaling_factors))
+                num, denom = scaling_factor
+                width = (width * num + denom - 1) // denom
+                height = (height * num + denom - 1) // denom
+            sizes.append((height, width, channels))
+        total = sum(h * w * c for h, w, c in sizes)
+        if out is None:
+            buffer = np.empty(total, dtype=np.uint8)
+        else:
+            buffer = np.frombuffer(out, dtype=np.uint8)
+            if buffer.size < total:
+                raise ValueError('Output buffer too small: {} bytes, need {}'.format(
+                    buffer.size, total))
+        views = []
+        offset = 0
+        for shape in sizes:
+            size = shape[0] * shape[1] * shape[2]
+            views.append(buffer[offset:offset + size].reshape(shape))
+            offset += size
+
+        def decode_one(i):
+            self.decode_into(jpeg_bufs[i], views[i], pixel_format, scaling_factor, flags)
+
+        if threads is None:
+            threads = os.cpu_count() or 1
+        threads = max(1, min(threads, len(views)))
+        if threads == 1:
+            for i in range(len(views)):
+                decode_one(i)
+        else:
+            # list() re-raises the first decode error
+            list(self.__batch_pool(threads).map(decode_one, range(len(views))))
+
+        if sizes and all(shape == sizes[0] for shape in sizes):
+            return buffer[:total].reshape((len(sizes),) + sizes[0])
+        return views
+
+    def __batch_pool(self, threads):
+        """returns the decode_batch thread pool, resized when threads changes"""
+        from concurrent.futures import ThreadPoolExecutor
+        with self.__caches_lock:
+            old_pool = None
+            if self.__pool is None or self.__pool_threads != threads:
+                old_pool = self.__pool
+                self.__pool = ThreadPoolExecutor(
+                    max_workers=threads, thread_name_prefix='turbojpeg')
+                self.__pool_threads = threads
+            pool = self.__pool
+        if old_pool is not None:
+            old_pool.shutdown(wait=False)
+        return pool
 
     def decode_to_yuv(self, jpeg_buf, scaling_factor=None, pad=4, flags=0):
         """decodes JPEG memory buffer to yuv array."""
-        handle = self.__init_decompress()
+        handle = self.__acquire_handle('decompress')
         try:
             jpeg_array = np.frombuffer(jpeg_buf, dtype=np.uint8)
             src_addr = self.__getaddr(jpeg_array)
@@ -445,11 +596,11 @@ class TurboJPEG(object):
                         self.__plane_width(i, scaled_width, jpeg_subsample)))
             return buffer_array, plane_sizes
         finally:
-            self.__destroy(handle)
+            self.__release_handle(handle)
 
     def decode_to_yuv_planes(self, jpeg_buf, scaling_factor=None, strides=(0, 0, 0), flags=0):
         """decodes JPEG memory buffer to yuv planes."""
-        handle = self.__init_decompress()
+        handle = self.__acquire_handle('decompress')
         try:
             jpeg_array = np.frombuffer(jpeg_buf, dtype=np.uint8)
             src_addr = self.__getaddr(jpeg_array)
@@ -475,11 +626,11 @@ class TurboJPEG(object):
                 self.__report_error(handle)
             return planes
         finally:
-            self.__destroy(handle)
+            self.__release_handle(handle)
 
     def encode(self, img_array, quality=85, pixel_format=TJPF_BGR, jpeg_subsample=TJSAMP_422, flags=0):
         """encodes numpy array to JPEG memory buffer."""
-        handle = self.__init_compress()
+        handle = self.__acquire_handle('compress')
         try:
             jpeg_buf = c_void_p()
             jpeg_size = c_ulong()
@@ -498,11 +649,45 @@ class TurboJPEG(object):
             self.__free(jpeg_buf)
             return dest_buf.raw
         finally:
-            self.__destroy(handle)
+            self.__release_handle(handle)
+
+    def encode_into(self, img_array, out_buffer, quality=85, pixel_format=TJPF_BGR, jpeg_subsample=TJSAMP_422, flags=0):
+        """encodes numpy array into a preallocated buffer (bytearray or uint8 array).
+           out_buffer must hold at least buffer_size(width, height, jpeg_subsample)
+           bytes. Returns a memoryview of out_buffer limited to the JPEG size.
+        """
+        height, width = img_array.shape[:2]
+        channel = tjPixelSize[pixel_format]
+        if channel > 1 and (len(img_array.shape) < 3 or img_array.shape[2] != channel):
+            raise ValueError('Invalid shape for image data')
+        dest_array = np.frombuffer(out_buffer, dtype=np.uint8)
+        required = self.buffer_size(width, height, jpeg_subsample)
+        if dest_array.size < required:
+            raise ValueError('out_buffer too small: {} bytes, need {}'.format(
+                dest_array.size, required))
+        handle = self.__acquire_handle('compress')
+        try:
+            dest_addr = dest_array.__array_interface__['data'][0]
+            jpeg_buf = c_void_p(dest_addr)
+            jpeg_size = c_ulong(dest_array.size)
+            src_addr = self.__getaddr(img_array)
+            status = self.__compress(
+                handle, src_addr, width, img_array.strides[0], height, pixel_format,
+                byref(jpeg_buf), byref(jpeg_size), jpeg_subsample, quality,
+                flags | TJFLAG_NOREALLOC)
+            if status != 0:
+                self.__report_error(handle)
+            return memoryview(dest_array)[:jpeg_size.value]
+        finally:
+            self.__release_handle(handle)
+
+    def buffer_size(self, width, height, jpeg_subsample=TJSAMP_422):
+        """worst-case JPEG size in bytes, the buffer size needed by encode_into()"""
+        return self.__buffer_size(width, height, jpeg_subsample)
 
     def encode_from_yuv(self, img_array, height, width, quality=85, jpeg_subsample=TJSAMP_420, flags=0):
         """encodes numpy array to JPEG memory buffer."""
-        handle = self.__init_compress()
+        handle = self.__acquire_handle('compress')
         try:
             jpeg_buf = c_void_p()
             jpeg_size = c_ulong()
@@ -517,11 +702,11 @@ class TurboJPEG(object):
             self.__free(jpeg_buf)
             return dest_buf.raw
         finally:
-            self.__destroy(handle)
+            self.__release_handle(handle)
 
     def scale_with_quality(self, jpeg_buf, scaling_factor=None, quality=85, flags=0):
         """decompresstoYUV with scale factor, recompresstoYUV with quality factor"""
-        handle = self.__init_decompress()
+        handle = self.__acquire_handle('decompress')
         try:
             jpeg_array = np.frombuffer(jpeg_buf, dtype=np.uint8)
             src_addr = self.__getaddr(jpeg_array)
@@ -535,8 +720,8 @@ class TurboJPEG(object):
                 handle, src_addr, jpeg_array.size, dest_addr, scaled_width, 4, scaled_height, flags)
             if status != 0:
                 self.__report_error(handle)
-            self.__destroy(handle)
-            handle = self.__init_compress()
+            self.__release_handle(handle)
+            handle = self.__acquire_handle('compress')
             jpeg_buf = c_void_p()
             jpeg_size = c_ulong()
             status = self.__compressFromYUV(
@@ -549,11 +734,11 @@ class TurboJPEG(object):
             self.__free(jpeg_buf)
             return dest_buf.raw
         finally:
-            self.__destroy(handle)
+            self.__release_handle(handle)
 
     def crop(self, jpeg_buf, x, y, w, h, preserve=False, gray=False):
         """losslessly crop a jpeg image with optional grayscale"""
-        handle = self.__init_transform()
+        handle = self.__acquire_handle('transform')
         try:
             jpeg_array = np.frombuffer(jpeg_buf, dtype=np.uint8)
             src_addr = self.__getaddr(jpeg_array)
@@ -585,7 +770,7 @@ class TurboJPEG(object):
                 self.__report_error(handle)
             return dest_buf.raw
         finally:
-            self.__destroy(handle)
+            self.__release_handle(handle)
 
     def crop_multiple(self, jpeg_buf, crop_parameters, background_luminance=1.0, gray=False):
         """Lossless crop and/or extension operations on jpeg image.
@@ -610,7 +795,7 @@ class TurboJPEG(object):
         List[bytes]
             Cropped and/or extended jpeg images.
         """
-        handle = self.__init_transform()
+        handle = self.__acquire_handle('transform')
         try:
             jpeg_array = np.frombuffer(jpeg_buf, dtype=np.uint8)
             src_addr = self.__getaddr(jpeg_array)
@@ -703,7 +888,7 @@ class TurboJPEG(object):
             return results
 
         finally:
-            self.__destroy(handle)
+            self.__release_handle(handle)
 
     def __get_header_and_dimensions(self, handle, jpeg_array_size, src_addr, scaling_factor):
         """returns scaled image dimensions and header data"""
@@ -928,6 +1113,56 @@ class TurboJPEG(object):
             'You may specify the turbojpeg library path manually.\n'
             'e.g. jpeg = TurboJPEG(lib_path)')
 
+    def __acquire_handle(self, kind):
+        """returns a tj handle of the given kind, cached per thread if enabled"""
+        if not self.__reuse_handles:
+            return self.__create_handle(kind)
+        cache = getattr(self.__local, 'cache', None)
+        if cache is None:
+            cache = _HandleCache(self.__destroy)
+            self.__local.cache = cache
+            with self.__caches_lock:
+                self.__caches.add(cache)
+        handle = cache.handles.get(kind)
+        if handle is None:
+            handle = self.__create_handle(kind)
+            cache.handles[kind] = handle
+        return handle
+
+    def __create_handle(self, kind):
+        handle = self.__init_handle[kind]()
+        if not handle:
+            raise IOError(self.__get_error_str().decode())
+        return handle
+
+    def __release_handle(self, handle):
+        """destroys the handle unless it is cached for reuse"""
+        if not self.__reuse_handles:
+            self.__destroy(handle)
+
+    @staticmethod
+    def __output_view(out, height, width, channels):
+        """returns out as a (height, width, channels) uint8 view, checking its layout"""
+        if not isinstance(out, np.ndarray):
+            out = np.frombuffer(out, dtype=np.uint8)
+        if out.dtype != np.uint8:
+            raise ValueError('Output buffer must be uint8')
+        if not out.flags.writeable:
+            raise ValueError('Output buffer is read-only')
+        if out.ndim == 1:
+            if out.size < height * width * channels:
+                raise ValueError('Output buffer too small: {} bytes, need {}'.format(
+                    out.size, height * width * channels))
+            return out[:height * width * channels].reshape(height, width, channels)
+        if out.ndim == 2 and channels == 1:
+            out = out[:, :, np.newaxis]
+        if out.shape != (height, width, channels):
+            raise ValueError('Output shape {} does not match decoded image {}'.format(
+                out.shape, (height, width, channels)))
+        if out.strides[1] != channels or (channels > 1 and out.strides[2] != 1):
+            raise ValueError('Output rows must be contiguous')
+        return out
+
     def __getaddr(self, nda):
         """returns the memory address for a given ndarray"""
         return cast(nda.__array_interface__['data'][0], POINTER(c_ubyte))
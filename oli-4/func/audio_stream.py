@@ -0,0 +1,152 @@
+'''
+Chunked audio playback on the NAO speakers.
+
+Instead of reading a whole WAV file and shipping it as one AudioRequest, the
+PCM data is memory-mapped and sent in fixed-size chunks, in order, from one
+thread. Playback starts as soon as the first chunk has arrived, and the
+sender never runs more than `max_ahead` chunks ahead of the estimated
+playback position, so neither side buffers the whole file.
+'''
+
+import mmap
+import struct
+import time
+
+
+class WavPCM:
+    """PCM data of a WAV file as a memoryview into a read-only memory map"""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._map = self._view = self.data = None
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.channels, self.sample_rate, self.sample_width, self.data = self._parse()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse(self):
+        view = self._view = memoryview(self._map)
+        if view[:4] != b"RIFF" or view[8:12] != b"WAVE":
+            raise ValueError("Not a RIFF/WAVE file")
+        fmt = None
+        offset = 12
+        while offset + 8 <= len(view):
+            chunk_id = bytes(view[offset:offset + 4])
+            size = struct.unpack_from("<I", view, offset + 4)[0]
+            body = offset + 8
+            if chunk_id == b"fmt ":
+                audio_format, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", view, body)
+                if audio_format != 1:
+                    raise ValueError(f"Only PCM WAV files are supported (format {audio_format})")
+                fmt = (channels, sample_rate, bits // 8)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError("WAV data chunk before fmt chunk")
+                return fmt + (view[body:min(body + size, len(view))],)
+            offset = body + size + (size & 1)  # chunks are word aligned
+        raise ValueError("WAV file has no data chunk")
+
+    @property
+    def duration(self):
+        return len(self.data) / (self.sample_rate * self.channels * self.sample_width)
+
+    def close(self):
+        for view in (self.data, self._view):
+            if view is not None:
+                view.release()
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class StreamingAudioSender:
+    """
+    Sends PCM audio to a speaker connector (nao.speaker) chunk by chunk.
+    `make_request(waveform, sample_rate)` builds the request, by default a
+    SIC AudioRequest.
+    """
+
+    def __init__(self, speaker, chunk_seconds=0.5, max_ahead=2, make_request=None, logger=None):
+        self.speaker = speaker
+        self.chunk_seconds = chunk_seconds
+        self.max_ahead = max_ahead
+        self.logger = logger
+        if make_request is None:
+            from sic_framework.core.message_python2 import AudioRequest
+
+            def make_request(waveform, sample_rate):
+                return AudioRequest(waveform, sample_rate)
+        self.make_request = make_request
+
+    def _log(self, level, message):
+        if self.logger:
+            getattr(self.logger, level)(message)
+
+    def send_pcm(self, pcm, sample_rate, channels=1, sample_width=2, cancel_event=None, wait=False):
+        """
+        Stream 16-bit PCM (bytes, memoryview or WavPCM.data). Returns stats:
+        chunks, bytes, first_chunk (seconds until the first chunk was sent),
+        send_time and audio duration. With wait=True it returns once the
+        audio should have finished playing.
+        """
+        with memoryview(pcm).cast("B") as pcm:
+            return self._send(pcm, sample_rate, channels * sample_width, cancel_event, wait)
+
+    def _send(self, pcm, sample_rate, frame_bytes, cancel_event, wait):
+        chunk_bytes = max(1, int(self.chunk_seconds * sample_rate)) * frame_bytes
+        bytes_per_second = sample_rate * frame_bytes
+
+        start = time.monotonic()
+        first_chunk = None
+        playback_start = None
+        sent_seconds = 0.0
+        chunks = 0
+        for offset in range(0, len(pcm), chunk_bytes):
+            if cancel_event is not None and cancel_event.is_set():
+                self._log("info", "[AUDIO] Playback cancelled")
+                break
+            if playback_start is not None:
+                # Backpressure: stay at most max_ahead chunks ahead of playback
+                lead = sent_seconds - (time.monotonic() - playback_start)
+                delay = lead - self.max_ahead * self.chunk_seconds
+                if delay > 0:
+                    if cancel_event is not None:
+                        cancel_event.wait(delay)
+                    else:
+                        time.sleep(delay)
+
+            chunk = pcm[offset:offset + chunk_bytes]
+            # Chunks are copied one at a time, the file itself stays in the page cache
+            self.speaker.request(self.make_request(bytes(chunk), sample_rate), block=False)
+            chunks += 1
+            sent_seconds += len(chunk) / bytes_per_second
+            if first_chunk is None:
+                first_chunk = time.monotonic() - start
+                playback_start = time.monotonic()
+
+        send_time = time.monotonic() - start
+        if wait and playback_start is not None:
+            remaining = sent_seconds - (time.monotonic() - playback_start)
+            if remaining > 0:
+                time.sleep(remaining)
+        stats = {"chunks": chunks, "bytes": len(pcm), "first_chunk": first_chunk,
+                 "send_time": send_time, "duration": len(pcm) / bytes_per_second}
+        self._log("info", f"[AUDIO] {chunks} chunks, first after {1000 * (first_chunk or 0):.1f} ms, "
+                          f"{stats['duration']:.1f} s of audio")
+        return stats
+
+    def send_wav(self, path, cancel_event=None, wait=False):
+        """Stream a PCM WAV file without loading it into memory"""
+        with WavPCM(path) as wav:
+            if wav.sample_width != 2:
+                raise ValueError(f"Expected 16-bit PCM, got {8 * wav.sample_width}-bit")
+            return self.send_pcm(wav.data, wav.sample_rate, wav.channels, wav.sample_width,
+                                 cancel_event=cancel_event, wait=wait)
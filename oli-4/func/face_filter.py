@@ -0,0 +1,93 @@
+'''
+Constant-velocity Kalman filter for the tracked face (size and bearing).
+'''
+
+import numpy as np
+
+# Tracker face size at 1 m, used to turn face size into a distance estimate
+FACE_SIZE_AT_1M = 0.2
+
+
+class FaceTrackFilter:
+    """
+    State x = [size, size_rate, alpha, alpha_rate], measurement z = [size, alpha].
+    Both axes share one 4x4 model, so predict/update are a handful of small
+    matrix products. Between tracker updates the filter predicts forward, up
+    to `max_dropout` seconds without a measurement.
+    """
+
+    def __init__(self, size_noise=0.015, alpha_noise=0.05, size_accel=0.02,
+                 alpha_accel=0.2, max_dropout=1.0, face_size_at_1m=FACE_SIZE_AT_1M):
+        self.max_dropout = max_dropout
+        self.face_size_at_1m = face_size_at_1m
+        # Continuous white-noise acceleration per axis
+        self._accel_var = np.array([size_accel, alpha_accel]) ** 2
+        self._R = np.diag([size_noise ** 2, alpha_noise ** 2])
+        self._H = np.array([[1.0, 0.0, 0.0, 0.0],
+                            [0.0, 0.0, 1.0, 0.0]])
+        self._I = np.eye(4)
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.P = None
+        self.t = None
+        self.last_update = None
+
+    @property
+    def initialized(self):
+        return self.x is not None
+
+    def _transition(self, dt):
+        F = np.eye(4)
+        F[0, 1] = F[2, 3] = dt
+        # Per-axis process noise for a constant-velocity model
+        q = np.array([[dt ** 4 / 4, dt ** 3 / 2],
+                      [dt ** 3 / 2, dt ** 2]])
+        Q = np.zeros((4, 4))
+        Q[:2, :2] = q * self._accel_var[0]
+        Q[2:, 2:] = q * self._accel_var[1]
+        return F, Q
+
+    def predict(self, t):
+        """Advance the estimate to time t; returns False once the face is lost"""
+        if not self.initialized:
+            return False
+        if t - self.last_update > self.max_dropout:
+            self.reset()
+            return False
+        dt = t - self.t
+        if dt > 0:
+            F, Q = self._transition(dt)
+            self.x = F @ self.x
+            self.P = F @ self.P @ F.T + Q
+            self.t = t
+        return True
+
+    def update(self, size, alpha, t):
+        if not self.predict(t):
+            # First sighting, or the face was lost: start a new track
+            self.x = np.array([size, 0.0, alpha, 0.0])
+            self.P = np.diag([self._R[0, 0], 0.1, self._R[1, 1], 1.0])
+            self.t = self.last_update = t
+            return
+
+        y = np.array([size, alpha]) - self._H @ self.x
+        S = self._H @ self.P @ self._H.T + self._R
+        K = self.P @ self._H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (self._I - K @ self._H) @ self.P
+        self.last_update = t
+
+    @property
+    def size(self):
+        return float(self.x[0])
+
+    @property
+    def alpha(self):
+        return float(self.x[2])
+
+    @property
+    def distance(self):
+        """Estimated distance to the face in metres"""
+        return self.face_size_at_1m / max(self.size, 1e-3)
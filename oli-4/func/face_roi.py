@@ -0,0 +1,62 @@
+'''
+Face regions of interest cut from the compressed JPEG frame.
+
+TurboJPEG.crop_multiple crops losslessly in the DCT domain, so face crops for
+recognition or logging cost no full decode and no re-encode. The crop origin
+has to sit on the MCU grid (8 or 16 px depending on chroma subsampling), so
+face boxes are grown outwards to the grid first.
+'''
+
+from func.jpeg import get_turbojpeg, turbojpeg_module
+
+
+def mcu_align(x, y, w, h, width, height, mcu_width, mcu_height, margin=0.0):
+    """
+    (x, y, w, h) grown by `margin` (fraction of the box size) on every side,
+    with the origin snapped down to the MCU grid and clipped to the image.
+    """
+    pad_x, pad_y = int(w * margin), int(h * margin)
+    left = max(0, x - pad_x)
+    top = max(0, y - pad_y)
+    right = min(width, x + w + pad_x)
+    bottom = min(height, y + h + pad_y)
+    left -= left % mcu_width
+    top -= top % mcu_height
+    return left, top, max(0, right - left), max(0, bottom - top)
+
+
+class FaceCropper:
+    """
+    Crops FaceDetection BoundingBoxes out of a JPEG frame. The boxes must be
+    in the pixel coordinates of that frame (see frame_buffer.to_full_resolution
+    for detections made on a scaled decode).
+    """
+
+    def __init__(self, jpeg=None, margin=0.2, min_size=16, gray=False):
+        turbojpeg = turbojpeg_module()
+        self._mcu_width = turbojpeg.tjMCUWidth
+        self._mcu_height = turbojpeg.tjMCUHeight
+        self.jpeg = jpeg or get_turbojpeg()
+        self.margin = margin
+        self.min_size = min_size
+        self.gray = gray
+
+    def regions(self, jpeg_buf, bboxes):
+        """MCU-aligned (x, y, w, h) crop regions for the boxes, tiny ones skipped"""
+        width, height, subsample, _ = self.jpeg.decode_header(jpeg_buf)
+        mcu_width, mcu_height = self._mcu_width[subsample], self._mcu_height[subsample]
+        regions = []
+        for bbox in bboxes:
+            region = mcu_align(int(bbox.x), int(bbox.y), int(bbox.w), int(bbox.h),
+                               width, height, mcu_width, mcu_height, self.margin)
+            if region[2] >= self.min_size and region[3] >= self.min_size:
+                regions.append(region)
+        return regions
+
+    def crop(self, jpeg_buf, bboxes):
+        """[(region, jpeg bytes)] for every usable face box, in one transform call"""
+        regions = self.regions(jpeg_buf, bboxes)
+        if not regions:
+            return []
+        crops = self.jpeg.crop_multiple(jpeg_buf, regions, gray=self.gray)
+        return list(zip(regions, crops))
@@ -0,0 +1,188 @@
+'''
+Latest-frame buffer for camera callbacks.
+
+The SIC camera callback runs on the connector's thread and must never block,
+while display and detection consumers only care about the newest frame. A
+FrameBuffer keeps exactly one published frame; publishing over a frame no
+consumer has read counts as a drop instead of growing a queue.
+'''
+
+import collections
+import copy
+import threading
+import time
+
+import numpy as np
+
+# scale: (sx, sy) from image pixels to full camera resolution, see to_full_resolution
+Frame = collections.namedtuple("Frame", ["frame_id", "timestamp", "image", "scale"],
+                               defaults=[(1.0, 1.0)])
+
+
+def to_full_resolution(bboxes, scale):
+    """Copies of BoundingBoxes detected on a scaled frame, in full-resolution pixels"""
+    if scale == (1.0, 1.0):
+        return list(bboxes)
+    sx, sy = scale
+    mapped = []
+    for bbox in bboxes:
+        bbox = copy.copy(bbox)
+        bbox.x, bbox.w = int(round(bbox.x * sx)), int(round(bbox.w * sx))
+        bbox.y, bbox.h = int(round(bbox.y * sy)), int(round(bbox.h * sy))
+        mapped.append(bbox)
+    return mapped
+
+
+class FrameBuffer:
+    """
+    Lock-protected latest-frame slot with frame ids and timestamps.
+
+    put() accepts a decoded numpy image (CompressedImageMessage.image) or,
+    with decode_jpeg=True, raw JPEG bytes. JPEG frames are decoded with the
+    bundled TurboJPEG into a small pool of preallocated arrays that is reused
+    round-robin, so a returned image stays valid until `pool_size - 1` newer
+    frames have been published. Consumers that keep frames longer should pass
+    copy=True to get().
+
+    target_size=(width, height) decodes JPEG frames with the smallest DCT
+    scaling factor (1/2, 1/4, ...) that still gives at least that size, for
+    detectors that don't need full resolution. Frame.scale maps detections
+    back to camera pixels with to_full_resolution().
+
+    mirror: optional object with put(image, frame_id, timestamp), e.g. a
+    func.shm_frames.SharedFrameRing, that receives every published frame
+    for consumers in other processes.
+    """
+
+    def __init__(self, decode_jpeg=False, pixel_format=None, pool_size=3, target_size=None,
+                 mirror=None, logger=None):
+        self.decode_jpeg = decode_jpeg
+        self.target_size = target_size
+        self.mirror = mirror
+        self.pool_size = max(2, pool_size)
+        self.logger = logger
+
+        self._cond = threading.Condition()
+        self._frame = Frame(0, 0.0, None)
+        self._read_id = 0
+        self._closed = False
+
+        self.published = 0
+        self.dropped = 0
+        self.consumed = 0
+        self.decode_errors = 0
+
+        self._jpeg = None
+        self._pixel_format = pixel_format
+        self._channels = None
+        self._pool = []
+        self._pool_index = 0
+        self._scaling = {}
+        if decode_jpeg:
+            from func.jpeg import get_turbojpeg, turbojpeg_module
+            self._jpeg = get_turbojpeg()
+            turbojpeg = turbojpeg_module()
+            if self._pixel_format is None:
+                self._pixel_format = turbojpeg.TJPF_RGB
+            self._channels = turbojpeg.tjPixelSize[self._pixel_format]
+
+    def _log(self, level, message):
+        if self.logger:
+            getattr(self.logger, level)(message)
+
+    def _next_buffer(self, shape):
+        """Next preallocated array from the pool, (re)allocated on a size change"""
+        if not self._pool or self._pool[0].shape != shape:
+            self._pool = [np.empty(shape, dtype=np.uint8) for _ in range(self.pool_size)]
+            self._pool_index = 0
+        buffer = self._pool[self._pool_index]
+        self._pool_index = (self._pool_index + 1) % self.pool_size
+        return buffer
+
+    def _scaling_for(self, width, height):
+        """(scaling factor, decoded size, scale to full resolution) for a camera size"""
+        if (width, height) not in self._scaling:
+            factor = None
+            scaled = (width, height)
+            if self.target_size:
+                from func.jpeg import pick_scaling_factor, scaled_size
+                factor = pick_scaling_factor(width, height, *self.target_size,
+                                             self._jpeg.scaling_factors)
+                scaled = scaled_size(width, height, factor)
+                self._log("info", f"[FRAMES] Decoding {width}x{height} at "
+                                  f"{factor[0]}/{factor[1]}: {scaled[0]}x{scaled[1]}")
+            self._scaling[(width, height)] = (
+                factor, scaled, (width / scaled[0], height / scaled[1]))
+        return self._scaling[(width, height)]
+
+    def _decode(self, jpeg_buf):
+        width, height, _, _ = self._jpeg.decode_header(jpeg_buf)
+        factor, (scaled_width, scaled_height), scale = self._scaling_for(width, height)
+        out = self._next_buffer((scaled_height, scaled_width, self._channels))
+        image = self._jpeg.decode_into(jpeg_buf, out, pixel_format=self._pixel_format,
+                                       scaling_factor=factor)
+        return image, scale
+
+    def put(self, image, timestamp=None):
+        """Publish a frame, returns its frame id (0 if the frame was rejected)"""
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        scale = (1.0, 1.0)
+        if self.decode_jpeg and isinstance(image, (bytes, bytearray, memoryview)):
+            try:
+                image, scale = self._decode(image)
+            except Exception as e:
+                self.decode_errors += 1
+                self._log("warning", f"[FRAMES] JPEG decode failed: {e}")
+                return 0
+
+        with self._cond:
+            if self._frame.frame_id and self._frame.frame_id != self._read_id:
+                self.dropped += 1
+            frame_id = self._frame.frame_id + 1
+            self._frame = Frame(frame_id, timestamp, image, scale)
+            self.published += 1
+            self._cond.notify_all()
+        if self.mirror is not None:
+            try:
+                self.mirror.put(image, frame_id=frame_id, timestamp=timestamp)
+            except Exception as e:
+                self._log("warning", f"[FRAMES] Mirroring frame {frame_id} failed: {e}")
+        return frame_id
+
+    def on_message(self, message):
+        """Drop-in camera callback for CompressedImageMessage"""
+        self.put(message.image)
+
+    def get(self, last_id=0, timeout=None, copy=False):
+        """
+        Wait for a frame newer than `last_id` and return it as a Frame, or None
+        on timeout or after close(). Pass the previous frame_id to only wake up
+        for new frames.
+        """
+        with self._cond:
+            if not self._cond.wait_for(
+                    lambda: self._closed or self._frame.frame_id > last_id, timeout):
+                return None
+            frame = self._frame
+            if frame.frame_id <= last_id:
+                return None
+            if frame.frame_id != self._read_id:
+                self._read_id = frame.frame_id
+                self.consumed += 1
+        if copy and frame.image is not None:
+            frame = frame._replace(image=np.array(frame.image, copy=True))
+        return frame
+
+    def latest(self):
+        """Newest frame without waiting (frame_id 0 means nothing published yet)"""
+        return self._frame
+
+    def close(self):
+        """Wake up all waiting consumers"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self):
+        return {"published": self.published, "consumed": self.consumed,
+                "dropped": self.dropped, "decode_errors": self.decode_errors}
@@ -0,0 +1,191 @@
+'''
+Timestamp-matched join of camera frames and detection results.
+
+A detection component runs on the camera stream in its own process.
+Reading the newest frame and the newest detections separately pairs boxes
+with whatever frame happens to be there. FrameDetectionJoin keeps a short
+history of frames and pairs results with frames in one of two ways:
+
+- Timestamps (put_detections / on_detections): every result is paired with
+  the frame whose timestamp is nearest (within `tolerance`). Only for
+  components whose output carries the input frame's timestamp, which SIC
+  does in SICService._listen. Plain SICComponents such as FaceDetection send
+  their output without a timestamp, so this never matches for them.
+- Requests (run_requests): the newest frame is sent to the detector as a
+  request and the reply is paired with that frame. Works for any component
+  that answers CompressedImageRequest, at the cost of one detection in
+  flight at a time.
+
+The producer callbacks only append under a lock and never block, and a
+consumer waits for the newest pair the same way it waits on a FrameBuffer.
+'''
+
+import collections
+import threading
+import time
+
+import numpy as np
+
+# offset: detection timestamp - frame timestamp, latency: frame arrival -> pair ready (seconds)
+JoinedFrame = collections.namedtuple("JoinedFrame",
+                                     ["pair_id", "timestamp", "image", "detections", "offset", "latency"])
+
+
+def timestamp_seconds(timestamp):
+    """Seconds as a float; SIC sensors stamp messages with Redis TIME, a (seconds, microseconds) pair"""
+    if isinstance(timestamp, (tuple, list)):
+        seconds, microseconds = timestamp
+        return int(seconds) + int(microseconds) / 1e6
+    return float(timestamp)
+
+
+def message_timestamp(message):
+    """Timestamp set by the SIC device of origin (Redis clock), or the local wall clock"""
+    timestamp = getattr(message, "_timestamp", None)
+    return time.time() if timestamp is None else timestamp_seconds(timestamp)
+
+
+class FrameDetectionJoin:
+    """
+    history: frames kept for matching, enough to cover the detector latency
+    at the camera frame rate. tolerance: max. timestamp distance in seconds
+    between a detection result and its frame. Detections that arrive before
+    their frame wait (up to `history` of them) until the frame comes in.
+    """
+
+    def __init__(self, history=16, tolerance=0.02):
+        self.tolerance = tolerance
+
+        self._cond = threading.Condition()
+        # (timestamp, image, arrival)
+        self._frames = collections.deque(maxlen=history)
+        # (timestamp, detections, arrival)
+        self._pending = collections.deque(maxlen=history)
+        self._pair = JoinedFrame(0, 0.0, None, [], 0.0, 0.0)
+        self._read_id = 0
+        self._closed = False
+        self._latencies = collections.deque(maxlen=1000)
+
+        self.frames = 0
+        self.detections = 0
+        self.pairs = 0
+        self.consumed = 0
+        self.dropped_pairs = 0
+        self.unmatched_detections = 0
+        self.failed_requests = 0
+
+    def put_frame(self, image, timestamp):
+        timestamp = timestamp_seconds(timestamp)
+        arrival = time.monotonic()
+        with self._cond:
+            self.frames += 1
+            self._frames.append((timestamp, image, arrival))
+            # Wakes run_requests
+            self._cond.notify_all()
+            # Detections that came in before their frame
+            for pending in list(self._pending):
+                if abs(pending[0] - timestamp) <= self.tolerance:
+                    self._pending.remove(pending)
+                    self._publish(timestamp, image, arrival, pending[1], pending[0])
+
+    def put_detections(self, detections, timestamp):
+        timestamp = timestamp_seconds(timestamp)
+        arrival = time.monotonic()
+        with self._cond:
+            self.detections += 1
+            match = None
+            if self._frames:
+                match = min(self._frames, key=lambda frame: abs(frame[0] - timestamp))
+            if match is not None and abs(match[0] - timestamp) <= self.tolerance:
+                self._publish(match[0], match[1], match[2], detections, timestamp)
+            elif self._frames and timestamp < self._frames[0][0] - self.tolerance:
+                # Older than every frame we still have
+                self.unmatched_detections += 1
+            else:
+                if len(self._pending) == self._pending.maxlen:
+                    self.unmatched_detections += 1
+                self._pending.append((timestamp, detections, arrival))
+
+    def _publish(self, frame_timestamp, image, frame_arrival, detections, timestamp):
+        """Called with the lock held"""
+        if self._pair.pair_id and self._pair.pair_id != self._read_id:
+            self.dropped_pairs += 1
+        latency = time.monotonic() - frame_arrival
+        self._latencies.append(latency)
+        self.pairs += 1
+        self._pair = JoinedFrame(self._pair.pair_id + 1, frame_timestamp, image, list(detections or []),
+                                 timestamp - frame_timestamp, latency)
+        # Frames up to this one can no longer be matched by a newer detection
+        while self._frames and self._frames[0][0] <= frame_timestamp:
+            self._frames.popleft()
+        self._cond.notify_all()
+
+    def on_frame(self, message):
+        """Camera callback for CompressedImageMessage"""
+        self.put_frame(message.image, message_timestamp(message))
+
+    def on_detections(self, message):
+        """Detection service callback for BoundingBoxesMessage"""
+        self.put_detections(message.bboxes, message_timestamp(message))
+
+    def run_requests(self, detect, on_result=None, stop_event=None):
+        """
+        Request mode, blocks until close() or `stop_event`: detect(image) ->
+        detections runs on the newest frame, one at a time, and its result is
+        published together with that frame. on_result(detections, timestamp)
+        is called after every result, e.g. PresenceDetector.update.
+        """
+        last = None
+        while not (stop_event is not None and stop_event.is_set()):
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or (self._frames and self._frames[-1] is not last),
+                                    timeout=0.1)
+                if self._closed:
+                    return
+                if not self._frames or self._frames[-1] is last:
+                    continue
+                frame = last = self._frames[-1]
+            timestamp, image, arrival = frame
+            try:
+                detections = detect(image)
+            except Exception:
+                with self._cond:
+                    self.failed_requests += 1
+                continue
+            with self._cond:
+                self.detections += 1
+                self._publish(timestamp, image, arrival, detections, timestamp)
+            if on_result is not None:
+                on_result(detections, timestamp)
+
+    def get(self, last_id=0, timeout=None):
+        """Wait for a pair newer than `last_id`, None on timeout or after close()"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._closed or self._pair.pair_id > last_id, timeout):
+                return None
+            pair = self._pair
+            if pair.pair_id <= last_id:
+                return None
+            if pair.pair_id != self._read_id:
+                self._read_id = pair.pair_id
+                self.consumed += 1
+            return pair
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self):
+        """Counters plus pairing latency (frame arrival -> pair ready) percentiles in ms"""
+        with self._cond:
+            latencies = 1000.0 * np.array(self._latencies)
+            stats = {"frames": self.frames, "detections": self.detections, "pairs": self.pairs,
+                     "consumed": self.consumed, "dropped_pairs": self.dropped_pairs,
+                     "unmatched_detections": self.unmatched_detections,
+                     "failed_requests": self.failed_requests}
+        if len(latencies):
+            stats.update(latency_p50_ms=float(np.percentile(latencies, 50)),
+                         latency_p95_ms=float(np.percentile(latencies, 95)),
+                         latency_max_ms=float(latencies.max()))
+        return stats
@@ -0,0 +1,128 @@
+'''
+On-disk cache for Gemini replies, used for rehearsals and offline replays.
+'''
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Cache modes:
+#   "off"       - always ask Gemini (live performance default)
+#   "rehearsal" - reuse cached replies, ask Gemini on a miss and store the answer
+#   "offline"   - only replay cached replies, never touch the network
+CACHE_MODES = ("off", "rehearsal", "offline")
+
+
+def normalize_text(text):
+    """Lowercase and collapse whitespace so STT jitter does not break the key"""
+    return " ".join(str(text).lower().split())
+
+
+class GeminiResponseCache:
+    """
+    Replies are stored one JSON file per key in `cache_dir`, with an LRU index
+    in `index.json`. The least recently used entries are removed once more than
+    `max_entries` replies are stored.
+    """
+
+    def __init__(self, cache_dir, max_entries=500, mode="rehearsal"):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode '{mode}', expected one of {CACHE_MODES}")
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(cache_dir, "index.json")
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    @property
+    def enabled(self):
+        return self.mode != "off"
+
+    @property
+    def offline(self):
+        return self.mode == "offline"
+
+    def make_key(self, model, system_prompt, history, generation_config=None):
+        """Hash of (model, system prompt, normalized history, generation config)"""
+        history_hash = hashlib.sha256()
+        for msg in history:
+            history_hash.update(msg["role"].encode("utf-8"))
+            history_hash.update(b"\x00")
+            history_hash.update(normalize_text(msg["content"]).encode("utf-8"))
+            history_hash.update(b"\x01")
+
+        key_data = json.dumps({
+            "model": model,
+            "system_prompt": normalize_text(system_prompt or ""),
+            "history": history_hash.hexdigest(),
+            "generation_config": generation_config or {},
+        }, sort_keys=True)
+        return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached reply, or None on a miss"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            try:
+                with open(self._entry_path(key), "r", encoding="utf-8") as f:
+                    reply = json.load(f)["reply"]
+            except (OSError, ValueError, KeyError):
+                # Entry file is gone or corrupt, forget about it
+                del self._index[key]
+                self._save_index()
+                self.misses += 1
+                return None
+
+            self._index.move_to_end(key)
+            self._index[key] = time.time()
+            self._save_index()
+            self.hits += 1
+            return reply
+
+    def put(self, key, reply):
+        """Store a reply. Offline mode never writes, it only replays."""
+        if self.mode != "rehearsal" or not reply:
+            return
+        with self._lock:
+            with open(self._entry_path(key), "w", encoding="utf-8") as f:
+                json.dump({"reply": reply, "created": time.time()}, f)
+            self._index[key] = time.time()
+            self._index.move_to_end(key)
+
+            while len(self._index) > self.max_entries:
+                old_key, _ = self._index.popitem(last=False)
+                try:
+                    os.remove(self._entry_path(old_key))
+                except OSError:
+                    pass
+            self._save_index()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_index(self):
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return OrderedDict()
+        # Oldest access first, so the front of the dict is evicted first
+        return OrderedDict(sorted(entries.items(), key=lambda item: item[1]))
+
+    def _save_index(self):
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path)
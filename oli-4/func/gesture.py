@@ -5,9 +5,21 @@ Functions to classify emote from LLM-response.
 from transformers import pipeline
 import random
 import threading
+import os
+import uuid
 
+import msgpack
+import redis
 import requests
 
+# Redis stream transport (see run_GestureAPI.py --transport redis, which
+# owns the consumer group); the stream name must match the worker's
+GESTURE_STREAM = "gesture:jobs"
+GESTURE_REPLY_PREFIX = "gesture:reply:"
+GESTURE_STREAM_MAXLEN = 1000
+
+_redis_connection = None
+
 def classify_gesture_api(text, labels):
     url = "http://127.0.0.1:8000/classify"
     data = {"text": text, "labels": labels}
@@ -16,6 +28,38 @@ def classify_gesture_api(text, labels):
     result = response.json()
     return result["label"]
 
+def get_redis_connection():
+    """Shared connection to the SIC Redis server (DB_IP / DB_PASS from .env)"""
+    global _redis_connection
+    if _redis_connection is None:
+        _redis_connection = redis.Redis(
+            host=os.getenv("DB_IP", "localhost"),
+            port=int(os.getenv("DB_PORT", "6379")),
+            password=os.getenv("DB_PASS", "changemeplease"),
+        )
+    return _redis_connection
+
+def classify_gesture_stream(text, labels, connection=None, timeout=30):
+    """
+    Same contract as classify_gesture_api, but the job is pushed onto a Redis
+    stream and the answer is read from a per-request reply list.
+    """
+    conn = connection or get_redis_connection()
+    request_id = uuid.uuid4().hex
+    reply_key = GESTURE_REPLY_PREFIX + request_id
+
+    job = msgpack.packb({"text": text, "labels": list(labels), "reply": reply_key})
+    conn.xadd(GESTURE_STREAM, {"job": job}, maxlen=GESTURE_STREAM_MAXLEN, approximate=True)
+
+    reply = conn.blpop([reply_key], timeout=timeout)
+    if reply is None:
+        raise TimeoutError(f"No gesture worker replied within {timeout}s")
+
+    result = msgpack.unpackb(reply[1])
+    if "error" in result:
+        raise RuntimeError(f"Gesture worker failed: {result['error']}")
+    return result["label"]
+
 def select_gesture(gesture_dict, gesture_category):
     """Pick a random gesture from the category"""
     return random.choice(gesture_dict[gesture_category])
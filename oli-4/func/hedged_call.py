@@ -0,0 +1,143 @@
+'''
+Latency-bounded LLM calls: hard budget, hedged second request and local
+fallback lines, so NAO always has something to say.
+'''
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+
+# Used when a scene in config/scenes.json has no "fallback" lines
+DEFAULT_FALLBACK_LINES = [
+    "Hmm, give me a second, my circuits are buffering.",
+    "Sorry, I lost my train of thought. Where were we?",
+    "That is a very good question. Let me think about that one.",
+    "Oh! Could you say that again? I was distracted by my own brilliance.",
+]
+
+
+class HedgedCaller:
+    """
+    Runs coroutine attempts on a private event loop. If the first attempt is
+    slower than the p90 of recent latencies (or fails), a second attempt is
+    started; the first good answer wins and the other attempt is cancelled.
+    Nothing is returned later than `budget` seconds after the call.
+    Latencies are those of first attempts only; a first attempt that lost or
+    ran out of budget records its elapsed time as a lower bound, so the slow
+    tail is not censored out of the p90.
+    """
+
+    def __init__(self, budget=6.0, default_hedge_delay=2.5, min_hedge_delay=0.5,
+                 window=50, logger=None):
+        self.budget = budget
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.logger = logger
+        self.latencies = deque(maxlen=window)
+        self.hedges = 0
+        self.failures = 0
+
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="hedged-caller", daemon=True).start()
+
+    def hedge_delay(self):
+        """p90 of observed latencies, or the default until enough samples exist"""
+        if len(self.latencies) < 5:
+            delay = self.default_hedge_delay
+        else:
+            ordered = sorted(self.latencies)
+            delay = ordered[int(0.9 * (len(ordered) - 1))]
+        return min(max(delay, self.min_hedge_delay), self.budget)
+
+    def call(self, make_attempt, hedge=True):
+        """
+        make_attempt: zero-argument function returning a new coroutine.
+        Returns the first non-empty result, or None when the budget ran out.
+        hedge=False runs a single attempt and keeps its latency out of the
+        history, for calls that are not like the real ones (e.g. warm-ups).
+        """
+        future = asyncio.run_coroutine_threadsafe(self._hedged(make_attempt, hedge), self._loop)
+        try:
+            # Small margin for loop scheduling; _hedged enforces the budget itself
+            return future.result(timeout=self.budget + 0.5)
+        except Exception as e:
+            future.cancel()
+            self.failures += 1
+            self._log("warning", f"[HEDGE] No reply within budget: {e!r}")
+            return None
+
+    async def _attempt(self, make_attempt, record=True):
+        t0 = time.perf_counter()
+        result = await make_attempt()
+        if record:
+            self.latencies.append(time.perf_counter() - t0)
+        return result
+
+    async def _hedged(self, make_attempt, hedge=True):
+        deadline = self._loop.time() + self.budget
+        started = time.perf_counter()
+        first = asyncio.ensure_future(self._attempt(make_attempt, record=hedge))
+        pending = {first}
+        # Without hedging the first attempt is the only one
+        attempts = 1 if hedge else 2
+        hedge_at = self._loop.time() + self.hedge_delay()
+
+        try:
+            while pending:
+                now = self._loop.time()
+                if now >= deadline:
+                    break
+                wait_until = hedge_at if attempts < 2 else deadline
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0.0, min(wait_until, deadline) - now),
+                    return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    if task.exception() is not None:
+                        self._log("warning", f"[HEDGE] Attempt failed: {task.exception()!r}")
+                    elif task.result():
+                        return task.result()
+
+                # Hedge when the first attempt is slow or has already failed
+                if attempts < 2 and (done or self._loop.time() >= hedge_at):
+                    self.hedges += 1
+                    attempts += 1
+                    self._log("info", f"[HEDGE] Starting second request after "
+                                      f"{self.budget - (deadline - self._loop.time()):.2f}s")
+                    # Not recorded: its latency counts from the hedge, not from the call
+                    pending.add(asyncio.ensure_future(self._attempt(make_attempt, record=False)))
+
+            self.failures += 1
+            return None
+        finally:
+            if hedge and not first.done():
+                # Lost to the hedge or out of budget: it took at least this long
+                self.latencies.append(time.perf_counter() - started)
+            # Cancel the loser (or everything, when out of budget)
+            for task in pending:
+                task.cancel()
+
+    def _log(self, level, text):
+        if self.logger:
+            getattr(self.logger, level)(text)
+
+
+class FallbackLines:
+    """Scene-specific filler lines from config/scenes.json ("fallback" key)"""
+
+    def __init__(self, scene_prompts):
+        self.lines = {
+            scene_id: scene.get("fallback") or DEFAULT_FALLBACK_LINES
+            for scene_id, scene in scene_prompts.items()
+        }
+        self._last = {}
+
+    def pick(self, scene_id):
+        """Random line for the scene, never the same one twice in a row"""
+        lines = self.lines.get(scene_id, DEFAULT_FALLBACK_LINES)
+        options = [line for line in lines if line != self._last.get(scene_id)] or lines
+        line = random.choice(options)
+        self._last[scene_id] = line
+        return line
@@ -0,0 +1,66 @@
+'''
+Access to the bundled PyTurboJPEG wrapper (lib/libtubojpeg/PyTurboJPEG-master).
+
+requirements.txt pins the PyPI PyTurboJPEG for SIC itself, so the bundled
+copy is loaded by file path under its own module name instead of through
+`import turbojpeg`.
+'''
+
+import importlib.util
+import os
+import threading
+
+TURBOJPEG_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "lib", "libtubojpeg", "PyTurboJPEG-master")
+TURBOJPEG_LIB_ENV = "TURBOJPEG_LIB"
+
+_module = None
+_instance = None
+_lock = threading.Lock()
+
+
+def turbojpeg_module():
+    """The bundled turbojpeg module (constants such as TJPF_RGB live here)"""
+    global _module
+    if _module is None:
+        spec = importlib.util.spec_from_file_location(
+            "oli4_turbojpeg", os.path.join(TURBOJPEG_DIR, "turbojpeg.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _module = module
+    return _module
+
+
+def get_turbojpeg(lib_path=None):
+    """
+    Shared TurboJPEG instance. The shared library is found automatically or
+    taken from `lib_path` / the TURBOJPEG_LIB environment variable.
+    """
+    global _instance
+    with _lock:
+        if _instance is None:
+            _instance = turbojpeg_module().TurboJPEG(lib_path or os.getenv(TURBOJPEG_LIB_ENV))
+        return _instance
+
+
+def scaled_size(width, height, scaling_factor):
+    """Image size after a libjpeg-turbo scaled decode (same rounding as TurboJPEG)"""
+    num, denom = scaling_factor
+    return (width * num + denom - 1) // denom, (height * num + denom - 1) // denom
+
+
+def pick_scaling_factor(width, height, target_width, target_height, scaling_factors):
+    """
+    Smallest DCT scaling factor (num, denom) that still decodes a width x height
+    JPEG to at least target_width x target_height, so detectors keep the
+    resolution they were tuned for. (1, 1) when no reduction fits.
+    """
+    best = (1, 1)
+    for num, denom in scaling_factors:
+        if num * best[1] >= best[0] * denom:
+            continue  # not smaller than the current best
+        scaled_width, scaled_height = scaled_size(width, height, (num, denom))
+        if scaled_width >= target_width and scaled_height >= target_height:
+            best = (num, denom)
+    return best
@@ -0,0 +1,107 @@
+'''
+Keyframe reduction of recorded motions before playback.
+
+The motion recorder samples every joint at a fixed rate, but angleInterpolation
+interpolates linearly between the given keyframes anyway, so most samples add
+payload without changing the motion. Ramer-Douglas-Peucker keeps, per joint,
+only the samples needed to stay within `max_error` radians of the recording.
+All joints are processed at once: each pass splits every segment whose worst
+sample is off by more than the bound, with numpy over the flattened samples.
+'''
+
+import numpy as np
+
+from func.motion_store import MotionClip
+
+
+def resample(times, angles, rate):
+    """Linearly resample (samples, joints) angles to a uniform `rate` in Hz"""
+    times = np.asarray(times, dtype=np.float64)
+    angles = np.asarray(angles, dtype=np.float64)
+    new_times = np.arange(times[0], times[-1] + 0.5 / rate, 1.0 / rate)
+    new_times[-1] = min(new_times[-1], times[-1])
+    right = np.clip(np.searchsorted(times, new_times, side="right"), 1, len(times) - 1)
+    left = right - 1
+    span = times[right] - times[left]
+    weight = np.where(span > 0, (new_times - times[left]) / np.where(span > 0, span, 1), 0.0)[:, None]
+    return new_times, angles[left] + (angles[right] - angles[left]) * weight
+
+
+def keyframe_mask(times, angles, max_error):
+    """
+    (samples, joints) bool mask of the keyframes RDP keeps for each joint.
+    `max_error` is in radians, one value or one per joint. The error is the
+    distance to the line between the neighbouring keyframes at the sample time.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    angles = np.asarray(angles, dtype=np.float64)
+    samples, n_joints = angles.shape
+    if samples < 3:
+        return np.ones(angles.shape, dtype=bool)
+
+    # Joint-major flat arrays; joint ends are always kept, so no segment spans two joints
+    x = np.tile(times, n_joints)
+    y = angles.T.ravel()
+    bound = np.repeat(np.broadcast_to(np.asarray(max_error, dtype=np.float64), (n_joints,)), samples)
+    keep = np.zeros(x.size, dtype=bool)
+    keep[::samples] = True
+    keep[samples - 1::samples] = True
+    positions = np.arange(x.size)
+
+    while True:
+        keys = np.flatnonzero(keep)
+        segment = np.minimum(np.searchsorted(keys, positions, side="right") - 1, len(keys) - 2)
+        start, end = keys[segment], keys[segment + 1]
+        dx = x[end] - x[start]
+        t = np.where(dx > 0, (x - x[start]) / np.where(dx > 0, dx, 1), 0.0)
+        error = np.abs(y - (y[start] + (y[end] - y[start]) * t))
+
+        worst = np.maximum.reduceat(error, keys[:-1])
+        candidates = np.flatnonzero((error > bound) & (error == worst[segment]))
+        if not len(candidates):
+            break
+        # First worst sample of each segment that is out of bounds
+        _, first = np.unique(segment[candidates], return_index=True)
+        keep[candidates[first]] = True
+
+    return keep.reshape(n_joints, samples).T
+
+
+def reduce_recording(recording, max_error=0.01, rate=None, logger=None):
+    """
+    Keyframe-reduced copy of a NaoqiMotionRecording (per-joint times), plus
+    stats: samples before/after, compression ratio and the max joint error
+    of the reduced motion against the recording. With `rate` the recording is
+    first resampled to a uniform rate, which evens out sampling jitter.
+
+    Every joint keeps its own keyframes, so the result can only be replayed
+    with angleInterpolation (NaoqiMotionRecorderConf use_interpolation=True,
+    the default). The setAngles path expects the same, evenly spaced samples
+    for every joint. An empty recording is returned as is.
+    """
+    clip = MotionClip.from_recording(recording)
+    if not len(clip):
+        return recording, {"samples_before": 0, "samples_after": 0, "ratio": 1.0, "max_error": 0.0}
+    times = np.asarray(clip.times, dtype=np.float64)
+    angles = np.asarray(clip.angles, dtype=np.float64)
+    if rate:
+        times, angles = resample(times, angles, rate)
+
+    mask = keyframe_mask(times, angles, max_error)
+    key_times = [times[mask[:, j]] for j in range(len(clip.joints))]
+    key_angles = [angles[mask[:, j], j] for j in range(len(clip.joints))]
+
+    original_times = np.asarray(clip.times, dtype=np.float64)
+    max_joint_error = max((float(np.abs(np.interp(original_times, kt, ka) - clip.angles[:, j]).max())
+                           for j, (kt, ka) in enumerate(zip(key_times, key_angles))), default=0.0)
+    before = clip.angles.size
+    after = int(mask.sum())
+    stats = {"samples_before": before, "samples_after": after,
+             "ratio": before / after if after else 1.0, "max_error": max_joint_error}
+    if logger:
+        logger.info(f"[MOTION] {before} -> {after} keyframes ({stats['ratio']:.1f}x), "
+                    f"max joint error {max_joint_error:.4f} rad")
+
+    reduced = type(recording)(list(clip.joints), [a.tolist() for a in key_angles],
+                              [t.tolist() for t in key_times])
+    return reduced, stats
@@ -0,0 +1,211 @@
+'''
+Compact on-disk format for recorded joint trajectories.
+
+A NaoqiMotionRecording is a pickled set of nested lists (one list of angles
+and one of timestamps per joint). A MotionClip holds the same data as a
+(samples, joints) angle matrix and one timestamp vector, stored in a `.mrec`
+file: a small JSON header followed by the raw arrays, aligned so they can be
+memory-mapped. Encodings:
+
+- "float32": angles as float32, memory-mapped on load
+- "int16": angles quantized to `step` radians, memory-mapped on load
+- "delta": quantized sample-to-sample differences, byte-shuffled and zlib
+  compressed; smallest, decoded on load
+'''
+
+import json
+import os
+import struct
+import zlib
+
+import numpy as np
+
+MAGIC = b"OLIMOT1\n"
+HEADER_LEN = struct.Struct("<I")
+ALIGN = 64
+MOTION_EXT = ".mrec"
+ENCODINGS = ("float32", "int16", "delta")
+DEFAULT_STEP = 1e-4      # radians, covers +-3.27 rad in int16
+TIME_STEP = 1e-6         # seconds, timestamp resolution of the delta encoding
+
+
+class MotionClip:
+    """Joint angles (samples, joints) in radians and timestamps (samples,) in seconds"""
+
+    def __init__(self, joints, times, angles, step=None):
+        self.joints = list(joints)
+        self.times = times
+        if angles.ndim != 2 or angles.shape != (len(times), len(self.joints)):
+            raise ValueError(f"Expected angles of shape ({len(times)}, {len(self.joints)}), got {angles.shape}")
+        # Quantized angles (int16) are scaled on first access, not on load
+        self._raw = angles
+        self._step = step
+        self._angles = angles if step is None else None
+
+    @property
+    def angles(self):
+        if self._angles is None:
+            self._angles = self._raw.astype(np.float32) * np.float32(self._step)
+        return self._angles
+
+    @property
+    def duration(self):
+        return float(self.times[-1]) if len(self.times) else 0.0
+
+    def __len__(self):
+        return len(self.times)
+
+    @classmethod
+    def from_recording(cls, recording):
+        """
+        Convert a NaoqiMotionRecording (or anything with its recorded_* fields).
+        A recording without samples (e.g. stopped right after it started)
+        gives an empty clip, len(clip) == 0.
+        """
+        joints = list(recording.recorded_joints)
+        if not any(len(joint_angles) for joint_angles in recording.recorded_angles):
+            return cls(joints, np.zeros(0, dtype=np.float32), np.zeros((0, len(joints)), dtype=np.float32))
+        if len(recording.recorded_angles) != len(joints):
+            raise ValueError(f"Recording has {len(joints)} joints but angles for {len(recording.recorded_angles)}")
+        angles = np.asarray(recording.recorded_angles, dtype=np.float32)
+        times = np.asarray(recording.recorded_times, dtype=np.float64)
+        if angles.ndim != 2 or times.shape != angles.shape:
+            raise ValueError("Recording joints have a different number of samples")
+        # The recorder samples all joints at once, so every joint has the same timestamps
+        if len(times) and not np.allclose(times, times[0], atol=1e-6):
+            raise ValueError("Recording joints have different timestamps")
+        shared_times = times[0] if len(times) else np.zeros(0)
+        return cls(joints, shared_times.astype(np.float32), np.ascontiguousarray(angles.T))
+
+    def to_recording(self):
+        """NaoqiMotionRecording for PlayRecording"""
+        from sic_framework.devices.common_naoqi.naoqi_motion_recorder import NaoqiMotionRecording
+
+        times = np.asarray(self.times, dtype=np.float64).tolist()
+        return NaoqiMotionRecording(list(self.joints),
+                                    np.asarray(self.angles, dtype=np.float64).T.tolist(),
+                                    [list(times) for _ in self.joints])
+
+    def save(self, path, encoding="float32", step=DEFAULT_STEP):
+        """Write the clip to `path` (atomically), returns the file size in bytes"""
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown encoding {encoding}, expected one of {ENCODINGS}")
+        angles = np.asarray(self.angles, dtype=np.float32)
+        times = np.asarray(self.times, dtype=np.float32)
+        header = {"joints": self.joints, "samples": len(times), "encoding": encoding}
+
+        if encoding == "float32":
+            sections = [("times", times), ("angles", angles)]
+        elif encoding == "int16":
+            header["step"] = step
+            sections = [("times", times), ("angles", _quantize(angles, step, np.int16))]
+        else:
+            header["step"] = step
+            header["time_step"] = TIME_STEP
+            # Per joint, consecutive samples: the differences are small, so their
+            # high bytes are mostly 0 or 0xff. Grouping bytes by significance
+            # ("shuffle") before zlib makes those runs compressible.
+            deltas = np.diff(_quantize(angles, step, np.int32).T, axis=1, prepend=0)
+            fits_int16 = not deltas.size or np.abs(deltas).max() <= np.iinfo(np.int16).max
+            deltas = deltas.astype("<i2" if fits_int16 else "<i4")
+            header["delta_dtype"] = deltas.dtype.str
+            q_times = np.round(np.asarray(self.times, dtype=np.float64) / TIME_STEP).astype(np.int64)
+            sections = [("times", _pack(np.diff(q_times, prepend=0).astype("<i4"))),
+                        ("angles", _pack(deltas))]
+
+        header["sections"] = {}
+        offset = _align(len(MAGIC) + HEADER_LEN.size + _header_room(header, sections))
+        for name, array in sections:
+            header["sections"][name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+            offset = _align(offset + array.nbytes)
+        header_bytes = json.dumps(header).encode("utf-8")
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC + HEADER_LEN.pack(len(header_bytes)) + header_bytes)
+            for name, array in sections:
+                f.seek(header["sections"][name]["offset"])
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.truncate(offset)
+        os.replace(tmp_path, path)
+        return offset
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Load a `.mrec` file. With mmap=True the float32 and int16 encodings
+        are memory-mapped, so loading only reads the header.
+        """
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a motion clip")
+            header = json.loads(f.read(HEADER_LEN.unpack(f.read(HEADER_LEN.size))[0]))
+
+            def section(name):
+                info = header["sections"][name]
+                dtype, shape = np.dtype(info["dtype"]), tuple(info["shape"])
+                if mmap and np.prod(shape):
+                    return np.memmap(path, dtype=dtype, mode="r", offset=info["offset"], shape=shape)
+                f.seek(info["offset"])
+                return np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+            encoding = header["encoding"]
+            if encoding == "float32":
+                return cls(header["joints"], section("times"), section("angles"))
+            if encoding == "int16":
+                return cls(header["joints"], section("times"), section("angles"), step=header["step"])
+            if encoding == "delta":
+                samples, n_joints = header["samples"], len(header["joints"])
+                q_times = np.cumsum(_unpack(section("times"), "<i4"), dtype=np.int64)
+                deltas = _unpack(section("angles"), header["delta_dtype"]).reshape(n_joints, samples)
+                q_angles = np.cumsum(deltas, axis=1, dtype=np.int32)
+                angles = np.ascontiguousarray((q_angles * header["step"]).T, dtype=np.float32)
+                return cls(header["joints"], (q_times * header["time_step"]).astype(np.float32), angles)
+        raise ValueError(f"Unknown encoding {encoding} in {path}")
+
+
+def convert_recording(src, dst=None, encoding="float32", step=DEFAULT_STEP):
+    """Convert a file saved with NaoqiMotionRecording.save, returns the new path"""
+    from sic_framework.devices.common_naoqi.naoqi_motion_recorder import NaoqiMotionRecording
+
+    dst = dst or os.path.splitext(src)[0] + MOTION_EXT
+    MotionClip.from_recording(NaoqiMotionRecording.load(src)).save(dst, encoding=encoding, step=step)
+    return dst
+
+
+def load_library(directory, mmap=True):
+    """All `.mrec` clips in a directory by name (file name without extension)"""
+    return {os.path.splitext(name)[0]: MotionClip.load(os.path.join(directory, name), mmap=mmap)
+            for name in sorted(os.listdir(directory)) if name.endswith(MOTION_EXT)}
+
+
+def _quantize(angles, step, dtype):
+    q = np.round(angles / step)
+    info = np.iinfo(dtype)
+    if q.size and (q.min() < info.min or q.max() > info.max):
+        raise ValueError(f"Angles out of range for step {step} in {np.dtype(dtype).name}")
+    return q.astype(dtype)
+
+
+def _pack(array):
+    """Byte-shuffled, zlib compressed integers as a uint8 array"""
+    array = np.ascontiguousarray(array).ravel()
+    shuffled = array.view(np.uint8).reshape(-1, array.itemsize).T.tobytes()
+    return np.frombuffer(zlib.compress(shuffled, 6), dtype=np.uint8)
+
+
+def _unpack(packed, dtype):
+    dtype = np.dtype(dtype)
+    shuffled = np.frombuffer(zlib.decompress(bytes(packed)), dtype=np.uint8)
+    return np.ascontiguousarray(shuffled.reshape(dtype.itemsize, -1).T).view(dtype).ravel()
+
+
+def _align(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _header_room(header, sections):
+    """Upper bound of the header size once the section offsets are filled in"""
+    sized = dict(header, sections={name: {"offset": 2 ** 63, "dtype": array.dtype.str, "shape": list(array.shape)}
+                                   for name, array in sections})
+    return len(json.dumps(sized).encode("utf-8"))
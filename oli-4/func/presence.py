@@ -0,0 +1,99 @@
+'''
+Presence of a person in front of the camera, from face detection results.
+
+FaceDetection sends a result for every frame, also when it found nothing.
+A single detection (or a single missed one) should not start or end a
+conversation, so presence uses hysteresis: it is entered after `enter_count`
+consecutive results with a face and left after `leave_count` consecutive
+results without one. Transitions set/clear threading Events and call the
+registered callbacks from the detection callback thread, so a waiting
+dialog loop wakes up immediately instead of polling.
+'''
+
+import threading
+import time
+
+from func.frame_join import message_timestamp
+
+
+class PresenceDetector:
+    """
+    min_face_size: ignore faces smaller than this (pixels, width), e.g. people
+    walking by in the background. `appeared` is the timestamp of the first
+    result of the streak that entered presence, for reaction-time measurements.
+    """
+
+    def __init__(self, enter_count=2, leave_count=20, min_face_size=0, logger=None):
+        self.enter_count = enter_count
+        self.leave_count = leave_count
+        self.min_face_size = min_face_size
+        self.logger = logger
+
+        self.present = threading.Event()
+        self.absent = threading.Event()
+        self.absent.set()
+        self.appeared = None
+        self.left = None
+        self.enters = 0
+        self.leaves = 0
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._streak_start = None
+        self._listeners = []
+
+    def _log(self, level, message):
+        if self.logger:
+            getattr(self.logger, level)(message)
+
+    def add_listener(self, callback):
+        """callback(present, timestamp), called on every transition"""
+        self._listeners.append(callback)
+
+    def update(self, bboxes, timestamp=None):
+        """Feed one detection result, returns True on a transition"""
+        timestamp = time.time() if timestamp is None else timestamp
+        seen = any(bbox.w >= self.min_face_size for bbox in bboxes or [])
+        with self._lock:
+            if seen:
+                if self._hits == 0:
+                    self._streak_start = timestamp
+                self._hits += 1
+                self._misses = 0
+            else:
+                self._misses += 1
+                self._hits = 0
+
+            if not self.present.is_set() and self._hits >= self.enter_count:
+                entered = True
+                self.appeared = self._streak_start
+                self.enters += 1
+                self.absent.clear()
+                self.present.set()
+            elif self.present.is_set() and self._misses >= self.leave_count:
+                entered = False
+                self.left = timestamp
+                self.leaves += 1
+                self.present.clear()
+                self.absent.set()
+            else:
+                return False
+
+        self._log("info", f"[PRESENCE] {'Person arrived' if entered else 'Person left'}")
+        for callback in self._listeners:
+            try:
+                callback(entered, timestamp)
+            except Exception as e:
+                self._log("warning", f"[PRESENCE] Listener failed: {e}")
+        return True
+
+    def on_faces(self, message):
+        """Callback for BoundingBoxesMessage (SIC FaceDetection)"""
+        self.update(message.bboxes, message_timestamp(message))
+
+    def wait_present(self, timeout=None):
+        return self.present.wait(timeout)
+
+    def wait_absent(self, timeout=None):
+        return self.absent.wait(timeout)
@@ -0,0 +1,178 @@
+'''
+Closed-loop proxemics: keep NAO at a comfortable distance and facing the
+tracked face, using tracker updates pushed by callback.
+'''
+
+import threading
+import time
+
+
+class LatestValue:
+    """
+    Latest-value slot for one producer and any number of readers. The
+    (sequence, timestamp, value) tuple is swapped in with a single
+    assignment, so readers never see a half-written update and never block.
+    """
+
+    def __init__(self):
+        self._slot = (0, 0.0, None)
+
+    def set(self, value, timestamp=None):
+        seq = self._slot[0] + 1
+        self._slot = (seq, time.monotonic() if timestamp is None else timestamp, value)
+
+    def get(self):
+        """Returns (sequence, timestamp, value); sequence 0 means never set"""
+        return self._slot
+
+
+class PID:
+    def __init__(self, kp, ki=0.0, kd=0.0, integral_limit=1.0):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.integral_limit = integral_limit
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.previous_error = None
+
+    def update(self, error, dt):
+        if dt > 0:
+            self.integral += error * dt
+            self.integral = max(-self.integral_limit, min(self.integral_limit, self.integral))
+        derivative = 0.0
+        if self.previous_error is not None and dt > 0:
+            derivative = (error - self.previous_error) / dt
+        self.previous_error = error
+        return self.kp * error + self.ki * self.integral + self.kd * derivative
+
+
+def clamp(value, limit):
+    return max(-limit, min(limit, value))
+
+
+class ProxemicsController:
+    """
+    Fixed-rate velocity controller on face size (distance) and alpha
+    (bearing). `send(x, y, theta)` is only called when the quantized command
+    differs from the last one sent, so a steady state costs no requests.
+    With a `face_filter` (func.face_filter.FaceTrackFilter) the controller
+    acts on the smoothed estimate and keeps predicting through dropouts.
+    """
+
+    def __init__(self, send, rate_hz=10.0, target_size=0.2, size_tolerance=0.03,
+                 alpha_tolerance=0.1, max_forward=0.1, max_turn=0.3,
+                 lost_timeout=1.0, search_turn=0.3, quantum=0.02, face_filter=None,
+                 logger=None):
+        self.send = send
+        self.rate_hz = rate_hz
+        self.target_size = target_size
+        self.size_tolerance = size_tolerance
+        self.alpha_tolerance = alpha_tolerance
+        self.max_forward = max_forward
+        self.max_turn = max_turn
+        self.lost_timeout = lost_timeout
+        self.search_turn = search_turn
+        self.quantum = quantum
+        self.face_filter = face_filter
+        self.logger = logger
+
+        self.distance_pid = PID(kp=1.0, ki=0.1, kd=0.05)
+        self.bearing_pid = PID(kp=1.2, ki=0.05, kd=0.05)
+
+        self.latest = LatestValue()
+        self.last_command = None
+        self.commands_sent = 0
+        self.ticks = 0
+        self._last_tick = None
+        self._last_seq = 0
+
+    def on_tracker_update(self, state):
+        """Tracker callback; only stores the newest state"""
+        self.latest.set(state)
+
+    def face_measurement(self, now):
+        """(size, alpha) used for control, None when the face is lost"""
+        seq, stamp, state = self.latest.get()
+        if self.face_filter is None:
+            if seq and now - stamp <= self.lost_timeout:
+                return state.w, state.alpha
+            return None
+
+        if seq != self._last_seq:
+            self.face_filter.update(state.w, state.alpha, stamp)
+            self._last_seq = seq
+        if self.face_filter.predict(now):
+            return self.face_filter.size, self.face_filter.alpha
+        return None
+
+    def step(self, now=None):
+        """One control tick, returns the (x, y, theta) command in effect"""
+        now = time.monotonic() if now is None else now
+        dt = 0.0 if self._last_tick is None else now - self._last_tick
+        self._last_tick = now
+        self.ticks += 1
+
+        measurement = self.face_measurement(now)
+        if measurement is None:
+            # No (recent) face: turn in place to search for one
+            self.distance_pid.reset()
+            self.bearing_pid.reset()
+            command = (0.0, 0.0, self.search_turn)
+        else:
+            size, alpha = measurement
+            size_error = self.target_size - size     # positive: too far away
+            if abs(size_error) < self.size_tolerance:
+                size_error = 0.0
+                self.distance_pid.reset()
+            if abs(alpha) < self.alpha_tolerance:
+                alpha = 0.0
+                self.bearing_pid.reset()
+
+            # Too far (face too small): walk forward, too close: walk back
+            x = clamp(self.distance_pid.update(size_error, dt), self.max_forward)
+            # Same convention as the original loop: positive alpha -> negative theta
+            theta = clamp(-self.bearing_pid.update(alpha, dt), self.max_turn)
+            command = (x, 0.0, theta)
+
+        command = tuple(round(v / self.quantum) * self.quantum + 0.0 for v in command)
+        if command != self.last_command:
+            self.send(*command)
+            self.last_command = command
+            self.commands_sent += 1
+        return command
+
+    def stop(self):
+        if self.last_command != (0.0, 0.0, 0.0):
+            self.send(0.0, 0.0, 0.0)
+            self.last_command = (0.0, 0.0, 0.0)
+            self.commands_sent += 1
+
+    def run(self, shutdown_event):
+        """Control loop at rate_hz until shutdown_event is set"""
+        period = 1.0 / self.rate_hz
+        next_tick = time.monotonic()
+        try:
+            while not shutdown_event.is_set():
+                try:
+                    self.step()
+                except Exception as e:
+                    if self.logger:
+                        self.logger.warning(f"[PROXEMICS] Control step failed: {e}")
+                next_tick += period
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    shutdown_event.wait(delay)
+                else:
+                    # Overran: skip missed ticks instead of bursting to catch up
+                    next_tick = time.monotonic()
+        finally:
+            self.stop()
+
+    def start(self, shutdown_event):
+        thread = threading.Thread(target=self.run, args=(shutdown_event,),
+                                  name="proxemics", daemon=True)
+        thread.start()
+        return thread
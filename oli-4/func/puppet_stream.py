@@ -0,0 +1,146 @@
+'''
+Adaptive-rate joint streaming for puppeteering.
+
+The NAO motion streamer sends the full joint vector at a fixed rate, also
+while the puppet master stands still. AdaptiveJointStream sits between the
+master samples and the puppet: it only sends joints that moved more than a
+deadband since the value last sent for them, at a rate that follows the
+joint speed (max_rate during fast motion, min_rate for slow drift, nothing
+when idle apart from a periodic full refresh). JointInterpolator is the
+receiving end: it ramps every joint to its new target over the sender's
+send interval, so a lower rate does not turn into steps.
+'''
+
+import time
+
+import numpy as np
+
+
+class AdaptiveJointStream:
+    """
+    update(joints, angles) is called for every master sample and returns the
+    (joints, angles) to send, or None. `fast_speed` (rad/s) is the joint speed
+    at which the rate reaches max_rate; the speed estimate rises immediately
+    and decays with `decay` per second, so the rate drops after motion stops.
+    """
+
+    def __init__(self, deadband=0.01, min_rate=5.0, max_rate=50.0, fast_speed=1.0,
+                 decay=0.05, refresh_interval=1.0):
+        self.deadband = deadband
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.fast_speed = fast_speed
+        self.decay = decay
+        self.refresh_interval = refresh_interval
+
+        self.joints = None
+        self.speed = 0.0
+        self.rate = min_rate
+        self.samples = 0
+        self.messages = 0
+        self.values = 0
+        self._sent = None
+        self._previous = None
+        self._previous_time = None
+        self._last_send = None
+        self._last_refresh = None
+        self._start = None
+
+    @property
+    def interval(self):
+        """Current send interval in seconds, the ramp time for the receiver"""
+        return 1.0 / self.rate
+
+    def update(self, joints, angles, now=None):
+        now = time.monotonic() if now is None else now
+        angles = np.asarray(angles, dtype=np.float64)
+        self.samples += 1
+        if self._start is None:
+            self._start = now
+
+        if self._sent is None or list(joints) != self.joints:
+            self.joints = list(joints)
+            self._sent = angles.copy()
+            self._previous, self._previous_time = angles, now
+            self._last_send = self._last_refresh = now
+            return self._emit(np.ones(len(angles), dtype=bool))
+
+        dt = now - self._previous_time
+        if dt > 0:
+            speed = float(np.abs(angles - self._previous).max()) / dt
+            self.speed = max(speed, self.speed * self.decay ** dt)
+            self._previous, self._previous_time = angles, now
+        self.rate = self.min_rate + (self.max_rate - self.min_rate) * min(1.0, self.speed / self.fast_speed)
+
+        if now - self._last_refresh >= self.refresh_interval:
+            # Full vector now and then, so a receiver that missed a message catches up
+            self._last_refresh = now
+            changed = np.ones(len(angles), dtype=bool)
+        elif now - self._last_send < 1.0 / self.rate:
+            return None
+        else:
+            changed = np.abs(angles - self._sent) > self.deadband
+            if not changed.any():
+                return None
+
+        self._sent[changed] = angles[changed]
+        self._last_send = now
+        return self._emit(changed)
+
+    def _emit(self, changed):
+        self.messages += 1
+        self.values += int(changed.sum())
+        return [joint for joint, send in zip(self.joints, changed) if send], self._sent[changed].tolist()
+
+    def stats(self, now=None):
+        """Samples seen, messages and joint values sent, messages per second"""
+        now = time.monotonic() if now is None else now
+        elapsed = max(1e-9, now - (self._start or now))
+        return {"samples": self.samples, "messages": self.messages, "values": self.values,
+                "messages_per_second": self.messages / elapsed if self._start else 0.0}
+
+
+class JointInterpolator:
+    """
+    Receiving end of a (partial) joint stream. receive(joints, angles,
+    duration) ramps the given joints linearly from their current position to
+    the new angles over `duration` seconds; sample() returns all joints.
+    """
+
+    def __init__(self):
+        self.joints = []
+        self._index = {}
+        self._start = np.zeros(0)
+        self._target = np.zeros(0)
+        self._t0 = np.zeros(0)
+        self._duration = np.zeros(0)
+
+    def _add_joints(self, joints, angles):
+        new = [(joint, angle) for joint, angle in zip(joints, angles) if joint not in self._index]
+        for joint, _ in new:
+            self._index[joint] = len(self.joints)
+            self.joints.append(joint)
+        values = np.array([angle for _, angle in new], dtype=np.float64)
+        self._start = np.concatenate([self._start, values])
+        self._target = np.concatenate([self._target, values])
+        self._t0 = np.concatenate([self._t0, np.zeros(len(new))])
+        self._duration = np.concatenate([self._duration, np.zeros(len(new))])
+
+    def receive(self, joints, angles, duration=0.0, now=None):
+        now = time.monotonic() if now is None else now
+        self._add_joints(joints, angles)
+        index = np.array([self._index[joint] for joint in joints], dtype=np.intp)
+        self._start[index] = self._current(now)[index]
+        self._target[index] = angles
+        self._t0[index] = now
+        self._duration[index] = duration
+
+    def _current(self, now):
+        progress = np.where(self._duration > 0,
+                            (now - self._t0) / np.where(self._duration > 0, self._duration, 1.0), 1.0)
+        return self._start + (self._target - self._start) * np.clip(progress, 0.0, 1.0)
+
+    def sample(self, now=None):
+        """(joints, angles) of all joints received so far"""
+        now = time.monotonic() if now is None else now
+        return list(self.joints), self._current(now)
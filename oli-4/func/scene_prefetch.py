@@ -0,0 +1,86 @@
+'''
+Prepare the next scene in the background while a break scene is running.
+'''
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_OPENER = "Starting next part..."
+
+
+class PreparedScene:
+    """Everything a scene needs before its first turn"""
+
+    def __init__(self, scene_id, scene, gestures, gesture_colors):
+        self.scene_id = scene_id
+        self.system_prompt = scene["prompt"]
+        self.stopword = scene["stopword"]
+        self.opener = scene.get("opener", DEFAULT_OPENER)
+        self.gestures = gestures
+        self.gesture_colors = gesture_colors
+        self.labels = list(gestures.keys())
+        self.history = [{"role": "model", "content": self.system_prompt}]
+        self.model = None
+        # Canned line (opener, fallback lines) -> gesture category
+        self.canned_categories = {}
+        self.prepare_time = None
+
+
+class ScenePrefetcher:
+    """Builds PreparedScene objects on a worker thread"""
+
+    def __init__(self, scene_prompts, classify, make_model=None, warm_up=None, logger=None):
+        self.scene_prompts = scene_prompts
+        self.classify = classify
+        self.make_model = make_model
+        self.warm_up = warm_up
+        self.logger = logger
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        self._pending = {}
+
+    def prefetch(self, scene_id, gestures, gesture_colors):
+        """Start preparing a scene in the background"""
+        self._pending[scene_id] = self._executor.submit(
+            self.prepare, scene_id, gestures, gesture_colors, warm=True)
+
+    def take(self, scene_id, gestures, gesture_colors, timeout=None):
+        """
+        Return the prefetched scene, waiting for it if it is still being
+        prepared. Falls back to a cold (unwarmed) preparation.
+        """
+        future = self._pending.pop(scene_id, None)
+        if future is not None:
+            try:
+                return future.result(timeout=timeout)
+            except Exception as e:
+                self._log("warning", f"[PREFETCH] Prefetch of {scene_id} failed: {e}")
+        return self.prepare(scene_id, gestures, gesture_colors, warm=False)
+
+    def prepare(self, scene_id, gestures, gesture_colors, warm=True):
+        t0 = time.perf_counter()
+        prepared = PreparedScene(scene_id, self.scene_prompts[scene_id], gestures, gesture_colors)
+        if self.make_model:
+            prepared.model = self.make_model()
+
+        if warm:
+            if self.warm_up:
+                try:
+                    self.warm_up(prepared)
+                except Exception as e:
+                    self._log("warning", f"[PREFETCH] Warm-up failed: {e}")
+
+            canned = [prepared.opener] + self.scene_prompts[scene_id].get("fallback", [])
+            for line in canned:
+                try:
+                    prepared.canned_categories[line] = self.classify(line, prepared.labels)
+                except Exception as e:
+                    self._log("warning", f"[PREFETCH] Could not classify '{line}': {e}")
+
+        prepared.prepare_time = time.perf_counter() - t0
+        self._log("info", f"[PREFETCH] {scene_id} prepared in {prepared.prepare_time:.3f}s "
+                          f"({len(prepared.canned_categories)} canned lines classified)")
+        return prepared
+
+    def _log(self, level, text):
+        if self.logger:
+            getattr(self.logger, level)(text)
@@ -0,0 +1,143 @@
+'''
+Shared-memory ring of camera frames for consumers in other processes.
+
+One writer process publishes decoded frames into fixed-size slots; readers in
+any process attach by name and read the newest frame without pickling. Each
+slot is guarded by a sequence number (odd while the writer is copying), so a
+reader that races the writer retries instead of returning a torn frame.
+'''
+
+import multiprocessing
+import os
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from func.frame_buffer import Frame
+
+MAGIC = b"OLIF"
+# magic, version, slots, slot data size, frames written
+RING_HEADER = struct.Struct("<4sIIIQ")
+WRITTEN_OFFSET = RING_HEADER.size - 8
+# sequence, frame id, timestamp, height, width, channels, nbytes
+SLOT_HEADER = struct.Struct("<QQdIIII")
+HEADER_SIZE = 64
+SLOT_HEADER_SIZE = 64
+READ_RETRIES = 8
+
+
+class SharedFrameRing:
+    """
+    create=True allocates a ring of `slots` frames of up to `max_bytes` each
+    (writer side); otherwise attaches to the existing ring `name`. Frame ids
+    and timestamps are set by the writer, timestamps default to
+    time.monotonic() which is comparable across processes on one machine.
+    """
+
+    def __init__(self, name=None, create=False, slots=4, max_bytes=1280 * 960 * 3):
+        if create:
+            self.slots = slots
+            self.slot_size = max_bytes
+            size = HEADER_SIZE + slots * (SLOT_HEADER_SIZE + max_bytes)
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            RING_HEADER.pack_into(self.shm.buf, 0, MAGIC, 1, slots, max_bytes, 0)
+        else:
+            self.shm = _attach(name)
+            magic, _, self.slots, self.slot_size, _ = RING_HEADER.unpack_from(self.shm.buf, 0)
+            if magic != MAGIC:
+                self.shm.close()
+                raise ValueError(f"{name} is not a frame ring")
+        self.name = self.shm.name
+        self.owner = create
+        self._written = 0
+        self._frame_id = 0
+
+    def _slot_offset(self, index):
+        return HEADER_SIZE + index * (SLOT_HEADER_SIZE + self.slot_size)
+
+    def written(self):
+        """Number of frames published so far"""
+        return RING_HEADER.unpack_from(self.shm.buf, 0)[4]
+
+    def put(self, image, frame_id=None, timestamp=None):
+        """Copy a uint8 image into the next slot, returns its frame id"""
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        if image.nbytes > self.slot_size:
+            raise ValueError(f"Frame of {image.nbytes} bytes does not fit slots of {self.slot_size}")
+        height, width = image.shape[:2]
+        channels = image.shape[2] if image.ndim == 3 else 1
+        self._frame_id = self._frame_id + 1 if frame_id is None else frame_id
+        timestamp = time.monotonic() if timestamp is None else timestamp
+
+        offset = self._slot_offset(self._written % self.slots)
+        seq = SLOT_HEADER.unpack_from(self.shm.buf, offset)[0]
+        buf = self.shm.buf
+        struct.pack_into("<Q", buf, offset, seq + 1)  # odd: being written
+        data = np.ndarray(image.shape, dtype=np.uint8, buffer=buf,
+                          offset=offset + SLOT_HEADER_SIZE)
+        data[...] = image
+        SLOT_HEADER.pack_into(buf, offset, seq + 2, self._frame_id, timestamp,
+                              height, width, channels, image.nbytes)
+
+        self._written += 1
+        struct.pack_into("<Q", buf, WRITTEN_OFFSET, self._written)
+        return self._frame_id
+
+    def get(self, last_id=0, copy=True):
+        """
+        Newest frame as a Frame, or None when there is nothing newer than
+        `last_id`. With copy=False the image is a view into shared memory that
+        stays valid until the writer wraps around to the same slot.
+        """
+        for _ in range(READ_RETRIES):
+            written = self.written()
+            if not written:
+                return None
+            offset = self._slot_offset((written - 1) % self.slots)
+            seq, frame_id, timestamp, height, width, channels, nbytes = \
+                SLOT_HEADER.unpack_from(self.shm.buf, offset)
+            if seq % 2:
+                continue  # writer is busy with this slot
+            if frame_id <= last_id:
+                return None
+            shape = (height, width, channels) if channels > 1 else (height, width)
+            image = np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf,
+                               offset=offset + SLOT_HEADER_SIZE)
+            if copy:
+                image = image.copy()
+            if SLOT_HEADER.unpack_from(self.shm.buf, offset)[0] == seq:
+                return Frame(frame_id, timestamp, image)
+        return None
+
+    def wait(self, last_id=0, timeout=None, poll=0.001, copy=True):
+        """Poll for a frame newer than `last_id`, None on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            frame = self.get(last_id, copy=copy)
+            if frame is not None:
+                return frame
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(poll)
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _attach(name):
+    """Attach without letting this process' resource tracker unlink the ring on exit"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 registers the segment on POSIX only (Windows frees it
+        # with the last handle, and has no tracker to talk to). Child
+        # processes share the parent's tracker, which must keep its own
+        # registration.
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == "posix" and multiprocessing.parent_process() is None:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
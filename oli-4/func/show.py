@@ -0,0 +1,161 @@
+'''
+Declarative show definition (config/show.json) and the scheduler that runs it.
+'''
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+STEP_TYPES = ("break", "dialog")
+
+
+class ShowStep:
+    def __init__(self, name, scene, step_type, posture=None, gestures=None, next_step=None):
+        if step_type not in STEP_TYPES:
+            raise ValueError(f"Step '{name}' has unknown type '{step_type}', expected one of {STEP_TYPES}")
+        self.name = name
+        self.scene = scene
+        self.type = step_type
+        self.posture = posture
+        self.gestures = gestures
+        self.next = next_step
+
+
+class Show:
+    def __init__(self, start, steps, finale=None):
+        self.start = start
+        self.steps = steps
+        self.finale = finale or {}
+
+    def validate(self, scene_prompts):
+        """Fail at startup, not in the middle of a performance"""
+        if self.start not in self.steps:
+            raise ValueError(f"Start step '{self.start}' is not defined")
+        for step in self.steps.values():
+            if step.scene not in scene_prompts:
+                raise ValueError(f"Step '{step.name}' uses unknown scene '{step.scene}'")
+            if step.next is not None and step.next not in self.steps:
+                raise ValueError(f"Step '{step.name}' continues to unknown step '{step.next}'")
+            if step.type == "dialog" and not step.gestures:
+                raise ValueError(f"Dialog step '{step.name}' needs a gesture set")
+
+    def sequence(self):
+        """Steps in performance order, stops if a transition loops back"""
+        seen = set()
+        name = self.start
+        while name is not None and name not in seen:
+            seen.add(name)
+            yield self.steps[name]
+            name = self.steps[name].next
+
+
+def load_show(path):
+    with open(path, "r") as f:
+        raw = json.load(f)
+    steps = {
+        name: ShowStep(name, step["scene"], step["type"], step.get("posture"),
+                       step.get("gestures"), step.get("next"))
+        for name, step in raw["steps"].items()
+    }
+    return Show(raw["start"], steps, raw.get("finale"))
+
+
+class ShowScheduler:
+    """
+    Runs the show step by step. When a scene reaches its stopword it calls
+    begin_transition(), which starts the transition work for the next step
+    (tracker stop, LED reset, posture) in the background while the scene
+    says its closing line. The next step calls wait_transition() before it
+    actuates the robot and mark_ready() once it is interactive; the time
+    between the end of one step and mark_ready() of the next is its gap.
+    """
+
+    def __init__(self, show, run_step, transition_tasks, prefetch=None, logger=None):
+        self.show = show
+        self.run_step = run_step
+        self.transition_tasks = transition_tasks
+        self.prefetch = prefetch
+        self.logger = logger
+        self.gaps = []
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="transition")
+        self._transition = None
+        self._transition_started = False
+        self._current = None
+        self._next = None
+        self._previous_name = None
+        self._previous_end = None
+        self._transition_wait = 0.0
+
+    def run(self, shutdown_event=None):
+        steps = list(self.show.sequence())
+        for index, step in enumerate(steps):
+            if shutdown_event is not None and shutdown_event.is_set():
+                break
+            self._current = step
+            self._next = steps[index + 1] if index + 1 < len(steps) else None
+            self._transition_wait = 0.0
+            self._transition_started = False
+
+            # Pre-warm the next dialog scene while this step is running
+            if self.prefetch and self._next is not None and self._next.type == "dialog":
+                self.prefetch(self._next)
+
+            self._log(f"[SHOW] Step '{step.name}' ({step.type}, scene {step.scene})")
+            self.run_step(step)
+
+            # Scenes that ended without a stopword (shutdown) still transition
+            self.begin_transition()
+            self._previous_name = step.name
+            self._previous_end = time.perf_counter()
+
+        self.wait_transition()
+        return self.gaps
+
+    def begin_transition(self):
+        """Start background transition work towards the next step (once per step)"""
+        if self._transition_started or self._current is None:
+            return
+        self._transition_started = True
+        tasks = self.transition_tasks(self._current, self._next)
+        self._transition = self._executor.submit(self._run_tasks, tasks)
+
+    def wait_transition(self):
+        """Block until the previous transition is done, returns the time waited"""
+        if self._transition is None:
+            return 0.0
+        t0 = time.perf_counter()
+        try:
+            self._transition.result()
+        finally:
+            self._transition = None
+        waited = time.perf_counter() - t0
+        self._transition_wait += waited
+        return waited
+
+    def mark_ready(self):
+        """Called by a step once it is listening; records the transition gap"""
+        if self._previous_end is None or self._current is None:
+            return
+        gap = {
+            "from": self._previous_name,
+            "to": self._current.name,
+            "gap": time.perf_counter() - self._previous_end,
+            "transition_wait": self._transition_wait,
+        }
+        self._previous_end = None
+        self.gaps.append(gap)
+        self._log(f"[SHOW] Transition {gap['from']} -> {gap['to']}: "
+                  f"gap {gap['gap']:.3f}s (waited {gap['transition_wait']:.3f}s)")
+
+    def _run_tasks(self, tasks):
+        for task in tasks:
+            try:
+                task()
+            except Exception as e:
+                if self.logger:
+                    self.logger.warning(f"[SHOW] Transition task failed: {e}")
+
+    def _log(self, text):
+        if self.logger:
+            self.logger.info(text)
@@ -0,0 +1,177 @@
+'''
+In-process NAO stand-in for benchmarks and CI: no robot, no Redis.
+
+Implements the request surfaces this repo uses (tts, motion, leds, tracker,
+stiffness, autonomous, speaker) with configurable latency per request type,
+request recording and fault injection.
+'''
+
+import os
+import random
+import threading
+import time
+
+# Latency model per request class name, in seconds (before time_scale).
+#   base + per_char * len(text) + noise, where noise is "normal" (jitter = std)
+#   or "uniform" (jitter = half width). Animations look up `catalog` by
+#   substring of the animation path. Audio adds per_byte * len(waveform)
+#   (transfer) plus the playback time of the 16-bit mono waveform.
+DEFAULT_LATENCY = {
+    "NaoqiTextToSpeechRequest": {"base": 0.2, "per_char": 0.065, "jitter": 0.05},
+    "NaoqiAnimationRequest": {
+        "base": 3.0, "jitter": 0.3,
+        "catalog": {"BowShort": 3.5, "BodyTalk": 4.0, "Hey": 2.5, "Yes": 2.0, "No": 2.0},
+    },
+    "NaoPostureRequest": {"base": 2.5, "jitter": 0.4},
+    "NaoqiMoveToRequest": {"base": 1.0, "jitter": 0.1},
+    "NaoFadeRGBRequest": {"base": 0.01, "jitter": 0.005},
+    "AudioRequest": {"base": 0.05, "per_byte": 2e-7, "jitter": 0.01},
+    "default": {"base": 0.02, "jitter": 0.005},
+}
+
+SIMULATE_ENV = "OLI4_SIMULATE_NAO"
+
+
+class RequestRecord:
+    def __init__(self, component, request, start, duration, blocking, error=None):
+        self.component = component
+        self.request = request
+        self.type = type(request).__name__
+        self.start = start
+        self.duration = duration
+        self.blocking = blocking
+        self.error = error
+
+
+class SimulatedConnector:
+    """Mimics the SICConnector calls used in this repo"""
+
+    def __init__(self, nao, name):
+        self.nao = nao
+        self.name = name
+        self.callbacks = []
+
+    def request(self, request, timeout=100.0, block=True):
+        return self.nao.handle(self.name, request, timeout, block)
+
+    def register_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def emit(self, message):
+        """Deliver a message (e.g. a tracker state) to the registered callbacks"""
+        for callback in self.callbacks:
+            callback(message)
+
+
+class SimulatedNao:
+    """
+    latency: overrides for DEFAULT_LATENCY (merged per request type).
+    faults: {request type or component: {"error_rate": p, "timeout_rate": p,
+             "extra_latency": s}}; errors raise RuntimeError, timeouts TimeoutError.
+    time_scale: multiply all sleeps, 0 makes every request instant while the
+             recorded durations stay realistic.
+    """
+
+    COMPONENTS = ("tts", "motion", "leds", "tracker", "stiffness", "autonomous", "speaker")
+
+    def __init__(self, latency=None, faults=None, seed=0, time_scale=1.0, logger=None):
+        self.latency = {key: dict(value) for key, value in DEFAULT_LATENCY.items()}
+        for key, value in (latency or {}).items():
+            self.latency.setdefault(key, {}).update(value)
+        self.faults = faults or {}
+        self.time_scale = time_scale
+        self.logger = logger
+        self.records = []
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        for name in self.COMPONENTS:
+            setattr(self, name, SimulatedConnector(self, name))
+
+    def request_duration(self, request):
+        model = self.latency.get(type(request).__name__, self.latency["default"])
+        duration = model.get("base", 0.0)
+
+        text = getattr(request, "text", None)
+        if text:
+            duration += model.get("per_char", 0.0) * len(text)
+        animation = getattr(request, "animation_path", None)
+        if animation:
+            for pattern, seconds in model.get("catalog", {}).items():
+                if pattern in animation:
+                    duration = seconds
+                    break
+        waveform = getattr(request, "waveform", None)
+        if waveform:
+            duration += model.get("per_byte", 0.0) * len(waveform)
+            duration += len(waveform) / (2.0 * request.sample_rate)
+        fade = getattr(request, "duration", None)
+        if isinstance(fade, (int, float)):
+            duration += fade
+
+        jitter = model.get("jitter", 0.0)
+        with self._lock:
+            if model.get("dist", "normal") == "uniform":
+                duration += self._rng.uniform(-jitter, jitter)
+            else:
+                duration += self._rng.gauss(0.0, jitter)
+        return max(0.0, duration)
+
+    def _fault(self, component, request):
+        fault = self.faults.get(type(request).__name__) or self.faults.get(component)
+        if not fault:
+            return 0.0, None
+        with self._lock:
+            roll = self._rng.random()
+        error = None
+        if roll < fault.get("timeout_rate", 0.0):
+            error = TimeoutError(f"Simulated timeout on {component}")
+        elif roll < fault.get("timeout_rate", 0.0) + fault.get("error_rate", 0.0):
+            error = RuntimeError(f"Simulated failure on {component}")
+        return fault.get("extra_latency", 0.0), error
+
+    def handle(self, component, request, timeout=100.0, block=True):
+        extra, error = self._fault(component, request)
+        duration = self.request_duration(request) + extra
+        if isinstance(error, TimeoutError):
+            duration = timeout
+
+        record = RequestRecord(component, request, time.perf_counter(), duration, block,
+                               error=repr(error) if error else None)
+        with self._lock:
+            self.records.append(record)
+        if self.logger:
+            self.logger.debug(f"[SIM NAO] {component}: {record.type} ({duration:.2f}s)")
+
+        if not block:
+            return None
+        if duration and self.time_scale:
+            time.sleep(duration * self.time_scale)
+        if error:
+            raise error
+        return None
+
+    def summary(self):
+        """{request type: {"count", "errors", "total", "mean"}} of recorded requests"""
+        stats = {}
+        with self._lock:
+            records = list(self.records)
+        for record in records:
+            entry = stats.setdefault(record.type, {"count": 0, "errors": 0, "total": 0.0})
+            entry["count"] += 1
+            entry["errors"] += record.error is not None
+            entry["total"] += record.duration
+        for entry in stats.values():
+            entry["mean"] = entry["total"] / entry["count"]
+        return stats
+
+
+def make_nao(ip, simulate=False, **kwargs):
+    """
+    Real Nao device, or SimulatedNao when `simulate` is set or the
+    OLI4_SIMULATE_NAO environment variable is "1".
+    """
+    if simulate or os.getenv(SIMULATE_ENV) == "1":
+        return SimulatedNao()
+    from sic_framework.devices import Nao
+    return Nao(ip=ip, **kwargs)
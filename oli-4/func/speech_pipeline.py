@@ -0,0 +1,95 @@
+'''
+Sentence-pipelined speech: synthesize the next sentences while the current
+one plays, instead of synthesizing a whole reply before playback starts.
+'''
+
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text, min_chars=20):
+    """Split on sentence ends, joining fragments shorter than min_chars to the next one"""
+    sentences = []
+    pending = ""
+    for part in _SENTENCE_END.split(text.strip()):
+        pending = f"{pending} {part}".strip() if pending else part.strip()
+        if len(pending) >= min_chars:
+            sentences.append(pending)
+            pending = ""
+    if pending:
+        if sentences and len(pending) < min_chars:
+            sentences[-1] = f"{sentences[-1]} {pending}"
+        else:
+            sentences.append(pending)
+    return sentences
+
+
+class SpeechPipeline:
+    """
+    synthesize(text) -> (waveform, sample_rate) runs on `workers` threads, at
+    most `lookahead` sentences ahead of playback. play(waveform, sample_rate)
+    blocks while the audio plays. Playback starts once `prebuffer` sentences
+    are ready; sentences that are already synthesized when the previous one
+    ends are joined into one play call, so there is no gap between them.
+    """
+
+    def __init__(self, synthesize, play, workers=2, lookahead=2, prebuffer=1, logger=None):
+        self.synthesize = synthesize
+        self.play = play
+        self.lookahead = max(1, lookahead)
+        self.prebuffer = max(1, prebuffer)
+        self.logger = logger
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts")
+
+    def _log(self, level, message):
+        if self.logger:
+            getattr(self.logger, level)(message)
+
+    def speak(self, text):
+        """Speak `text`, returns the time to first audio in seconds"""
+        start = time.monotonic()
+        sentences = split_sentences(text)
+        if not sentences:
+            return None
+
+        futures = []
+        next_index = 0
+        played = 0
+
+        def fill():
+            nonlocal next_index
+            while next_index < len(sentences) and next_index < played + self.lookahead + 1:
+                futures.append(self._executor.submit(self.synthesize, sentences[next_index]))
+                next_index += 1
+
+        first_audio = None
+        fill()
+        # Jitter buffer: wait for the first `prebuffer` sentences
+        for future in futures[:self.prebuffer]:
+            future.result()
+
+        while played < len(sentences):
+            waveform, sample_rate = futures[played].result()
+            played += 1
+            # Join sentences that are already done (same sample rate) into one play call
+            chunks = [waveform]
+            while played < len(futures) and futures[played].done():
+                next_waveform, next_rate = futures[played].result()
+                if next_rate != sample_rate:
+                    break
+                chunks.append(next_waveform)
+                played += 1
+            fill()
+
+            if first_audio is None:
+                first_audio = time.monotonic() - start
+                self._log("info", f"[SPEECH] Time to first audio {1000 * first_audio:.0f} ms "
+                                  f"({len(sentences)} sentences)")
+            self.play(b"".join(chunks), sample_rate)
+        return first_audio
+
+    def close(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,130 @@
+'''
+Latency and jitter instrumentation for streamed samples (puppeteering).
+
+Every sample gets a sequence number; sent() stamps it at the source and
+applied() when it takes effect at the receiver. report() gives latency
+percentiles, jitter and dropped samples, export() writes them as JSON so
+runs on different network setups can be compared. When only the receiving
+side can be observed, applied() without a matching sent() still yields the
+arrival intervals; intervals much longer than the median are reported as
+gaps. Without sequence numbers a gap is not proof of a dropped sample.
+'''
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class LatencyProbe:
+    """
+    expected_interval: the configured source sample interval in seconds,
+    reported next to the observed one. Gaps are measured against the observed
+    median interval instead: the NAO motion streamer sleeps 1/rate after
+    reading the joints, so its real interval is always longer than the
+    configured one. gap_factor: an interval longer than this many median
+    intervals is a gap. Samples sent more than `timeout` seconds before the
+    last applied one and never applied count as dropped.
+    """
+
+    def __init__(self, expected_interval=None, timeout=1.0, gap_factor=1.5, clock=time.monotonic):
+        self.expected_interval = expected_interval
+        self.timeout = timeout
+        self.gap_factor = gap_factor
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._sent = {}
+        self._applied = {}
+        self._arrivals = []
+        self._next_seq = 0
+        self._started = clock()
+
+    def sent(self, seq=None, t=None):
+        """Stamp a sample at the source, returns its sequence number"""
+        t = self.clock() if t is None else t
+        with self._lock:
+            if seq is None:
+                seq = self._next_seq
+            self._next_seq = max(self._next_seq, seq + 1)
+            self._sent[seq] = t
+        return seq
+
+    def applied(self, seq=None, t=None):
+        """Stamp a sample when it takes effect; duplicates keep the first time"""
+        t = self.clock() if t is None else t
+        with self._lock:
+            self._arrivals.append(t)
+            if seq is not None:
+                self._applied.setdefault(seq, t)
+
+    def report(self, final=False):
+        """final=True counts every sample that was not applied as dropped (end of a session)"""
+        with self._lock:
+            sent = dict(self._sent)
+            applied = dict(self._applied)
+            arrivals = np.array(self._arrivals, dtype=np.float64)
+        report = {"duration_s": self.clock() - self._started, "sent": len(sent), "applied": len(arrivals)}
+
+        matched = sorted(seq for seq in applied if seq in sent)
+        if matched:
+            latency_ms = 1000.0 * np.array([applied[seq] - sent[seq] for seq in matched])
+            report["latency_ms"] = _distribution(latency_ms)
+            # RFC 3550 style: mean change in latency between consecutive samples
+            report["jitter_ms"] = float(np.abs(np.diff(latency_ms)).mean()) if len(latency_ms) > 1 else 0.0
+            # Arrived after a later sample, i.e. applied out of order
+            report["reordered"] = int((np.diff([applied[seq] for seq in matched]) < 0).sum())
+        if sent:
+            horizon = float("inf") if final else max(applied.values(), default=self.clock()) - self.timeout
+            lost = sum(1 for seq, t in sent.items() if seq not in applied and t < horizon)
+            report["dropped"] = lost
+            report["drop_rate"] = lost / len(sent)
+
+        if len(arrivals) > 1:
+            intervals = 1000.0 * np.diff(np.sort(arrivals))
+            report["interval_ms"] = _distribution(intervals)
+            if self.expected_interval:
+                report["expected_interval_ms"] = 1000.0 * self.expected_interval
+            if not sent:
+                median = float(np.median(intervals))
+                gaps = intervals > self.gap_factor * median
+                report["gaps"] = int(gaps.sum())
+                report["gap_time_ms"] = float((intervals[gaps] - median).sum())
+        return report
+
+    def export(self, path, final=True, **metadata):
+        """Write the report (plus e.g. network setup, rates) as JSON, returns it"""
+        report = dict(metadata, created=time.time(), report=self.report(final=final))
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        return report
+
+
+def _distribution(values):
+    stats = {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+    stats.update(mean=float(values.mean()), std=float(values.std()),
+                 min=float(values.min()), max=float(values.max()))
+    return stats
+
+
+def format_report(report):
+    """One-line summary of a report"""
+    parts = [f"{report['applied']}/{report['sent']} applied" if report["sent"] else f"{report['applied']} samples"]
+    latency = report.get("latency_ms")
+    if latency:
+        parts.append(f"latency p50 {latency['p50']:.1f} p95 {latency['p95']:.1f} p99 {latency['p99']:.1f} ms")
+        parts.append(f"jitter {report['jitter_ms']:.1f} ms")
+    interval = report.get("interval_ms")
+    if interval:
+        parts.append(f"interval p50 {interval['p50']:.1f} p95 {interval['p95']:.1f} ms")
+    if "dropped" in report:
+        parts.append(f"dropped {report['dropped']} ({100 * report['drop_rate']:.1f}%)")
+    if "gaps" in report:
+        parts.append(f"gaps {report['gaps']} ({report['gap_time_ms']:.0f} ms)")
+    return ", ".join(parts)
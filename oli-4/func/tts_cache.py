@@ -0,0 +1,159 @@
+'''
+On-disk cache of synthesized speech, so fixed lines play without a TTS call.
+'''
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def speech_key(text, voice_name=None, language_code=None, sample_rate=None, speaking_rate=None):
+    """Content address of an utterance: text (whitespace collapsed) + voice settings"""
+    key_data = json.dumps({
+        "text": " ".join(str(text).split()),
+        "voice_name": voice_name or "",
+        "language_code": language_code or "",
+        "sample_rate": sample_rate or 0,
+        "speaking_rate": speaking_rate or 1.0,
+    }, sort_keys=True)
+    return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    Waveforms are stored as raw 16-bit PCM, one `<key>.pcm` file per
+    utterance in `cache_dir`, with an LRU index (sample rate, size, text,
+    last use) in `index.json`. Least recently used entries are removed once
+    the cache holds more than `max_entries` utterances or `max_bytes` of audio.
+    """
+
+    def __init__(self, cache_dir, max_entries=1000, max_bytes=200 * 1024 * 1024, logger=None):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.logger = logger
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(cache_dir, "index.json")
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index = self._load_index()
+        self._dirty = False
+
+    def _log(self, level, message):
+        if self.logger:
+            getattr(self.logger, level)(message)
+
+    def get(self, key):
+        """(waveform bytes, sample_rate), or None on a miss"""
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            try:
+                with open(self._entry_path(key), "rb") as f:
+                    waveform = f.read()
+            except OSError:
+                del self._index[key]
+                self._dirty = True
+                self.misses += 1
+                return None
+            # LRU order is kept in memory and written with the next put/flush,
+            # a hit costs one file read and nothing else
+            entry["used"] = time.time()
+            self._index.move_to_end(key)
+            self._dirty = True
+            self.hits += 1
+            return waveform, entry["sample_rate"]
+
+    def put(self, key, waveform, sample_rate, text=""):
+        waveform = bytes(waveform)
+        with self._lock:
+            tmp_path = self._entry_path(key) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(waveform)
+            os.replace(tmp_path, self._entry_path(key))
+            self._index[key] = {"sample_rate": sample_rate, "bytes": len(waveform),
+                                "text": text, "used": time.time()}
+            self._index.move_to_end(key)
+            self._evict()
+            self._save_index()
+
+    def synthesize(self, text, synth, **voice):
+        """
+        Cached waveform for `text`, calling `synth(text)` -> (waveform,
+        sample_rate) on a miss. `voice` holds the speech_key voice settings.
+        """
+        key = speech_key(text, **voice)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        waveform, sample_rate = synth(text)
+        self.put(key, waveform, sample_rate, text=text)
+        return waveform, sample_rate
+
+    def lookup(self, text, **voice):
+        """Cached waveform for `text` or None, without synthesizing (only hits are counted)"""
+        key = speech_key(text, **voice)
+        with self._lock:
+            if key not in self._index:
+                return None
+        return self.get(key)
+
+    def prepopulate(self, lines, synth, **voice):
+        """Synthesize every line that is not cached yet, returns how many were added"""
+        added = 0
+        for text in lines:
+            key = speech_key(text, **voice)
+            with self._lock:
+                if key in self._index and os.path.exists(self._entry_path(key)):
+                    continue
+            try:
+                waveform, sample_rate = synth(text)
+            except Exception as e:
+                self._log("warning", f"[TTS CACHE] Could not synthesize '{text}': {e}")
+                continue
+            self.put(key, waveform, sample_rate, text=text)
+            added += 1
+        self._log("info", f"[TTS CACHE] {added} lines added, {len(self._index)} cached")
+        return added
+
+    def flush(self):
+        """Write the LRU order of recent hits to disk"""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def _evict(self):
+        total = sum(entry["bytes"] for entry in self._index.values())
+        while self._index and (len(self._index) > self.max_entries or total > self.max_bytes):
+            old_key, old_entry = self._index.popitem(last=False)
+            total -= old_entry["bytes"]
+            try:
+                os.remove(self._entry_path(old_key))
+            except OSError:
+                pass
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pcm")
+
+    def _load_index(self):
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return OrderedDict()
+        # Oldest use first, so the front of the dict is evicted first
+        return OrderedDict(sorted(entries.items(), key=lambda item: item[1]["used"]))
+
+    def _save_index(self):
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path)
+        self._dirty = False
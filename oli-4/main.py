@@ -5,13 +5,17 @@ import google.generativeai as genai
 import os
 
 # Gesture functions
-from func.gesture import classify_gesture_api, select_gesture
+from func.gesture import classify_gesture_api, classify_gesture_stream, select_gesture
+from func.gemini_cache import GeminiResponseCache
+from func.hedged_call import FallbackLines, HedgedCaller
+from func.scene_prefetch import ScenePrefetcher
+from func.show import ShowScheduler, load_show
+from func.sim_nao import make_nao
 
 # SIC framework
 from sic_framework.core.sic_application import SICApplication
 from sic_framework.core import sic_logging
 
-from sic_framework.devices import Nao
 from sic_framework.devices.nao import NaoqiTextToSpeechRequest
 from sic_framework.devices.common_naoqi.naoqi_motion import (
     NaoPostureRequest,
@@ -57,16 +61,58 @@ class Oli4v4Demo(SICApplication):
 
         with open("config/scenes.json", "r") as f:
             self.scene_prompts = json.load(f)
+        self.fallback_lines = FallbackLines(self.scene_prompts)
 
         with open("config/eyecolors.json", "r") as f:
             gesture_colors = json.load(f)
         self.gesture_colors_sitting = gesture_colors["sitting"]
         self.gesture_colors_standing = gesture_colors["standing"]
 
+        self.gesture_sets = {
+            "standing": (self.gesture_standing, self.gesture_colors_standing),
+            "sitting": (self.gesture_sitting, self.gesture_colors_sitting),
+        }
+
+        # Scene order, postures and gesture sets of the performance
+        self.show = load_show("config/show.json")
+        self.show.validate(self.scene_prompts)
+
         # Speech & LLM
         self.gemini_model = "gemini-2.5-flash"
         self.api_key_path = abspath(join("config", "api_key.txt"))
 
+        # Hard latency budget (s) for a Gemini reply, hedged after the p90 latency
+        self.gemini_caller = HedgedCaller(budget=6.0, logger=self.logger)
+
+        # Next scene is prepared in the background during break scenes
+        self.prefetcher = ScenePrefetcher(
+            self.scene_prompts,
+            classify=self.classify_gesture,
+            make_model=lambda: genai.GenerativeModel(self.gemini_model),
+            warm_up=self.warm_up_gemini,
+            logger=self.logger,
+        )
+        self.scheduler = ShowScheduler(
+            self.show,
+            run_step=self.run_step,
+            transition_tasks=self.transition_tasks,
+            prefetch=lambda step: self.prefetcher.prefetch(step.scene, *self.gesture_sets[step.gestures]),
+            logger=self.logger,
+        )
+
+        # Gemini reply cache, "off" for live shows (see config/config.json)
+        with open("config/config.json", "r") as f:
+            self.config = json.load(f)
+        cache_conf = self.config.get("gemini_cache", {})
+        self.gemini_cache = GeminiResponseCache(
+            abspath(cache_conf.get("path", "cache/gemini")),
+            max_entries=cache_conf.get("max_entries", 500),
+            mode=cache_conf.get("mode", "off"),
+        )
+
+        # Gesture classifier transport: "http" (FastAPI) or "redis" (stream workers)
+        self.gesture_transport = "http"
+
         # Setup logging to file for analysis
         logs_folder = abspath("logs")
         os.makedirs(logs_folder, exist_ok=True)
@@ -91,7 +137,8 @@ class Oli4v4Demo(SICApplication):
     def setup(self):
         self.logger.info("Initializing NAO...")
         try:
-            self.nao = Nao(ip=self.nao_ip)
+            # "simulate_nao" in config.json (or OLI4_SIMULATE_NAO=1) runs without a robot
+            self.nao = make_nao(self.nao_ip, simulate=self.config.get("simulate_nao", False))
         except Exception as e:
             self.logger.warning(f"NAO connection failed: {e}")
             self.nao = None
@@ -134,21 +181,49 @@ class Oli4v4Demo(SICApplication):
             stream.close()
             pa.terminate()
 
+    def to_gemini_messages(self, messages):
+        """Convert to Gemini-compatible structure"""
+        return [
+            {"role": msg["role"], "parts": [{"text": msg["content"]}]}
+            for msg in messages
+        ]
+
+    def warm_up_gemini(self, prepared):
+        """Open the Gemini connection for the next scene (token counting is free)"""
+        # Not hedged and not recorded: token counting latency says nothing about generate_content
+        self.gemini_caller.call(
+            lambda: prepared.model.count_tokens_async(self.to_gemini_messages(prepared.history)),
+            hedge=False)
+
     # Gemini LLM call
-    def ask_gemini(self, messages):
+    def ask_gemini(self, messages, model=None):
+        cache_key = None
+        if self.gemini_cache.enabled:
+            # First message holds the scene's system prompt
+            cache_key = self.gemini_cache.make_key(
+                self.gemini_model, messages[0]["content"], messages[1:])
+            cached = self.gemini_cache.get(cache_key)
+            if cached:
+                self.logger.info("[CACHE] Replaying cached Gemini reply")
+                return cached
+            if self.gemini_cache.offline:
+                self.logger.warning("[CACHE] Offline mode and no cached reply for this turn")
+                return None
+
         try:
-            model = genai.GenerativeModel(self.gemini_model)
+            model = model or genai.GenerativeModel(self.gemini_model)
+            gemini_msgs = self.to_gemini_messages(messages)
+
+            async def attempt():
+                response = await model.generate_content_async(
+                    gemini_msgs, request_options={"timeout": self.gemini_caller.budget})
+                return response.text.strip()
 
-            # Convert to Gemini-compatible structure
-            gemini_msgs = []
-            for msg in messages:
-                gemini_msgs.append({
-                    "role": msg["role"],
-                    "parts": [{"text": msg["content"]}]
-                })
+            reply = self.gemini_caller.call(attempt)
 
-            response = model.generate_content(gemini_msgs)
-            return response.text.strip()
+            if cache_key:
+                self.gemini_cache.put(cache_key, reply)
+            return reply
 
         except Exception as e:
             self.logger.error(f"Gemini error: {e}")
@@ -214,6 +289,11 @@ class Oli4v4Demo(SICApplication):
 
         return final_text
     
+    def classify_gesture(self, text, labels):
+        if self.gesture_transport == "redis":
+            return classify_gesture_stream(text, labels)
+        return classify_gesture_api(text, labels)
+
     # Speak
     def speak(self, text):
         if not text:
@@ -224,8 +304,9 @@ class Oli4v4Demo(SICApplication):
             print("NAO TTS failed -> printing instead:")
             print(text)
 
-    def log_interaction(self, scene_id, user_text, reply, gemini_time, classifier_time, category, gesture):
-        """Write a single interaction to the JSONL log file."""
+    def log_interaction(self, scene_id, user_text, reply, gemini_time, classifier_time, category, gesture,
+                        fallback=False):
+        """Write a single interaction to the JSONL log file (fallback: reply is a filler line, not Gemini's)."""
         entry = {
             "timestamp": time.time(),
             "scene_id": scene_id,
@@ -234,22 +315,22 @@ class Oli4v4Demo(SICApplication):
             "gemini_response_time": gemini_time,
             "classifier_time": classifier_time,
             "gesture_category": category,
-            "gesture_selected": gesture
+            "gesture_selected": gesture,
+            "fallback": fallback
         }
         with open(self.data_log_path, "a", encoding="utf-8") as f:
             f.write(json.dumps(entry) + "\n")
     
     def run_scene(self, scene_id, gestures, gesture_colors):
-        system_prompt = self.scene_prompts[scene_id]["prompt"]
-        stopword = self.scene_prompts[scene_id]["stopword"]
-        labels = list(gestures.keys())
-
-        history = [
-            {"role": "model", "content": system_prompt}
-        ]
+        # Prepared during the preceding break scene if it was prefetched
+        prepared = self.prefetcher.take(scene_id, gestures, gesture_colors)
+        stopword = prepared.stopword
+        labels = prepared.labels
+        history = prepared.history
 
         target_name = "Face"
-            
+
+        self.scheduler.wait_transition()
         self.logger.info("Enabling head stiffness and starting face tracking...")
         # Enable stiffness so the head joint can be actuated
         self.nao.stiffness.request(Stiffness(stiffness=1.0, joints=["Head"]))
@@ -258,7 +339,12 @@ class Oli4v4Demo(SICApplication):
         )
 
         self.logger.info(f"--- Starting Scene {scene_id} ---")
-        self.speak("Starting next part...")
+        opener_category = prepared.canned_categories.get(prepared.opener)
+        if opener_category and self.nao:
+            self.nao.motion.request(
+                NaoqiAnimationRequest(select_gesture(gestures, opener_category)), block=False)
+        self.speak(prepared.opener)
+        self.scheduler.mark_ready()
 
         while not self.shutdown_event.is_set():
             try:
@@ -287,16 +373,20 @@ class Oli4v4Demo(SICApplication):
                 self.logger.info("[START][LLM] Setting LED to red")
                 light = self.nao.leds.request(NaoFadeRGBRequest("ChestLeds", 1, 0, 0, 0))
                 t0_gemini = time.perf_counter()
-                reply = self.ask_gemini(history)
+                reply = self.ask_gemini(history, model=prepared.model)
                 t1_gemini = time.perf_counter()
                 gemini_time = t1_gemini - t0_gemini
 
                 self.logger.info(f"[TIMING] Gemini response took {gemini_time:.3f}s")
 
-                if not reply:
-                    continue
-
-                self.logger.info(f"Gemini reply: {reply}")
+                fallback = not reply
+                if fallback:
+                    # Never leave the performer hanging: say a scene filler line
+                    reply = self.fallback_lines.pick(scene_id)
+                    self.logger.warning("[LLM] No Gemini reply, using fallback line")
+                    self.logger.info(f"[FALLBACK] Fallback reply: {reply}")
+                else:
+                    self.logger.info(f"Gemini reply: {reply}")
 
                 # Add model reply to conversation
                 history.append({"role": "model", "content": reply})
@@ -311,7 +401,10 @@ class Oli4v4Demo(SICApplication):
                 t0_class = time.perf_counter()
                 self.logger.info("[CLASSIFIER] STARTED classification")
 
-                category = classify_gesture_api(reply, labels)
+                # Fallback lines were already classified during the break
+                category = prepared.canned_categories.get(reply)
+                if category is None:
+                    category = self.classify_gesture(reply, labels)
                 gesture = select_gesture(gestures, category)
                 t1_class = time.perf_counter()
 
@@ -350,11 +443,13 @@ class Oli4v4Demo(SICApplication):
                     gemini_time=gemini_time,
                     classifier_time=classifier_time,
                     category=category,
-                    gesture=gesture
+                    gesture=gesture,
+                    fallback=fallback
                 )
 
                 # END SCENE on keyword
                 if stopword in user_text.lower():
+                    self.scheduler.begin_transition()
                     self.speak("Okay, moving on.")
                     break
 
@@ -368,12 +463,14 @@ class Oli4v4Demo(SICApplication):
         - NAO performs face tracking + walking
         - Keep listening for stopword
         - Stop when stopword is heard -> break scene ends
+        Move tracking is stopped by the show transition that follows.
         """
 
         stopword = self.scene_prompts[scene_id]["stopword"].lower()
 
         self.logger.info(f"--- Starting BREAK Scene {scene_id} ---")
         self.speak("Let's take a short break.")
+        self.scheduler.wait_transition()
 
         # -----------------------
         # 1. Start tracking + walking
@@ -396,6 +493,8 @@ class Oli4v4Demo(SICApplication):
         except Exception as e:
             self.logger.error(f"Could not start break tracking: {e}")
 
+        self.scheduler.mark_ready()
+
         # -----------------------
         # 2. Loop until stopword
         # -----------------------
@@ -418,18 +517,43 @@ class Oli4v4Demo(SICApplication):
 
             # ---- STOPWORD detected → end break ----
             if stopword in user_text.lower():
+                self.scheduler.begin_transition()
                 self.speak("Okay, let's continue.")
                 break
 
-        # -----------------------
-        # 3. Stop tracking when break ends
-        # -----------------------
-        try:
-            self.logger.info("Ending break: stopping Move tracking")
-            self.nao.tracker.request(StopAllTrackRequest())
-            self.nao.tracker.request(RemoveTargetRequest("Face"))
-        except Exception:
-            pass
+    def run_step(self, step):
+        """Run one step of config/show.json"""
+        if step.type == "break":
+            self.run_break_scene(step.scene)
+        else:
+            gestures, gesture_colors = self.gesture_sets[step.gestures]
+            self.run_scene(step.scene, gestures, gesture_colors)
+
+    def transition_tasks(self, step, next_step):
+        """Robot work between two steps, run in the background by the scheduler"""
+        if not self.nao:
+            return []
+        tasks = []
+        if step.type == "break":
+            def stop_move_tracking():
+                self.logger.info("Ending break: stopping Move tracking")
+                self.nao.tracker.request(StopAllTrackRequest())
+                self.nao.tracker.request(RemoveTargetRequest("Face"))
+            tasks.append(stop_move_tracking)
+
+        # Reset eye colour left over from the last gesture
+        tasks.append(lambda: self.nao.leds.request(NaoFadeRGBRequest("FaceLeds", 1, 1, 1, 0)))
+
+        posture = next_step.posture if next_step else self.show.finale.get("posture")
+        if posture:
+            tasks.append(lambda: self.nao.motion.request(NaoPostureRequest(posture, 0.5)))
+        return tasks
+
+    def log_transitions(self, gaps):
+        """Append the transition gaps of this performance to the JSONL log"""
+        with open(self.data_log_path, "a", encoding="utf-8") as f:
+            for gap in gaps:
+                f.write(json.dumps({"timestamp": time.time(), "type": "transition", **gap}) + "\n")
 
     # -------------------------------------------------------
     # RUN LOOP (changed to wait for gesture THEN speak+gesture)
@@ -448,74 +572,22 @@ class Oli4v4Demo(SICApplication):
                 target_name = "Face"
 
             # --------------------
-            # START
-            # --------------------
-            # NAO waits for actor to say start word to start with first scene
-            self.logger.info("Scene: Start")
-            if self.nao:
-                self.nao.motion.request(NaoPostureRequest("Stand", 0.5))
-            self.run_break_scene("sc_break")
-
-            # --------------------
-            # SCENE 1 (Standing)
-            # --------------------
-            self.logger.info("Scene: 1, Specialist")
-            if self.nao:
-                self.nao.motion.request(NaoPostureRequest("Stand", 0.5))
-            self.run_scene("sc_specialist", self.gesture_standing, self.gesture_colors_standing)
-
-            # --------------------
-            # BREAK 1
-            # --------------------
-            self.logger.info("Scene: Break 1")
-            if self.nao:
-                self.nao.motion.request(NaoPostureRequest("Stand", 0.5))
-            self.run_break_scene("sc_break")
-
-            # --------------------
-            # SCENE 2 (standing)
-            # --------------------
-            self.logger.info("Scene 2: Relation")
-            if self.nao:
-                self.nao.motion.request(NaoPostureRequest("Stand", 0.5))
-            self.run_scene("sc_relation", self.gesture_standing, self.gesture_colors_standing)
-
-            # --------------------
-            # BREAK 2
-            # --------------------
-            self.logger.info("Scene: Break 2")
-            if self.nao:
-                self.nao.motion.request(NaoPostureRequest("Stand", 0.5))
-            self.run_break_scene("sc_break")
-
-            # --------------------
-            # SCENE 3 (sitting)
+            # SHOW: scenes, postures and transitions from config/show.json
             # --------------------
-            self.logger.info("Scene 3: therapist")
-            if self.nao:
-                self.nao.motion.request(NaoPostureRequest("Sit", 0.5))
-            self.run_scene("sc_therapist", self.gesture_sitting, self.gesture_colors_sitting)
-
-            # # --------------------
-            # # END: Idle: Skipped, takes too long
-            # # --------------------
-            # self.logger.info("Scene: End Idle")
-            # if self.nao:
-            #     self.nao.motion.request(NaoPostureRequest("Stand", 0.5))
-            # self.run_break_scene("sc_break")
+            gaps = self.scheduler.run(self.shutdown_event)
+            self.log_transitions(gaps)
 
             # --------------------
             # END: Finish
-            # Oli4 stands up and bows immediately afterwards
+            # Oli4 stands up (during the last transition) and bows
             # --------------------
             self.logger.info("Scene: End Idle")
+            finale = self.show.finale
 
-            if self.nao:
-                self.nao.motion.request(NaoPostureRequest("Stand", 0.5))
-            time.sleep(1)
-
-            self.speak("That's all I got for today, thank you for your attention!")
-            self.nao.motion.request(NaoqiAnimationRequest("animations/Stand/Gestures/BowShort_1"))
+            if finale.get("line"):
+                self.speak(finale["line"])
+            if self.nao and finale.get("animation"):
+                self.nao.motion.request(NaoqiAnimationRequest(finale["animation"]))
 
         except KeyboardInterrupt:
             self.logger.info("Interrupted")
@@ -0,0 +1,103 @@
+"""
+Object detection at the fixed ObjectDetectionConf(frequency=15) loop vs. the
+motion-adaptive scheduler, on a simulated 30 fps camera: a static scene with
+sensor noise and an object that moves now and then. The detector is
+simulated (finds the object, costs DETECT_TIME of CPU per call). Reports
+detections/s, detector + scoring CPU (% of one core), and the freshness of
+the detections drawn on every frame: their age and how far the drawn box is
+off from where the object really is.
+From oli-4/:
+    python tests/bench_adaptive_detection.py [seconds]
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from func.adaptive_detection import AdaptiveDetectionScheduler
+
+FPS = 30
+WIDTH, HEIGHT = 640, 480
+OBJECT = 80
+NOISE = 2.0              # sensor noise, std of pixel values
+DETECT_TIME = 0.05       # YOLO on CPU per frame (seconds of one core)
+FIXED_FREQUENCY = 15.0
+# (start, end) seconds in which the object moves, static otherwise
+MOVING = [(2.0, 4.0), (8.0, 9.0), (13.0, 16.0)]
+
+
+def object_position(t):
+    """Top-left corner of the object at time t"""
+    travelled = sum(max(0.0, min(t, end) - start) for start, end in MOVING)
+    x = (WIDTH - OBJECT) * (0.5 + 0.5 * np.sin(1.3 * travelled))
+    y = (HEIGHT - OBJECT) * (0.5 + 0.5 * np.cos(0.9 * travelled))
+    return int(x), int(y)
+
+
+def frames(seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    background = rng.integers(40, 200, (HEIGHT // 16, WIDTH // 16, 3), dtype=np.uint8)
+    background = np.repeat(np.repeat(background, 16, axis=0), 16, axis=1).astype(np.float32)
+    # A few noisy versions of the background, cycled, to keep generating frames cheap
+    noisy = [np.clip(background + rng.normal(0, NOISE, background.shape), 0, 255).astype(np.uint8)
+             for _ in range(8)]
+    for i in range(int(seconds * FPS)):
+        t = i / FPS
+        image = noisy[i % len(noisy)].copy()
+        x, y = object_position(t)
+        image[y:y + OBJECT, x:x + OBJECT] = 250
+        yield t, image
+
+
+def simulate(seconds, scheduler=None):
+    """Returns detections, detector CPU seconds, scoring CPU seconds, (age, box error) per shown frame"""
+    shown = None              # (frame time, box) of the detections being drawn
+    in_flight = None          # (done time, frame time, box)
+    next_fixed = 0.0
+    detections = 0
+    ages, errors, moving = [], [], []
+    for t, image in frames(seconds):
+        if in_flight and in_flight[0] <= t:
+            shown = in_flight[1:]
+            in_flight = None
+            next_fixed = t + 1.0 / FIXED_FREQUENCY  # the service sleeps after every detection
+            if scheduler:
+                scheduler.detection_done()
+
+        if scheduler is None:
+            start = in_flight is None and t >= next_fixed
+        else:
+            start = scheduler.observe(image, now=t)
+        if start:
+            if scheduler:
+                scheduler.detection_started(now=t)
+            detections += 1
+            in_flight = (t + DETECT_TIME, t, object_position(t))
+
+        if shown:
+            ages.append(t - shown[0])
+            true_x, true_y = object_position(t)
+            errors.append(np.hypot(shown[1][0] - true_x, shown[1][1] - true_y))
+            moving.append(any(start <= t < end for start, end in MOVING))
+    score_time = scheduler.score_time if scheduler else 0.0
+    return (detections, detections * DETECT_TIME, score_time,
+            np.array(ages), np.array(errors), np.array(moving, dtype=bool))
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 20.0
+    moving = sum(min(end, seconds) - start for start, end in MOVING if start < seconds)
+    print(f"{seconds:.0f} s at {FPS} fps, {WIDTH}x{HEIGHT}, object moving {moving:.0f} s")
+    runs = (("fixed 15 Hz", None),
+            ("adaptive", AdaptiveDetectionScheduler(min_rate=1.0, max_rate=15.0)))
+    for name, scheduler in runs:
+        detections, detect_cpu, score_cpu, ages, errors, moving = simulate(seconds, scheduler)
+        cpu = 100.0 * (detect_cpu + score_cpu) / seconds
+        print(f"{name:>12}: {detections / seconds:5.1f} detections/s, CPU {cpu:5.1f}% of a core "
+              f"(scoring {1000 * score_cpu / (seconds * FPS):.2f} ms/frame)")
+        # While the object moves, age matters; while it stands still old detections are still right
+        print(f"{'':>12}  moving: detection age mean {1000 * ages[moving].mean():4.0f} ms, "
+              f"box error mean {errors[moving].mean():5.1f} px p95 {np.percentile(errors[moving], 95):5.1f} px | "
+              f"static: age mean {1000 * ages[~moving].mean():4.0f} ms, "
+              f"box error mean {errors[~moving].mean():4.1f} px")
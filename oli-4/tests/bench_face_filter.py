@@ -0,0 +1,87 @@
+"""
+Replay a recorded tracker trace through the proxemics controller with and
+without the Kalman face filter, and compare the motion commands issued.
+
+Traces are written by test_proxemics.py to logs/tracker_trace_*.jsonl.
+Without an argument a synthetic trace (noisy, with dropouts) is used.
+From oli-4/:
+    python tests/bench_face_filter.py [logs/tracker_trace_XXXX.jsonl]
+"""
+import json
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from func.face_filter import FaceTrackFilter
+from func.proxemics import ProxemicsController
+
+CONTROL_HZ = 10.0
+
+
+class TrackerState:
+    def __init__(self, w, alpha):
+        self.w = w
+        self.alpha = alpha
+
+
+def load_trace(path):
+    with open(path, "r", encoding="utf-8") as f:
+        samples = [json.loads(line) for line in f if line.strip()]
+    t0 = samples[0]["t"]
+    return [(s["t"] - t0, s["w"], s["alpha"]) for s in samples]
+
+
+def synthetic_trace(seconds=60.0, hz=10.0, seed=0):
+    """Performer drifting around 1 m in front of NAO, with short dropouts"""
+    rng = random.Random(seed)
+    trace = []
+    for i in range(int(seconds * hz)):
+        t = i / hz
+        if 20.0 <= t % 30.0 < 20.4:
+            continue  # face briefly lost
+        distance = 1.0 + 0.25 * math.sin(t / 6.0)
+        bearing = 0.2 * math.sin(t / 4.0)
+        trace.append((t, 0.2 / distance + rng.gauss(0, 0.015), bearing + rng.gauss(0, 0.05)))
+    return trace
+
+
+def replay(trace, face_filter):
+    sent = []
+    controller = ProxemicsController(lambda *cmd: sent.append(cmd), face_filter=face_filter)
+    index = 0
+    t = 0.0
+    end = trace[-1][0]
+    t0 = time.perf_counter()
+    while t <= end:
+        while index < len(trace) and trace[index][0] <= t:
+            sample_t, w, alpha = trace[index]
+            controller.latest.set(TrackerState(w, alpha), timestamp=sample_t)
+            index += 1
+        controller.step(now=t)
+        t += 1.0 / CONTROL_HZ
+    step_us = (time.perf_counter() - t0) / max(controller.ticks, 1) * 1e6
+
+    # Direction reversals of forward and turn velocity = oscillation
+    reversals = 0
+    for axis in (0, 2):
+        signs = [math.copysign(1, c[axis]) for c in sent if c[axis] != 0.0]
+        reversals += sum(1 for a, b in zip(signs, signs[1:]) if a != b)
+    return len(sent), reversals, step_us
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        trace = load_trace(sys.argv[1])
+        print(f"Replaying {sys.argv[1]}: {len(trace)} samples, {trace[-1][0]:.1f} s")
+    else:
+        trace = synthetic_trace()
+        print(f"Replaying synthetic trace: {len(trace)} samples, {trace[-1][0]:.1f} s")
+
+    raw_count, raw_reversals, raw_us = replay(trace, None)
+    kf_count, kf_reversals, kf_us = replay(trace, FaceTrackFilter())
+    print(f"     raw: {raw_count:4d} commands, {raw_reversals:3d} reversals, {raw_us:6.1f} us/step")
+    print(f"  kalman: {kf_count:4d} commands, {kf_reversals:3d} reversals, {kf_us:6.1f} us/step")
+    print(f"command reduction: {100.0 * (1 - kf_count / max(raw_count, 1)):.0f}%")
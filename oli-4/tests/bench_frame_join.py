@@ -0,0 +1,178 @@
+"""
+Pairing of camera frames with face detections, as in the kiosk demo:
+two size-1 queues read one after the other vs. FrameDetectionJoin.
+A simulated camera (30 fps) stamps frames like a SIC sensor (Redis TIME,
+a (seconds, microseconds) pair) and feeds the display callback and a
+detector that takes 40-90 ms per frame and skips frames while busy. Like
+SIC FaceDetection (a SICComponent) the detector output has no timestamp;
+the "service" run shows a detector that copies the frame timestamp, as
+SICService does. Reports how many displayed pairs had boxes from another
+frame, how many results could not be paired, how long the producer
+callbacks were blocked, and the pairing latency.
+From oli-4/:
+    python tests/bench_frame_join.py [seconds]
+"""
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from func.frame_join import FrameDetectionJoin
+
+FPS = 30
+DETECT_TIME = (0.04, 0.09)
+DISPLAY_TIME = 0.008  # draw + imshow + waitKey
+
+
+class ImageMessage:
+    def __init__(self, image, timestamp):
+        self.image = image
+        self._timestamp = timestamp
+
+
+class BoxesMessage:
+    def __init__(self, bboxes, timestamp=None):
+        self.bboxes = bboxes
+        if timestamp is not None:
+            self._timestamp = timestamp
+
+
+def redis_time():
+    seconds, microseconds = divmod(int(time.time() * 1e6), 1000000)
+    return seconds, microseconds
+
+
+def frame_image(frame_id):
+    """Frame id encoded in the pixels, to check which frame a pair shows"""
+    return np.full((4, 4), frame_id % 256, dtype=np.uint8)
+
+
+def detect_image(image, rng):
+    time.sleep(rng.uniform(*DETECT_TIME))
+    return [int(image[0, 0])]
+
+
+def run(seconds, on_frame, consume, on_detections=None, copy_timestamp=False):
+    """
+    Camera thread calling on_frame(message), and with on_detections a
+    streaming detector calling on_detections(message). Returns the time the
+    producer callbacks were blocked.
+    """
+    blocked = {"frame": 0.0, "detections": 0.0}
+    detector_input = queue.Queue(maxsize=1)
+    stop = threading.Event()
+    rng = random.Random(0)
+
+    def camera():
+        start = time.monotonic()
+        for i in range(int(seconds * FPS)):
+            message = ImageMessage(frame_image(i), redis_time())
+            if on_detections:
+                try:
+                    detector_input.get_nowait()
+                except queue.Empty:
+                    pass
+                detector_input.put(message)
+            t0 = time.monotonic()
+            on_frame(message)
+            blocked["frame"] += time.monotonic() - t0
+            time.sleep(max(0.0, start + (i + 1) / FPS - time.monotonic()))
+        stop.set()
+
+    def detector():
+        while not stop.is_set():
+            try:
+                message = detector_input.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            bboxes = detect_image(message.image, rng)
+            output = BoxesMessage(bboxes, message._timestamp if copy_timestamp else None)
+            t0 = time.monotonic()
+            on_detections(output)
+            blocked["detections"] += time.monotonic() - t0
+
+    threads = [threading.Thread(target=camera), threading.Thread(target=consume, daemon=True)]
+    if on_detections:
+        threads.append(threading.Thread(target=detector, daemon=True))
+    for thread in threads:
+        thread.start()
+    threads[0].join()
+    time.sleep(0.2)
+    return blocked
+
+
+def bench_queues(seconds):
+    imgs_buffer = queue.Queue(maxsize=1)
+    faces_buffer = queue.Queue(maxsize=1)
+    result = {"shown": 0, "mismatched": 0}
+
+    def consume():
+        # Same as ConversationApp._kiosk_run_facedetection before the join
+        while True:
+            img = imgs_buffer.get()
+            faces = faces_buffer.get()
+            result["shown"] += 1
+            result["mismatched"] += faces[0] != img[0, 0]
+            time.sleep(DISPLAY_TIME)
+
+    blocked = run(seconds, lambda message: imgs_buffer.put(message.image), consume,
+                  on_detections=lambda message: faces_buffer.put(message.bboxes))
+    return result, blocked, None
+
+
+def consume_join(join, result):
+    def consume():
+        last_id = 0
+        while True:
+            pair = join.get(last_id, timeout=0.1)
+            if pair is None:
+                continue
+            last_id = pair.pair_id
+            result["shown"] += 1
+            result["mismatched"] += pair.detections[0] != pair.image[0, 0]
+            time.sleep(DISPLAY_TIME)
+    return consume
+
+
+def bench_join_timestamps(seconds, copy_timestamp):
+    join = FrameDetectionJoin()
+    result = {"shown": 0, "mismatched": 0}
+    blocked = run(seconds, join.on_frame, consume_join(join, result),
+                  on_detections=join.on_detections, copy_timestamp=copy_timestamp)
+    return result, blocked, join.stats()
+
+
+def bench_join_requests(seconds):
+    join = FrameDetectionJoin()
+    result = {"shown": 0, "mismatched": 0}
+    rng = random.Random(0)
+    requests = threading.Thread(target=join.run_requests, args=(lambda image: detect_image(image, rng),),
+                                daemon=True)
+    requests.start()
+    blocked = run(seconds, join.on_frame, consume_join(join, result))
+    join.close()
+    return result, blocked, join.stats()
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    runs = (("queues", lambda: bench_queues(seconds)),
+            ("join, component timestamps", lambda: bench_join_timestamps(seconds, copy_timestamp=False)),
+            ("join, service timestamps", lambda: bench_join_timestamps(seconds, copy_timestamp=True)),
+            ("join, requests", lambda: bench_join_requests(seconds)))
+    for name, bench in runs:
+        result, blocked, stats = bench()
+        line = (f"{name:>26}: {result['shown']} pairs shown, {result['mismatched']} with boxes of another frame, "
+                f"camera callback blocked {1000 * blocked['frame']:.0f} ms, "
+                f"detection callback blocked {1000 * blocked['detections']:.0f} ms")
+        if stats:
+            line += f", {stats['unmatched_detections']} unmatched"
+            if "latency_p50_ms" in stats:
+                line += (f", pairing latency p50 {stats['latency_p50_ms']:.0f} ms "
+                         f"p95 {stats['latency_p95_ms']:.0f} ms")
+        print(line)
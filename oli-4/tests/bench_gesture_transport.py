@@ -0,0 +1,59 @@
+"""
+Side-by-side latency of the two gesture classifier transports.
+
+Start the GestureAPI with both transports first (from the project root):
+    python run_GestureAPI.py --transport both
+Then, from oli-4/:
+    python tests/bench_gesture_transport.py
+"""
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from func.gesture import classify_gesture_api, classify_gesture_stream
+
+ROUNDS = 50
+WARMUP = 3
+SAMPLE_LINES = [
+    "Oh no, not the pigeons again. I told you, they are plotting something!",
+    "Well, I think my research on spoon curvature will change the world.",
+    "Fine. You win. But only because my battery is low.",
+    "Hello there! Did you miss me?",
+]
+
+def percentile(values, p):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[index]
+
+def bench(name, classify, labels):
+    for line in SAMPLE_LINES[:WARMUP]:
+        classify(line, labels)
+
+    timings = []
+    for i in range(ROUNDS):
+        text = SAMPLE_LINES[i % len(SAMPLE_LINES)]
+        t0 = time.perf_counter()
+        classify(text, labels)
+        timings.append((time.perf_counter() - t0) * 1000)
+
+    print(f"{name:>6}: mean {statistics.mean(timings):7.1f} ms | "
+          f"p50 {percentile(timings, 50):7.1f} ms | "
+          f"p95 {percentile(timings, 95):7.1f} ms | "
+          f"min {min(timings):7.1f} ms")
+    return timings
+
+if __name__ == "__main__":
+    with open("config/gestures.json", "r") as f:
+        labels = list(json.load(f)["standing"].keys())
+
+    print(f"{ROUNDS} classifications, {len(labels)} labels")
+    http_times = bench("http", classify_gesture_api, labels)
+    stream_times = bench("redis", classify_gesture_stream, labels)
+
+    # Classification cost is identical, so the difference is transport overhead
+    delta = statistics.median(http_times) - statistics.median(stream_times)
+    print(f"median difference (http - redis): {delta:.1f} ms")
@@ -0,0 +1,77 @@
+"""
+Keyframe reduction of recorded motions: compression ratio, max joint error
+and PlayRecording payload size for a few error bounds, and the vectorized
+RDP against a per-joint recursive reference (same keyframes, speed).
+From oli-4/:
+    python tests/bench_motion_keyframes.py [motions]
+"""
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from func.motion_keyframes import keyframe_mask, reduce_recording
+from func.motion_store import MotionClip
+from tests.bench_motion_store import make_recording
+
+ERROR_BOUNDS = (0.005, 0.01, 0.02)  # radians
+
+
+def rdp_reference(times, values, max_error):
+    """Recursive RDP of one joint, vertical error, first worst sample"""
+    keep = np.zeros(len(values), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(values) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        t = (times[start + 1:end] - times[start]) / (times[end] - times[start])
+        line = values[start] + (values[end] - values[start]) * t
+        error = np.abs(values[start + 1:end] - line)
+        worst = int(np.argmax(error))
+        if error[worst] > max_error:
+            split = start + 1 + worst
+            keep[split] = True
+            stack += [(start, split), (split, end)]
+    return keep
+
+
+def payload(recording):
+    return len(pickle.dumps(recording, protocol=2))
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    rng = np.random.default_rng(1)
+    recordings = [make_recording(rng) for _ in range(count)]
+    base_payload = sum(payload(r) for r in recordings)
+    print(f"{count} motions, PlayRecording payload {base_payload / 1e6:.1f} MB")
+
+    for max_error in ERROR_BOUNDS:
+        start = time.perf_counter()
+        results = [reduce_recording(r, max_error=max_error) for r in recordings]
+        elapsed = time.perf_counter() - start
+        before = sum(s["samples_before"] for _, s in results)
+        after = sum(s["samples_after"] for _, s in results)
+        worst = max(s["max_error"] for _, s in results)
+        reduced_payload = sum(payload(r) for r, _ in results)
+        print(f"  max_error {max_error:.3f} rad: {before / after:5.1f}x fewer samples, "
+              f"max joint error {worst:.4f} rad, payload {reduced_payload / 1e6:5.2f} MB "
+              f"({100.0 * reduced_payload / base_payload:4.1f}%), {1000 * elapsed / count:.1f} ms/motion")
+
+    # Same keyframes as the textbook recursion, per joint
+    clips = [MotionClip.from_recording(r) for r in recordings]
+    start = time.perf_counter()
+    masks = [keyframe_mask(c.times, c.angles, 0.01) for c in clips]
+    vectorized = time.perf_counter() - start
+    start = time.perf_counter()
+    reference = [np.stack([rdp_reference(np.asarray(c.times, np.float64), np.asarray(c.angles[:, j], np.float64), 0.01)
+                           for j in range(len(c.joints))], axis=1) for c in clips]
+    recursive = time.perf_counter() - start
+    same = all(np.array_equal(m, r) for m, r in zip(masks, reference))
+    print(f"  vectorized {1000 * vectorized / count:.1f} ms/motion vs recursive "
+          f"{1000 * recursive / count:.1f} ms/motion, identical keyframes: {same}")
@@ -0,0 +1,106 @@
+"""
+Save/load time and disk size of a library of recorded motions: pickled
+recordings (the NaoqiMotionRecording.save format, nested lists per joint)
+vs. MotionClip files in each encoding, with the max. angle error.
+From oli-4/:
+    python tests/bench_motion_store.py [motions]
+"""
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from func.motion_store import ENCODINGS, MotionClip, load_library
+
+BODY_JOINTS = ["HeadYaw", "HeadPitch",
+               "LShoulderPitch", "LShoulderRoll", "LElbowYaw", "LElbowRoll", "LWristYaw", "LHand",
+               "LHipYawPitch", "LHipRoll", "LHipPitch", "LKneePitch", "LAnklePitch", "LAnkleRoll",
+               "RHipYawPitch", "RHipRoll", "RHipPitch", "RKneePitch", "RAnklePitch", "RAnkleRoll",
+               "RShoulderPitch", "RShoulderRoll", "RElbowYaw", "RElbowRoll", "RWristYaw", "RHand"]
+SAMPLES_PER_SECOND = 20
+
+
+class Recording:
+    """The fields of NaoqiMotionRecording, pickled the way SICMessage.serialize pickles lists"""
+
+    def __init__(self, recorded_joints, recorded_angles, recorded_times):
+        self.recorded_joints = recorded_joints
+        self.recorded_angles = recorded_angles
+        self.recorded_times = recorded_times
+
+
+def make_recording(rng):
+    """10-60 s of smooth motion of all body joints, sampled like the motion recorder"""
+    seconds = rng.uniform(10, 60)
+    t = np.arange(0, seconds, 1.0 / SAMPLES_PER_SECOND)
+    t = t + rng.uniform(0, 0.004, len(t))  # sampling jitter
+    freqs = rng.uniform(0.1, 1.0, (len(BODY_JOINTS), 3))
+    phases = rng.uniform(0, 2 * np.pi, (len(BODY_JOINTS), 3))
+    angles = (0.4 * np.sin(2 * np.pi * freqs[:, :, None] * t + phases[:, :, None])).sum(axis=1)
+    angles = angles + rng.normal(0, 0.002, angles.shape)  # sensor noise
+    return Recording(list(BODY_JOINTS), angles.tolist(), [t.tolist() for _ in BODY_JOINTS])
+
+
+def dir_size(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    rng = np.random.default_rng(0)
+    recordings = [make_recording(rng) for _ in range(count)]
+    samples = sum(len(r.recorded_times[0]) for r in recordings)
+    print(f"{count} motions, {len(BODY_JOINTS)} joints, {samples} samples "
+          f"({samples / SAMPLES_PER_SECOND / 60:.0f} min)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_dir = os.path.join(tmp, "pickle")
+        os.makedirs(pickle_dir)
+
+        def save_pickles():
+            for i, recording in enumerate(recordings):
+                with open(os.path.join(pickle_dir, f"{i}.motion"), "wb") as f:
+                    f.write(pickle.dumps(recording, protocol=2))
+
+        def load_pickles():
+            loaded = []
+            for name in os.listdir(pickle_dir):
+                with open(os.path.join(pickle_dir, name), "rb") as f:
+                    loaded.append(pickle.loads(f.read()))
+            return loaded
+
+        _, save_time = timed(save_pickles)
+        _, load_time = timed(load_pickles)
+        base_size = dir_size(pickle_dir)
+        print(f"  {'pickle':>12}: save {1000 * save_time:7.1f} ms, load {1000 * load_time:7.1f} ms, "
+              f"{base_size / 1e6:6.2f} MB")
+
+        clips, _ = timed(lambda: [MotionClip.from_recording(r) for r in recordings])
+        reference = [np.asarray(c.angles) for c in clips]
+        for encoding in ENCODINGS:
+            for mmap in ((True, False) if encoding != "delta" else (False,)):
+                clip_dir = os.path.join(tmp, encoding)
+                if not os.path.isdir(clip_dir):
+                    os.makedirs(clip_dir)
+                    _, save_time = timed(lambda: [c.save(os.path.join(clip_dir, f"{i}.mrec"), encoding=encoding)
+                                                  for i, c in enumerate(clips)])
+                library, load_time = timed(lambda: load_library(clip_dir, mmap=mmap))
+                # Touch every angle, so lazily mapped/scaled data is included
+                loaded = [library[str(i)] for i in range(count)]
+                error, touch_time = timed(lambda: max(float(np.abs(c.angles - ref).max())
+                                                      for c, ref in zip(loaded, reference)))
+                size = dir_size(clip_dir)
+                label = f"{encoding}{' mmap' if mmap else ''}"
+                print(f"  {label:>12}: save {1000 * save_time:7.1f} ms, load {1000 * load_time:7.1f} ms "
+                      f"(+{1000 * touch_time:6.1f} ms reading all angles), {size / 1e6:6.2f} MB "
+                      f"({100.0 * size / base_size:4.1f}%), max error {error:.1e} rad")
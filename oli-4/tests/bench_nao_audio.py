@@ -0,0 +1,106 @@
+"""
+Whole-file vs. chunked streaming playback of a long WAV file on the
+simulated NAO speaker: time-to-first-sound and peak RSS. Each mode runs in
+its own process so ru_maxrss is not shared. The streaming run is cancelled
+after a few seconds, its memory use does not grow with the file length.
+From oli-4/:
+    python tests/bench_nao_audio.py [minutes]
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from func.audio_stream import StreamingAudioSender
+from func.sim_nao import SimulatedNao
+
+SAMPLE_RATE = 16000
+STREAM_SECONDS = 3.0
+
+
+class AudioRequest:
+    """Same fields as the SIC AudioRequest, which is what the simulator looks at"""
+
+    def __init__(self, waveform, sample_rate):
+        self.waveform = waveform
+        self.sample_rate = sample_rate
+
+
+def write_wav(path, minutes):
+    """Mono 16-bit tone, written one second at a time"""
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    second = (8000 * np.sin(2 * np.pi * 440 * t)).astype("<i2").tobytes()
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        for _ in range(int(minutes * 60)):
+            f.writeframes(second)
+
+
+def first_sound(nao, t0):
+    """Seconds from t0 until the first request has been transferred (simulated)"""
+    record = nao.records[0]
+    model = nao.latency["AudioRequest"]
+    transfer = model["base"] + model["per_byte"] * len(record.request.waveform)
+    return record.start - t0 + transfer
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run_whole(path):
+    nao = SimulatedNao(time_scale=0)
+    baseline = peak_rss_mb()
+    t0 = time.perf_counter()
+    # Same as demo_nao_speakers.py before streaming
+    wavefile = wave.open(path, "rb")
+    sound = wavefile.readframes(wavefile.getnframes())
+    nao.speaker.request(AudioRequest(sound, wavefile.getframerate()))
+    wavefile.close()
+    return {"first_sound": first_sound(nao, t0), "rss_mb": peak_rss_mb() - baseline,
+            "requests": len(nao.records)}
+
+
+def run_stream(path):
+    nao = SimulatedNao(time_scale=0)
+    sender = StreamingAudioSender(nao.speaker, chunk_seconds=0.5, max_ahead=2,
+                                  make_request=AudioRequest)
+    cancel = threading.Event()
+    threading.Timer(STREAM_SECONDS, cancel.set).start()
+    baseline = peak_rss_mb()
+    t0 = time.perf_counter()
+    stats = sender.send_wav(path, cancel_event=cancel)
+    return {"first_sound": first_sound(nao, t0), "rss_mb": peak_rss_mb() - baseline,
+            "requests": len(nao.records), "audio_sent": stats["chunks"] * sender.chunk_seconds}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] in ("whole", "stream"):
+        mode, path = sys.argv[1], sys.argv[2]
+        print(json.dumps(run_whole(path) if mode == "whole" else run_stream(path)))
+        sys.exit(0)
+
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "long.wav")
+        write_wav(path, minutes)
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"{minutes:.0f} min mono 16 kHz WAV ({size_mb:.1f} MB)")
+        for mode in ("whole", "stream"):
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), mode, path],
+                                 capture_output=True, text=True, check=True).stdout
+            result = json.loads(out)
+            extra = f", {result['audio_sent']:.1f} s of audio sent in {STREAM_SECONDS:.0f} s" \
+                if mode == "stream" else ""
+            print(f"  {mode:>6}: first sound after {1000 * result['first_sound']:7.1f} ms, "
+                  f"peak RSS +{result['rss_mb']:6.1f} MB, {result['requests']} requests{extra}")
@@ -0,0 +1,139 @@
+"""
+Reaction time from a face appearing to the greeting: the old kiosk loop
+(sees_face flag polled every 100 ms, never reset; and a variant that resets
+it per visit) vs. PresenceDetector events. Face detection results arrive at 30 Hz with missed detections and
+the occasional false positive; visitors come and go.
+From oli-4/:
+    python tests/bench_presence.py [visits]
+"""
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from func.presence import PresenceDetector
+
+RESULT_RATE = 30
+MISS_RATE = 0.1           # frames where a present face is not detected
+FALSE_POSITIVE_RATE = 0.01
+VISIT = (0.6, 1.0)        # seconds in front of the kiosk
+GAP = (0.6, 1.0)          # seconds between visitors
+
+
+class BBox:
+    def __init__(self, w):
+        self.w = w
+
+
+def detections(visits, seed=0):
+    """(timestamp offset, bboxes, visitor index or None) at RESULT_RATE"""
+    rng = random.Random(seed)
+    schedule, t = [], 0.3
+    for _ in range(visits):
+        arrive = t + rng.uniform(0, 1.0 / RESULT_RATE)
+        leave = arrive + rng.uniform(*VISIT)
+        schedule.append((arrive, leave))
+        t = leave + rng.uniform(*GAP)
+    results, frame = [], 0
+    while frame / RESULT_RATE < t:
+        now = frame / RESULT_RATE
+        visitor = next((i for i, (a, l) in enumerate(schedule) if a <= now < l), None)
+        seen = rng.random() > MISS_RATE if visitor is not None else rng.random() < FALSE_POSITIVE_RATE
+        results.append((now, [BBox(200)] if seen else [], visitor))
+        frame += 1
+    return schedule, results
+
+
+def feed(results, on_result, stop, start):
+    for offset, bboxes, _ in results:
+        time.sleep(max(0.0, start + offset - time.monotonic()))
+        on_result(bboxes, start + offset)
+    time.sleep(0.2)
+    stop.set()
+    return start
+
+
+def reaction_times(schedule, start, greetings):
+    """Greeting delay after the arrival of each visitor (first greeting per visit), false greetings"""
+    reactions, false_greetings, greeted = [], 0, set()
+    for t in greetings:
+        visit = next((i for i, (a, l) in enumerate(schedule) if start + a <= t <= start + l + 0.2), None)
+        if visit is None:
+            false_greetings += 1
+        elif visit not in greeted:
+            greeted.add(visit)
+            reactions.append(t - (start + schedule[visit][0]))
+    return reactions, false_greetings
+
+
+def bench_polling(schedule, results, reset_per_visit):
+    """
+    The old loop: any face sets sees_face, the dialog loop checks it every 100 ms.
+    sees_face is never reset, so only the first visitor is greeted; with
+    reset_per_visit it is cleared when a visitor leaves (ground truth), to
+    compare reaction times per visit.
+    """
+    state = {"sees_face": False, "greeted": False}
+    greetings, wakeups = [], [0]
+    stop = threading.Event()
+
+    def on_result(bboxes, t):
+        if bboxes:
+            state["sees_face"] = True
+        elif reset_per_visit and state["greeted"] and not any(
+                start_ + a <= t < start_ + l for a, l in schedule):
+            state["sees_face"] = state["greeted"] = False
+
+    def dialog():
+        while not stop.is_set():
+            wakeups[0] += 1
+            if state["sees_face"] and not state["greeted"]:
+                greetings.append(time.monotonic())
+                state["greeted"] = True
+            time.sleep(0.1)
+
+    start_ = time.monotonic()
+    thread = threading.Thread(target=dialog)
+    thread.start()
+    start = feed(results, on_result, stop, start_)
+    thread.join()
+    return reaction_times(schedule, start, greetings) + (len(greetings), wakeups[0])
+
+
+def bench_events(schedule, results):
+    presence = PresenceDetector(enter_count=2, leave_count=10)
+    greetings, wakeups = [], [0]
+    stop = threading.Event()
+
+    def dialog():
+        while not stop.is_set():
+            wakeups[0] += 1
+            if not presence.wait_present(timeout=1.0):
+                continue
+            greetings.append(time.monotonic())
+            while not presence.wait_absent(timeout=1.0) and not stop.is_set():
+                wakeups[0] += 1
+
+    thread = threading.Thread(target=dialog)
+    thread.start()
+    start = feed(results, presence.update, stop, time.monotonic())
+    thread.join()
+    return reaction_times(schedule, start, greetings) + (len(greetings), wakeups[0])
+
+
+if __name__ == "__main__":
+    visits = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    schedule, results = detections(visits)
+    print(f"{visits} visitors, {len(results)} face detection results at {RESULT_RATE} Hz")
+    runs = (("polling", lambda: bench_polling(schedule, results, False)),
+            ("polling, reset per visit", lambda: bench_polling(schedule, results, True)),
+            ("events", lambda: bench_events(schedule, results)))
+    for name, bench in runs:
+        reactions, false_greetings, greetings, wakeups = bench()
+        summary = (f"reaction mean {1000 * statistics.mean(reactions):.0f} ms, max {1000 * max(reactions):.0f} ms"
+                   if reactions else "no greeting")
+        print(f"{name:>24}: {len(reactions)}/{visits} visitors greeted, {summary}, "
+              f"{false_greetings} false greetings, {wakeups} dialog loop wakeups")
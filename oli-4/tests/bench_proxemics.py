@@ -0,0 +1,159 @@
+"""
+Command rate and settling time of the proxemics controller versus the old
+bang-bang loop of test_proxemics.py (run_bang_bang), against a simulated tracker.
+Runs on simulated time, no robot needed. From oli-4/:
+    python tests/bench_proxemics.py
+"""
+import math
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from func.face_filter import FaceTrackFilter
+from func.proxemics import ProxemicsController
+
+SIM_SECONDS = 30.0
+REQUEST_LATENCY = 0.02     # round trip of one motion request
+MOVE_TO_SECONDS = 1.0      # NaoqiMoveToRequest of 10 cm blocks this long
+TRACKER_HZ = 10.0
+FACE_SIZE_AT_1M = 0.2      # tracker face size at 1 m, i.e. the target distance
+SIZE_NOISE = 0.015
+ALPHA_NOISE = 0.05
+SETTLE_HOLD = 2.0          # must stay in the comfort zone this long
+
+
+class TrackerState:
+    def __init__(self, w, alpha):
+        self.w = w
+        self.alpha = alpha
+
+
+class SimulatedWorld:
+    """Person standing still, robot integrating velocity commands"""
+
+    def __init__(self, seed=0):
+        self.rng = random.Random(seed)
+        self.person = (2.0, 1.2)
+        self.x, self.y, self.heading = 0.0, 0.0, 0.0
+        self.velocity = (0.0, 0.0, 0.0)
+        self.t = 0.0
+        self.commands = 0
+        self.in_zone_since = None
+        self.settled_at = None
+
+    def distance_and_bearing(self):
+        dx, dy = self.person[0] - self.x, self.person[1] - self.y
+        bearing = math.atan2(dy, dx) - self.heading
+        bearing = math.atan2(math.sin(bearing), math.cos(bearing))
+        return math.hypot(dx, dy), bearing
+
+    def tracker_state(self):
+        distance, bearing = self.distance_and_bearing()
+        if abs(bearing) > 0.9:
+            return None   # out of the camera's field of view
+        # Tracker alpha has the opposite sign of the bearing (see the
+        # original loop: positive alpha -> negative theta)
+        return TrackerState(
+            FACE_SIZE_AT_1M / distance + self.rng.gauss(0, SIZE_NOISE),
+            -bearing + self.rng.gauss(0, ALPHA_NOISE))
+
+    def advance(self, dt):
+        steps = max(1, int(dt / 0.01))
+        for _ in range(steps):
+            h = dt / steps
+            vx, vy, vtheta = self.velocity
+            self.x += (vx * math.cos(self.heading) - vy * math.sin(self.heading)) * h
+            self.y += (vx * math.sin(self.heading) + vy * math.cos(self.heading)) * h
+            self.heading += vtheta * h
+            self.t += h
+            self._check_settled()
+
+    def move(self, x, y, theta):
+        self.commands += 1
+        self.velocity = (x, y, theta)
+        self.advance(REQUEST_LATENCY)
+
+    def move_to(self, dx):
+        self.commands += 1
+        self.velocity = (dx / MOVE_TO_SECONDS, 0.0, 0.0)
+        self.advance(MOVE_TO_SECONDS)
+        self.velocity = (0.0, 0.0, 0.0)
+
+    def _check_settled(self):
+        distance, bearing = self.distance_and_bearing()
+        if abs(distance - 1.0) < 0.15 and abs(bearing) < 0.15:
+            if self.in_zone_since is None:
+                self.in_zone_since = self.t
+            if self.settled_at is None and self.t - self.in_zone_since >= SETTLE_HOLD:
+                self.settled_at = self.in_zone_since
+        else:
+            self.in_zone_since = None
+            self.settled_at = None
+
+
+def run_bang_bang(world):
+    """The polling loop test_proxemics.py used before ProxemicsController"""
+    while world.t < SIM_SECONDS:
+        state = world.tracker_state()
+        if state is None:
+            world.move(0.0, 0.0, 0.3)
+            world.advance(0.3)
+            world.move(0.0, 0.0, 0.0)
+            world.advance(0.1)
+            continue
+
+        if state.w < 0.15:
+            world.move_to(+0.10)
+        elif state.w > 0.30:
+            world.move_to(-0.10)
+        else:
+            world.move(0, 0, 0)
+
+        for limit, turn in ((0.3, -0.3), (0.15, -0.15)):
+            if state.alpha > limit:
+                world.move(0.0, 0, turn)
+                world.advance(0.1)
+                world.move(0.0, 0.0, 0.0)
+                break
+            if state.alpha < -limit:
+                world.move(0.0, 0, -turn)
+                world.advance(0.1)
+                world.move(0.0, 0.0, 0.0)
+                break
+        else:
+            world.move(0, 0, 0)
+
+
+def run_controller(world, rate_hz=10.0, face_filter=None):
+    controller = ProxemicsController(world.move, rate_hz=rate_hz, face_filter=face_filter)
+    next_sample = 0.0
+    while world.t < SIM_SECONDS:
+        if world.t >= next_sample:
+            state = world.tracker_state()
+            if state is not None:
+                controller.latest.set(state, timestamp=world.t)
+            next_sample += 1.0 / TRACKER_HZ
+        controller.step(now=world.t)
+        world.advance(1.0 / rate_hz)
+
+
+def report(name, world):
+    settled = f"{world.settled_at:5.1f} s" if world.settled_at is not None else "never"
+    print(f"{name:>12}: {world.commands:5d} commands ({world.commands / SIM_SECONDS:6.1f}/s), "
+          f"settled after {settled}")
+
+
+if __name__ == "__main__":
+    print(f"{SIM_SECONDS:.0f} s simulated, person at 2.3 m, 30 deg off-centre")
+    for seed in range(3):
+        print(f"seed {seed}")
+        world = SimulatedWorld(seed)
+        run_bang_bang(world)
+        report("bang-bang", world)
+        world = SimulatedWorld(seed)
+        run_controller(world)
+        report("controller", world)
+        world = SimulatedWorld(seed)
+        run_controller(world, face_filter=FaceTrackFilter())
+        report("+ kalman", world)
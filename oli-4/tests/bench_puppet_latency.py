@@ -0,0 +1,97 @@
+"""
+End-to-end latency, jitter and dropped samples of the puppeteering stream
+over simulated network setups: a master thread samples at the streamer rate,
+a link adds latency (in order, like Redis over TCP) and loss, a puppet thread
+applies each sample (setAngles cost). Results go to JSON for regression
+tracking. From oli-4/:
+    python tests/bench_puppet_latency.py [--seconds 5] [--adaptive] [--out results/puppet_latency.json]
+"""
+import argparse
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from func.puppet_stream import AdaptiveJointStream
+from func.stream_probe import LatencyProbe, format_report
+from tests.bench_puppet_stream import JOINTS, master_angles
+
+# One-way latency base + uniform jitter (s), loss probability
+NETWORKS = {
+    "wired": {"base": 0.004, "jitter": 0.002, "loss": 0.0},
+    "wifi": {"base": 0.012, "jitter": 0.015, "loss": 0.005},
+    "congested_wifi": {"base": 0.030, "jitter": 0.060, "loss": 0.03},
+}
+APPLY_COST = 0.002  # setAngles on the puppet
+
+
+def run_session(network, seconds, rate, adaptive, seed=0):
+    rng = random.Random(seed)
+    link = queue.Queue()
+    probe = LatencyProbe(expected_interval=1.0 / rate)
+    stream = AdaptiveJointStream() if adaptive else None
+    done = threading.Event()
+
+    def master():
+        start = time.monotonic()
+        last_delivery = 0.0
+        tick = 0
+        while True:
+            now = time.monotonic()
+            if now - start >= seconds:
+                break
+            angles = master_angles([now - start])[0]
+            update = stream.update(JOINTS, angles, now=now) if stream else (JOINTS, angles)
+            if update is not None:
+                seq = probe.sent(t=now)
+                if rng.random() >= network["loss"]:
+                    last_delivery = max(last_delivery, now + network["base"] + rng.uniform(0, network["jitter"]))
+                    link.put((seq, last_delivery))
+            tick += 1
+            time.sleep(max(0.0, start + tick / rate - time.monotonic()))
+        done.set()
+
+    def puppet():
+        while not (done.is_set() and link.empty()):
+            try:
+                seq, delivery = link.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            time.sleep(max(0.0, delivery - time.monotonic()))
+            time.sleep(APPLY_COST)
+            probe.applied(seq)
+
+    threads = [threading.Thread(target=master), threading.Thread(target=puppet)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return probe
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rate", type=float, default=30.0, help="master samples per second")
+    parser.add_argument("--adaptive", action="store_true", help="send through AdaptiveJointStream")
+    parser.add_argument("--out", default=None, help="JSON file with all sessions")
+    args = parser.parse_args()
+
+    results = {}
+    for name, network in NETWORKS.items():
+        probe = run_session(network, args.seconds, args.rate, args.adaptive)
+        results[name] = dict(network=network, report=probe.report(final=True))
+        print(f"{name:>15}: {format_report(results[name]['report'])}")
+
+    if args.out:
+        directory = os.path.dirname(args.out)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"created": time.time(), "rate": args.rate, "adaptive": args.adaptive,
+                       "seconds": args.seconds, "sessions": results}, f, indent=2)
+        print(f"written to {args.out}")
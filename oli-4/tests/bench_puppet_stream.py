@@ -0,0 +1,105 @@
+"""
+Puppeteering stream: the fixed 30 Hz full-vector stream vs. the adaptive
+deadband stream, on a simulated master motion (idle, slow and fast parts)
+and a simulated network. Reports messages/s, joint values/s, end-to-end lag
+(time shift that best aligns puppet and master) and tracking error.
+From oli-4/:
+    python tests/bench_puppet_stream.py
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from func.puppet_stream import AdaptiveJointStream, JointInterpolator
+
+JOINTS = ["HeadYaw", "HeadPitch",
+          "RShoulderPitch", "RShoulderRoll", "RElbowYaw", "RElbowRoll", "RWristYaw", "RHand",
+          "LShoulderPitch", "LShoulderRoll", "LElbowYaw", "LElbowRoll", "LWristYaw", "LHand"]
+DURATION = 30.0
+TICK = 0.001
+# (start, end) in seconds of slow and fast motion, idle otherwise
+SLOW = [(3.0, 8.0), (20.0, 24.0)]
+FAST = [(10.0, 14.0), (25.0, 27.0)]
+NET_BASE, NET_JITTER = 0.015, 0.010
+
+
+def envelope(t, spans, ramp=0.5):
+    env = np.zeros_like(t)
+    for start, end in spans:
+        env = np.maximum(env, np.clip(np.minimum(t - start, end - t) / ramp, 0.0, 1.0))
+    return env
+
+
+def master_angles(t):
+    """(len(t), joints) master trajectory"""
+    rng = np.random.default_rng(3)
+    phases = rng.uniform(0, 2 * np.pi, len(JOINTS))
+    t = np.asarray(t, dtype=np.float64)[:, None]
+    slow = envelope(t, SLOW) * 0.3 * np.sin(2 * np.pi * 0.3 * t + phases)
+    fast = envelope(t, FAST) * 0.5 * np.sin(2 * np.pi * 1.2 * t + phases)
+    noise = rng.normal(0, 0.001, (len(t), len(JOINTS)))  # sensor noise of a still joint
+    return slow + fast + noise
+
+
+def simulate(sample_rate, encode, rng):
+    """Run master sampling -> encode -> network -> interpolator, returns puppet angles per tick"""
+    ticks = np.arange(0.0, DURATION, TICK)
+    sample_times = np.arange(0.0, DURATION, 1.0 / sample_rate)
+    samples = master_angles(sample_times)
+
+    deliveries = []
+    last_arrival = 0.0
+    messages = values = 0
+    for t, angles in zip(sample_times, samples):
+        out = encode(t, angles)
+        if out is None:
+            continue
+        joints, sent, duration = out
+        last_arrival = max(last_arrival, t + NET_BASE + rng.uniform(0, NET_JITTER))
+        deliveries.append((last_arrival, joints, sent, duration))
+        messages += 1
+        values += len(joints)
+
+    receiver = JointInterpolator()
+    puppet = np.zeros((len(ticks), len(JOINTS)))
+    d = 0
+    for i, now in enumerate(ticks):
+        while d < len(deliveries) and deliveries[d][0] <= now:
+            _, joints, sent, duration = deliveries[d]
+            receiver.receive(joints, sent, duration, now=now)
+            d += 1
+        if receiver.joints:
+            names, current = receiver.sample(now)
+            puppet[i, [JOINTS.index(name) for name in names]] = current
+    return ticks, puppet, messages, values
+
+
+def lag_and_error(ticks, puppet):
+    """Best-aligning delay of the puppet behind the master, and the tracking error without shifting"""
+    master = master_angles(ticks)
+    moving = envelope(ticks, SLOW + FAST) > 0
+    shifts = np.arange(0, 300)
+    errors = [np.abs(puppet[shift:][moving[:len(ticks) - shift]] -
+                     master[:len(ticks) - shift][moving[:len(ticks) - shift]]).mean() for shift in shifts]
+    lag = shifts[int(np.argmin(errors))] * TICK
+    tracking = np.abs(puppet - master)
+    return lag, tracking.mean(), tracking.max()
+
+
+if __name__ == "__main__":
+    def fixed(t, angles):
+        return JOINTS, angles.tolist(), 1.0 / 30
+
+    stream = AdaptiveJointStream(deadband=0.01, min_rate=5.0, max_rate=50.0)
+
+    def adaptive(t, angles):
+        out = stream.update(JOINTS, angles, now=t)
+        return None if out is None else out + (stream.interval,)
+
+    for name, rate, encode in (("fixed 30 Hz", 30, fixed), ("adaptive", 50, adaptive)):
+        ticks, puppet, messages, values = simulate(rate, encode, np.random.default_rng(0))
+        lag, mean_error, max_error = lag_and_error(ticks, puppet)
+        print(f"{name:>12}: {messages / DURATION:5.1f} msg/s, {values / DURATION:6.1f} joint values/s, "
+              f"lag {1000 * lag:5.1f} ms, tracking error mean {mean_error:.4f} max {max_error:.3f} rad")
@@ -0,0 +1,105 @@
+"""
+Load-test a dialog scene of main.py on the simulated NAO, so it runs on any
+machine without a robot: Oli4v4Demo is built as in tests/test_main_smoke.py
+and its real run_scene (prefetch, stiffness and tracker setup, opener
+animation, LEDs, gesture thread, speech, logging) is driven for N turns.
+Only the parts that need people or the network are stubbed: speech input
+(streaming_stt), Gemini (ask_gemini, simulated latency and failures, which
+take the fallback line path) and the gesture classifier. Needs the Redis
+server like every SIC application.
+From oli-4/:
+    python tests/bench_scene_pipeline.py [turns] [time_scale]
+"""
+import os
+import random
+import shutil
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from func.sim_nao import SimulatedNao
+from tests.test_main_smoke import make_demo
+
+from sic_framework.core import sic_logging
+
+USER_TEXTS = [
+    "Can you tell me about your research?",
+    "Why are you so obsessed with pigeons?",
+    "What did you do on our anniversary?",
+    "Are you upset with me?",
+]
+REPLIES = [
+    "Oh, you want to talk about the pigeons? Fine. But they started it.",
+    "My research on spoon curvature is very important. Nobody listens!",
+    "I am not upset. My fans are just spinning faster than usual.",
+    "Okay. Maybe I forgot our anniversary. But I remembered the date of every firmware update!",
+]
+GEMINI_LATENCY = (1.0, 3.0)   # seconds, before time_scale
+GEMINI_FAILURE_RATE = 0.1     # no reply in budget -> fallback line
+CLASSIFY_LATENCY = 0.15
+
+
+def stub_inputs(demo, turns, stopword, time_scale, rng):
+    """Replace speech input, Gemini and the classifier; returns the start time of every turn"""
+    texts = [USER_TEXTS[i % len(USER_TEXTS)] for i in range(turns - 1)]
+    texts.append(f"Let's talk about {stopword} now")
+    inputs = iter(texts)
+    turn_starts = []
+    counts = {"fallback": 0}
+
+    def streaming_stt():
+        turn_starts.append(time.perf_counter())
+        return next(inputs)
+
+    def ask_gemini(messages, model=None):
+        time.sleep(rng.uniform(*GEMINI_LATENCY) * time_scale)
+        if rng.random() < GEMINI_FAILURE_RATE:
+            counts["fallback"] += 1
+            return None
+        return rng.choice(REPLIES)
+
+    def classify_gesture(text, labels):
+        time.sleep(CLASSIFY_LATENCY * time_scale)
+        return rng.choice(labels)
+
+    demo.streaming_stt = streaming_stt
+    demo.ask_gemini = ask_gemini
+    demo.classify_gesture = classify_gesture
+    # Bound at construction; no Gemini model or warm-up without the network
+    demo.prefetcher.classify = classify_gesture
+    demo.prefetcher.make_model = None
+    demo.prefetcher.warm_up = None
+    return turn_starts, counts
+
+
+if __name__ == "__main__":
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    time_scale = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    rng = random.Random(1)
+
+    demo, workdir = make_demo()
+    demo.set_log_level(sic_logging.WARNING)
+    demo.nao = SimulatedNao(seed=1, time_scale=time_scale,
+                            faults={"NaoqiTextToSpeechRequest": {"error_rate": 0.05}})
+
+    step = next(step for step in demo.show.sequence() if step.type == "dialog")
+    gestures, gesture_colors = demo.gesture_sets[step.gestures]
+    stopword = demo.scene_prompts[step.scene]["stopword"]
+    turn_starts, counts = stub_inputs(demo, turns, stopword, time_scale, rng)
+
+    # As during the preceding break scene
+    demo.prefetcher.prefetch(step.scene, gestures, gesture_colors)
+    t0 = time.perf_counter()
+    demo.run_scene(step.scene, gestures, gesture_colors)
+    end = time.perf_counter()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    setup_time = (turn_starts[0] - t0) / time_scale
+    turn_times = [(b - a) / time_scale for a, b in zip(turn_starts, turn_starts[1:] + [end])]
+    print(f"scene {step.scene}: {turns} turns (time scale {time_scale}), {counts['fallback']} fallback lines")
+    print(f"  setup + opener {setup_time:.2f}s, time per turn: "
+          f"mean {statistics.mean(turn_times):.2f}s, max {max(turn_times):.2f}s")
+    for request_type, stats in sorted(demo.nao.summary().items()):
+        print(f"  {request_type:>26}: {stats['count']:4d} requests, "
+              f"mean {stats['mean']:.2f}s, {stats['errors']} errors")
@@ -0,0 +1,141 @@
+"""
+End-to-end frame latency from a camera-like producer process to a consumer
+process: shared-memory frame ring vs. multiprocessing.Queue (pickle).
+The ring is read by a multiprocessing child and by a standalone reader
+started with subprocess, like a separate detection process attaching by
+name; afterwards the ring must still be attachable (the reader's exit must
+not unlink it).
+From oli-4/:
+    python tests/bench_shm_frames.py [seconds] [fps] [width] [height]
+"""
+import json
+import multiprocessing as mp
+import os
+import queue
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from func.shm_frames import SharedFrameRing
+
+
+def produce(put, seconds, fps, shape):
+    """Publish `fps` frames per second for `seconds`, stamped just before sending"""
+    frames = [np.random.default_rng(i).integers(0, 255, shape, dtype=np.uint8) for i in range(4)]
+    period = 1.0 / fps
+    next_tick = time.monotonic()
+    for i in range(int(seconds * fps)):
+        put(frames[i % len(frames)], i + 1, time.monotonic())
+        next_tick += period
+        time.sleep(max(0.0, next_tick - time.monotonic()))
+
+
+def ring_producer(name, seconds, fps, shape):
+    ring = SharedFrameRing(name)
+    produce(lambda img, frame_id, ts: ring.put(img, frame_id=frame_id, timestamp=ts),
+            seconds, fps, shape)
+    ring.close()
+
+
+def queue_producer(q, seconds, fps, shape):
+    produce(lambda img, frame_id, ts: q.put((frame_id, ts, img)), seconds, fps, shape)
+    q.put(None)
+
+
+def consume_ring(ring, producer, process_time):
+    latencies, last_id = [], 0
+    while producer.is_alive() or ring.get(last_id, copy=False) is not None:
+        frame = ring.wait(last_id, timeout=0.1)
+        if frame is None:
+            continue
+        latencies.append(time.monotonic() - frame.timestamp)
+        last_id = frame.frame_id
+        time.sleep(process_time)
+    return latencies, last_id
+
+
+def reader_main(name, process_time, idle_timeout=1.0):
+    """Standalone reader process: read until no new frame for `idle_timeout`, print JSON"""
+    ring = SharedFrameRing(name)
+    latencies, last_id = [], 0
+    while True:
+        frame = ring.wait(last_id, timeout=idle_timeout)
+        if frame is None:
+            break
+        latencies.append(time.monotonic() - frame.timestamp)
+        last_id = frame.frame_id
+        time.sleep(process_time)
+    ring.close()
+    print(json.dumps({"latencies": latencies, "last_id": last_id}))
+
+
+def consume_queue(q, process_time):
+    latencies, last_id = [], 0
+    while True:
+        try:
+            item = q.get(timeout=1.0)
+        except queue.Empty:
+            break
+        if item is None:
+            break
+        last_id, ts, img = item
+        latencies.append(time.monotonic() - ts)
+        time.sleep(process_time)
+    return latencies, last_id
+
+
+def report(name, latencies, last_id):
+    ms = sorted(1000 * v for v in latencies)
+    print(f"  {name:>10}: {len(ms):4d}/{last_id} frames read, latency median {statistics.median(ms):7.2f} ms,"
+          f" p95 {ms[int(0.95 * (len(ms) - 1))]:7.2f} ms, max {ms[-1]:7.2f} ms")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--reader"]:
+        reader_main(sys.argv[2], float(sys.argv[3]), float(sys.argv[4]))
+        sys.exit(0)
+
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    fps = float(sys.argv[2]) if len(sys.argv) > 2 else 30.0
+    width = int(sys.argv[3]) if len(sys.argv) > 3 else 640
+    height = int(sys.argv[4]) if len(sys.argv) > 4 else 480
+    shape = (height, width, 3)
+
+    for process_time in (0.0, 0.05):
+        print(f"{width}x{height} at {fps:.0f} fps for {seconds:.0f} s, consumer work {1000 * process_time:.0f} ms/frame")
+
+        ring = SharedFrameRing(create=True, slots=4, max_bytes=width * height * 3)
+        producer = mp.Process(target=ring_producer, args=(ring.name, seconds, fps, shape))
+        producer.start()
+        report("shm", *consume_ring(ring, producer, process_time))
+        producer.join()
+        ring.close()
+
+        # Standalone reader on a fresh ring, attached before the producer starts
+        ring = SharedFrameRing(create=True, slots=4, max_bytes=width * height * 3)
+        reader = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--reader", ring.name,
+                                   str(process_time), "1.0"], stdout=subprocess.PIPE, text=True)
+        time.sleep(0.5)
+        producer = mp.Process(target=ring_producer, args=(ring.name, seconds, fps, shape))
+        producer.start()
+        output, _ = reader.communicate()
+        producer.join()
+        if reader.returncode:
+            raise SystemExit(f"standalone reader failed with exit code {reader.returncode}")
+        result = json.loads(output)
+        report("subprocess", result["latencies"], result["last_id"])
+        # A second standalone reader can only attach if the first one left the ring alone
+        check = subprocess.run([sys.executable, os.path.abspath(__file__), "--reader", ring.name, "0", "0.01"],
+                               capture_output=True, text=True)
+        print(f"  ring still attachable after the reader exited: {check.returncode == 0}")
+        ring.close()
+
+        q = mp.Queue()
+        producer = mp.Process(target=queue_producer, args=(q, seconds, fps, shape))
+        producer.start()
+        report("queue", *consume_queue(q, process_time))
+        producer.join()
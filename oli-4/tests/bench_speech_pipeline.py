@@ -0,0 +1,58 @@
+"""
+Time to first audio and total speaking time of a multi-sentence reply:
+synchronous synthesis of the whole reply vs. the sentence pipeline, with a
+simulated TTS service (fixed overhead + per-character cost) and speakers.
+From oli-4/:
+    python tests/bench_speech_pipeline.py [time_scale]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from func.speech_pipeline import SpeechPipeline
+
+SAMPLE_RATE = 24000
+TTS_OVERHEAD = 0.35      # request round trip, seconds
+TTS_PER_CHAR = 0.004     # synthesis time per character
+SPEECH_PER_CHAR = 0.065  # spoken duration per character
+
+REPLIES = [
+    "Oh, painting! That is a wonderful hobby. It lets you express yourself in colours and shapes. "
+    "What do you like to paint the most? Landscapes, people, or something abstract?",
+    "Cycling is great fun. You get fresh air and exercise at the same time. "
+    "Do you ride mostly in the city, or do you prefer long tours in the countryside?",
+]
+
+
+def make_service(time_scale):
+    def synthesize(text):
+        time.sleep((TTS_OVERHEAD + TTS_PER_CHAR * len(text)) * time_scale)
+        return b"\x00\x00" * int(SPEECH_PER_CHAR * len(text) * SAMPLE_RATE), SAMPLE_RATE
+
+    def play(waveform, sample_rate):
+        time.sleep(len(waveform) / (2.0 * sample_rate) * time_scale)
+
+    return synthesize, play
+
+
+if __name__ == "__main__":
+    time_scale = float(sys.argv[1]) if len(sys.argv) > 1 else 0.2
+    synthesize, play = make_service(time_scale)
+    pipeline = SpeechPipeline(synthesize, play)
+
+    for reply in REPLIES:
+        start = time.monotonic()
+        waveform, sample_rate = synthesize(reply)
+        sync_first = time.monotonic() - start
+        play(waveform, sample_rate)
+        sync_total = time.monotonic() - start
+
+        start = time.monotonic()
+        pipe_first = pipeline.speak(reply)
+        pipe_total = time.monotonic() - start
+
+        print(f"{len(reply)} chars: first audio sync {sync_first / time_scale:5.2f} s, "
+              f"pipelined {pipe_first / time_scale:5.2f} s | total sync {sync_total / time_scale:5.2f} s, "
+              f"pipelined {pipe_total / time_scale:5.2f} s")
+    pipeline.close()
@@ -0,0 +1,186 @@
+"""
+JPEG timings of the bundled TurboJPEG wrapper at the NAO camera resolutions:
+handle reuse, decode_into/encode_into against the allocating calls, and
+decode_batch throughput from 1 to N threads, and full against DCT-scaled
+decode for face detection, and lossless face crops against
+decode/slice/encode.
+Needs libturbojpeg (set TURBOJPEG_LIB if it is not found automatically).
+From oli-4/:
+    python tests/bench_turbojpeg.py [frames]
+"""
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from func.face_roi import FaceCropper
+from func.frame_buffer import to_full_resolution
+from func.jpeg import TURBOJPEG_LIB_ENV, pick_scaling_factor, scaled_size, turbojpeg_module
+
+# NAO top camera: kQVGA, kVGA, k4VGA
+RESOLUTIONS = [(320, 240), (640, 480), (1280, 960)]
+
+
+def make_jpeg(jpeg, width, height, seed=0):
+    """Camera-like test frame: smooth gradients plus sensor noise"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    img = np.stack([x * 255 // width, y * 255 // height, (x + y) * 255 // (width + height)], axis=-1)
+    img = np.clip(img + rng.normal(0, 8, img.shape), 0, 255).astype(np.uint8)
+    return jpeg.encode(img, quality=85), img
+
+
+def time_per_call(fn, frames):
+    """Median and p95 time per call in microseconds"""
+    fn()  # warm up
+    times = []
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1e6)
+    times.sort()
+    return statistics.median(times), times[int(0.95 * (len(times) - 1))]
+
+
+def bench_handles(frames):
+    turbojpeg = turbojpeg_module()
+    lib_path = os.getenv(TURBOJPEG_LIB_ENV)
+    per_call = turbojpeg.TurboJPEG(lib_path, reuse_handles=False)
+    reused = turbojpeg.TurboJPEG(lib_path, reuse_handles=True)
+
+    print("handle reuse (median / p95 us per frame)")
+    for width, height in RESOLUTIONS:
+        data, img = make_jpeg(reused, width, height)
+        for name, fn in [
+            ("decode", lambda j: j.decode(data)),
+            ("header", lambda j: j.decode_header(data)),
+            ("encode", lambda j: j.encode(img)),
+        ]:
+            old = time_per_call(lambda: fn(per_call), frames)
+            new = time_per_call(lambda: fn(reused), frames)
+            print(f"  {width}x{height} {name:>6}: per call {old[0]:8.1f} / {old[1]:8.1f}"
+                  f"   reused {new[0]:8.1f} / {new[1]:8.1f}   ({100 * (1 - new[0] / old[0]):.0f}% faster)")
+    reused.close()
+
+
+def bench_into(frames):
+    jpeg = turbojpeg_module().TurboJPEG(os.getenv(TURBOJPEG_LIB_ENV))
+
+    print("caller-provided buffers (median / p95 us per frame)")
+    for width, height in RESOLUTIONS:
+        data, img = make_jpeg(jpeg, width, height)
+        out = np.empty((height, width, 3), dtype=np.uint8)
+        out_buffer = bytearray(jpeg.buffer_size(width, height))
+        for name, old_fn, new_fn in [
+            ("decode", lambda: jpeg.decode(data), lambda: jpeg.decode_into(data, out)),
+            ("encode", lambda: jpeg.encode(img), lambda: jpeg.encode_into(img, out_buffer)),
+        ]:
+            old = time_per_call(old_fn, frames)
+            new = time_per_call(new_fn, frames)
+            print(f"  {width}x{height} {name:>6}: allocating {old[0]:8.1f} / {old[1]:8.1f}"
+                  f"   into {new[0]:8.1f} / {new[1]:8.1f}   ({100 * (1 - new[0] / old[0]):.0f}% faster)")
+        assert bytes(jpeg.encode_into(img, out_buffer)) == jpeg.encode(img)
+        assert np.array_equal(jpeg.decode_into(data, out), jpeg.decode(data))
+    jpeg.close()
+
+
+def bench_batch(frames, max_threads=None):
+    jpeg = turbojpeg_module().TurboJPEG(os.getenv(TURBOJPEG_LIB_ENV))
+    max_threads = max_threads or os.cpu_count() or 1
+    width, height = 640, 480
+    batch = [make_jpeg(jpeg, width, height, seed=i)[0] for i in range(min(frames, 64))]
+    out = np.empty(len(batch) * width * height * 3, dtype=np.uint8)
+
+    print(f"decode_batch, {len(batch)} frames of {width}x{height}")
+    serial = [jpeg.decode(data) for data in batch]
+    baseline = None
+    threads = 1
+    while threads <= max_threads:
+        median, _ = time_per_call(lambda: jpeg.decode_batch(batch, threads=threads, out=out), 10)
+        fps = len(batch) / (median / 1e6)
+        baseline = baseline or fps
+        print(f"  {threads:2d} threads: {fps:8.0f} frames/s  (x{fps / baseline:.2f})")
+        threads *= 2
+    result = jpeg.decode_batch(batch, out=out)
+    assert all(np.array_equal(a, b) for a, b in zip(result, serial))
+    jpeg.close()
+
+
+def bench_scaled(frames, target=(320, 240)):
+    import cv2
+    from sic_framework.core.message_python2 import BoundingBox
+
+    turbojpeg = turbojpeg_module()
+    jpeg = turbojpeg.TurboJPEG(os.getenv(TURBOJPEG_LIB_ENV))
+    # Same detector and parameters as the SIC face-detection service (minW=minH=150)
+    cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+
+    def detect(img, min_size):
+        gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+        faces = cascade.detectMultiScale(gray, scaleFactor=1.2, minNeighbors=5, minSize=min_size)
+        return [BoundingBox(x, y, w, h) for (x, y, w, h) in faces]
+
+    print(f"decode + face detect, target {target[0]}x{target[1]} (median / p95 us per frame)")
+    for width, height in RESOLUTIONS:
+        data, _ = make_jpeg(jpeg, width, height)
+        factor = pick_scaling_factor(width, height, *target, jpeg.scaling_factors)
+        scaled_width, scaled_height = scaled_size(width, height, factor)
+        scale = (width / scaled_width, height / scaled_height)
+        full = np.empty((height, width, 3), dtype=np.uint8)
+        small = np.empty((scaled_height, scaled_width, 3), dtype=np.uint8)
+        min_size = (int(150 / scale[0]), int(150 / scale[1]))
+
+        def full_path():
+            return detect(jpeg.decode_into(data, full, pixel_format=turbojpeg.TJPF_RGB), (150, 150))
+
+        def scaled_path():
+            img = jpeg.decode_into(data, small, pixel_format=turbojpeg.TJPF_RGB, scaling_factor=factor)
+            return to_full_resolution(detect(img, min_size), scale)
+
+        old = time_per_call(full_path, frames)
+        new = time_per_call(scaled_path, frames)
+        print(f"  {width}x{height} at {factor[0]}/{factor[1]}: full {old[0]:9.1f} / {old[1]:9.1f}"
+              f"   scaled {new[0]:9.1f} / {new[1]:9.1f}   (x{old[0] / new[0]:.1f})")
+    jpeg.close()
+
+
+class Box:
+    def __init__(self, x, y, w, h):
+        self.x, self.y, self.w, self.h = x, y, w, h
+
+
+def bench_face_roi(frames):
+    jpeg = turbojpeg_module().TurboJPEG(os.getenv(TURBOJPEG_LIB_ENV))
+    cropper = FaceCropper(jpeg, margin=0.2)
+
+    print("face crops, 3 faces per frame (median / p95 us per frame)")
+    for width, height in RESOLUTIONS[1:]:
+        data, _ = make_jpeg(jpeg, width, height)
+        size = height // 4
+        faces = [Box(width // 8 + i * width // 3, height // 3, size, size) for i in range(3)]
+        regions = cropper.regions(data, faces)
+
+        def decode_slice_encode():
+            img = jpeg.decode(data)
+            return [jpeg.encode(np.ascontiguousarray(img[y:y + h, x:x + w]))
+                    for x, y, w, h in regions]
+
+        old = time_per_call(decode_slice_encode, frames)
+        new = time_per_call(lambda: cropper.crop(data, faces), frames)
+        crop_bytes = sum(len(crop) for _, crop in cropper.crop(data, faces))
+        print(f"  {width}x{height}: decode/slice/encode {old[0]:8.1f} / {old[1]:8.1f}"
+              f"   lossless crop {new[0]:8.1f} / {new[1]:8.1f}   (x{old[0] / new[0]:.1f},"
+              f" {crop_bytes} bytes)")
+    jpeg.close()
+
+
+if __name__ == "__main__":
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    bench_handles(frames)
+    bench_into(frames)
+    bench_batch(frames)
+    bench_scaled(frames)
+    bench_face_roi(frames)
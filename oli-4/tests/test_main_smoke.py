@@ -0,0 +1,56 @@
+"""
+Smoke test for main.py: constructs Oli4v4Demo against the simulated NAO
+(func/sim_nao.py) with dummy credentials, so errors in __init__/setup show
+up without a robot, Gemini or Dialogflow. Needs the Redis server like every
+SIC application.
+From oli-4/:
+    python tests/test_main_smoke.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+
+def make_demo():
+    """
+    Oli4v4Demo on the simulated NAO, run from a temporary copy of config/
+    with dummy keys (the working directory changes to it). Returns the demo
+    and the directory, to remove when done.
+    """
+    workdir = tempfile.mkdtemp(prefix="oli4_smoke_")
+    shutil.copytree(os.path.join(ROOT, "config"), os.path.join(workdir, "config"))
+    # Real keys are not in the repo
+    for name in ("api_key.txt", "google-key.json"):
+        with open(os.path.join(workdir, "config", name), "w") as f:
+            f.write("dummy")
+    os.environ["OLI4_SIMULATE_NAO"] = "1"
+    os.chdir(workdir)
+
+    import main as oli_main
+
+    with mock.patch.object(oli_main.service_account.Credentials, "from_service_account_file"), \
+            mock.patch.object(oli_main.dialogflow, "SessionsClient"), \
+            mock.patch.object(oli_main.genai, "configure"):
+        demo = oli_main.Oli4v4Demo()
+    return demo, workdir
+
+
+def main():
+    from func.sim_nao import SimulatedNao
+
+    demo, workdir = make_demo()
+    assert isinstance(demo.nao, SimulatedNao), f"expected the simulated NAO, got {demo.nao!r}"
+    for step in demo.show.sequence():
+        if step.gestures:
+            assert step.gestures in demo.gesture_sets, f"{step.name}: unknown gesture set {step.gestures!r}"
+    shutil.rmtree(workdir, ignore_errors=True)
+    print("Oli4v4Demo constructed with the simulated NAO")
+
+
+if __name__ == "__main__":
+    main()
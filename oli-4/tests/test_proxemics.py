@@ -4,9 +4,17 @@ from sic_framework.core import sic_logging
 from sic_framework.devices import Nao
 from sic_framework.devices.common_naoqi.naoqi_stiffness import Stiffness
 from sic_framework.devices.common_naoqi.naoqi_tracker import StartTrackRequest, StopAllTrackRequest
-from sic_framework.devices.common_naoqi.naoqi_motion import NaoqiMoveRequest, NaoqiMoveToRequest
+from sic_framework.devices.common_naoqi.naoqi_motion import NaoqiMoveRequest
+import json
+import os
+import sys
 import time
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from func.face_filter import FaceTrackFilter
+from func.proxemics import ProxemicsController
+from func.sim_nao import make_nao
+
 
 class NaoFaceProxemics(SICApplication):
 
@@ -14,16 +22,36 @@ class NaoFaceProxemics(SICApplication):
         super().__init__()
         self.nao_ip = "10.0.0.212"
         self.nao = None
-        self.last_tracker_state = None #states?! (geen states gevodnen in nao)
+
+        with open("config/config.json", "r") as f:
+            self.proxemics_conf = json.load(f).get("proxemics", {})
+        self.use_face_filter = self.proxemics_conf.pop("use_face_filter", True)
+        self.controller = None
+
+        # Raw tracker states are recorded for replay (tests/bench_face_filter.py)
+        os.makedirs("logs", exist_ok=True)
+        self.trace_path = os.path.join("logs", f"tracker_trace_{int(time.time())}.jsonl")
+        self.trace_file = None
 
         self.setup()
 
+    def send_move(self, x, y, theta):
+        self.nao.motion.request(NaoqiMoveRequest(x, y, theta))
+
+    def on_tracker_update(self, state):
+        self.controller.on_tracker_update(state)
+        self.trace_file.write(json.dumps({"t": time.monotonic(), "w": state.w, "alpha": state.alpha}) + "\n")
+
     def setup(self):
         self.logger.info("Start NAO-proxemics test")
-        self.nao = Nao(ip=self.nao_ip)
-        #asynchrone updates?---
-        def on_tracker_update(state):
-            self.last_tracker_state = state  
+        self.nao = make_nao(self.nao_ip)
+
+        # Tracker states are pushed into the controller's latest-value slot
+        face_filter = FaceTrackFilter() if self.use_face_filter else None
+        self.controller = ProxemicsController(
+            self.send_move, face_filter=face_filter, logger=self.logger, **self.proxemics_conf)
+        self.trace_file = open(self.trace_path, "a", encoding="utf-8")
+        self.nao.tracker.register_callback(self.on_tracker_update)
 
     def run(self):
         try:
@@ -42,65 +70,10 @@ class NaoFaceProxemics(SICApplication):
             )
 
             time.sleep(0.2)
-            self.logger.info("Entering proxemics loop…")
-
-            while not self.shutdown_event.is_set():
-                state = self.last_tracker_state #state hier
-
-                # NO FACE DETECTED: rotate for a moment to search
-                if state is None:
-                    self.nao.motion.request(NaoqiMoveRequest(0.0, 0.0, 0.3))  # rotate left, maybe random? (or try to make it line the face up in the center first, but check first how it interacts with the gaze function)
-                    time.sleep(0.3)                                          # rotate for x seconds
-                    self.nao.motion.request(NaoqiMoveRequest(0.0, 0.0, 0.0)) # stop rotation
-                    time.sleep(0.1)  # pause before checking again
-                    continue
-
-                #face detected, get values
-                size = state.w       # basically distance, although face size could matter
-                alpha = state.alpha  # horizontal offset. Maybe use it to center later
-
-                # FORWARD / BACKWARD BASED ON DISTANCE
-
-                if size < 0.15:
-                    # Far: move forward (negative X) (pauses by himself, if not mistaken, else uncomment the two lines after)
-                    self.nao.motion.request(NaoqiMoveToRequest(+0.10, 0.0, 0.0))
-                    #time.sleep(0.1)  #hoe lang je stapt (draait bij z)
-                    #self.nao.motion.request(NaoqiMoveRequest(0.0, 0.0, 0.0))
-                elif size > 0.30:
-                    # Too close: move backward
-                    self.nao.motion.request(NaoqiMoveToRequest(-0.10, 0.0, 0.0))
-                    #time.sleep(0.1)  #hoe lang je stapt (draait bij z)
-                    #self.nao.motion.request(NaoqiMoveRequest(0.0, 0.0, 0.0))
-
-                else:
-                    # Good distance :stop forward/backward movement
-                    self.nao.motion.request(NaoqiMoveRequest(0, 0, 0))
-
-                # SIDE-TO-SIDE BASED ON ANGLE (speed-based, timed) (do the z to turn around it in its place)
-                if alpha > 0.3:
-                    # Face left: move right (negative Y)
-                    self.nao.motion.request(NaoqiMoveRequest(0.0, 0, -0.3))
-                    time.sleep(0.1)  #hoe lang je stapt (draait bij z)
-                    self.nao.motion.request(NaoqiMoveRequest(0.0, 0.0, 0.0))
-                elif alpha > 0.15:
-                    # Face left: move right (negative Y)
-                    self.nao.motion.request(NaoqiMoveRequest(0.0, 0, -0.15))
-                    time.sleep(0.1)  #hoe lang je stapt
-                    self.nao.motion.request(NaoqiMoveRequest(0.0, 0.0, 0.0))
-
-                elif alpha < -0.3:
-                    # Face right: move left (positive Y)
-                    self.nao.motion.request(NaoqiMoveRequest(0.0, 0, 0.3))
-                    time.sleep(0.1)  # #hoe lang je stapt
-                    self.nao.motion.request(NaoqiMoveRequest(0.0, 0.0, 0.0))
-                elif alpha < -0.15:
-                    # Face right: move left (positive Y)
-                    self.nao.motion.request(NaoqiMoveRequest(0.0, 0, 0.15))
-                    time.sleep(0.1)  # #hoe lang je stapt
-                    self.nao.motion.request(NaoqiMoveRequest(0.0, 0.0, 0.0))
-                else:
-                    # Perfectly centered: make sure sideways motion is stopped
-                    self.nao.motion.request(NaoqiMoveRequest(0, 0, 0))
+            self.logger.info(f"Entering proxemics loop at {self.controller.rate_hz} Hz…")
+            self.controller.run(self.shutdown_event)
+            self.logger.info(f"Sent {self.controller.commands_sent} move commands "
+                             f"in {self.controller.ticks} control ticks")
 
         except Exception as e:
             self.logger.error(f"Error: {e}")
@@ -108,6 +81,7 @@ class NaoFaceProxemics(SICApplication):
         finally:
             self.logger.info("Stopping tracking…")
             self.nao.tracker.request(StopAllTrackRequest())
+            self.trace_file.close()
             self.shutdown()
 
 
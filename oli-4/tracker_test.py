@@ -7,6 +7,7 @@ import os
 
 # Gesture functions
 from func.gesture import classify_gesture_api, select_gesture
+from func.sim_nao import make_nao
 
 # SIC framework
 from sic_framework.core.sic_application import SICApplication
@@ -69,7 +70,7 @@ class NaoTrackerDemo(SICApplication):
         self.logger.info("Starting NAO Tracker Demo...")
         
         # Connect to NAO
-        self.nao = Nao(ip=self.nao_ip)
+        self.nao = make_nao(self.nao_ip)
     
     def run(self):
         try:
@@ -2,13 +2,24 @@ from fastapi import FastAPI
 from pydantic import BaseModel
 from transformers import pipeline, AutoModelForSequenceClassification, AutoTokenizer
 import uvicorn
+import argparse
 import os
+import socket
+import threading
+
+import msgpack
+import redis
 
 app = FastAPI()
 
 MODEL_NAME = "MoritzLaurer/deberta-v3-base-mnli"
 LOCAL_DIR = "local_model"
 
+# Redis stream transport, GESTURE_STREAM must match oli-4/func/gesture.py
+GESTURE_STREAM = "gesture:jobs"
+GESTURE_GROUP = "gesture-workers"
+REPLY_TTL = 60
+
 # DEBUG: print absolute path for local_model
 abs_local_dir = os.path.abspath(LOCAL_DIR)
 print(f"[DEBUG] local_model folder will be looked for at: {abs_local_dir}")
@@ -68,5 +79,53 @@ def classify(req: ClassificationRequest):
     return {"label": result["labels"][0], "scores": result["scores"]}
 
 
+def run_stream_worker(consumer_name=None, block_ms=5000):
+    """
+    Consume classification jobs from the Redis stream as part of the
+    consumer group. Start more processes to add more workers.
+    """
+    conn = redis.Redis(
+        host=os.getenv("DB_IP", "localhost"),
+        port=int(os.getenv("DB_PORT", "6379")),
+        password=os.getenv("DB_PASS", "changemeplease"),
+    )
+    consumer_name = consumer_name or f"{socket.gethostname()}-{os.getpid()}"
+
+    try:
+        conn.xgroup_create(GESTURE_STREAM, GESTURE_GROUP, id="$", mkstream=True)
+    except redis.exceptions.ResponseError as e:
+        # Group already exists (another worker created it)
+        if "BUSYGROUP" not in str(e):
+            raise
+
+    print(f"Stream worker '{consumer_name}' listening on '{GESTURE_STREAM}'...")
+    while True:
+        entries = conn.xreadgroup(
+            GESTURE_GROUP, consumer_name, {GESTURE_STREAM: ">"}, count=1, block=block_ms)
+        for _, messages in entries or []:
+            for message_id, fields in messages:
+                job = msgpack.unpackb(fields[b"job"])
+                try:
+                    result = classifier(job["text"], candidate_labels=job["labels"])
+                    reply = {"label": result["labels"][0], "scores": result["scores"]}
+                except Exception as e:
+                    reply = {"error": str(e)}
+
+                pipe = conn.pipeline()
+                pipe.rpush(job["reply"], msgpack.packb(reply, use_single_float=True))
+                pipe.expire(job["reply"], REPLY_TTL)
+                pipe.xack(GESTURE_STREAM, GESTURE_GROUP, message_id)
+                pipe.execute()
+
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="127.0.0.1", port=8000)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transport", choices=["http", "redis", "both"], default="http")
+    args = parser.parse_args()
+
+    if args.transport == "redis":
+        run_stream_worker()
+    else:
+        if args.transport == "both":
+            threading.Thread(target=run_stream_worker, daemon=True).start()
+        uvicorn.run(app, host="127.0.0.1", port=8000)